@@ -1,22 +1,56 @@
+import os
+import multiprocessing
+
+# Serve single-row inference with single-threaded BLAS/OpenMP pools so the
+# two runtimes do not oversubscribe cores per request; this has to happen
+# before numpy/scikit-learn load them. Training raises the limits with
+# threadpoolctl
+for _thread_var in ('OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS'):
+    os.environ.setdefault(_thread_var, '1')
+
 from flask import Flask, request, jsonify
 from flask_cors import CORS
 import numpy as np
 import pandas as pd
-from sklearn.ensemble import IsolationForest
-from sklearn.cluster import KMeans
-from sklearn.metrics.pairwise import cosine_similarity
+import scipy.sparse as sp
 import joblib
-import os
+import copy
+import threading
+import time
+import uuid
+import orjson
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from cachetools import TTLCache
+from threadpoolctl import threadpool_limits
 from datetime import datetime, timedelta
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from sklearn.linear_model import LogisticRegression
+from sklearn.tree import DecisionTreeClassifier
+from sklearn.model_selection import train_test_split
+from sklearn.metrics import accuracy_score
 from dotenv import load_dotenv
 import logging
+from typing import Optional
 from common.data_loader import (
     load_anomaly_data, load_clustering_data, 
     load_recommendation_data, load_trend_data,
     validate_anomaly_data, validate_clustering_data,
-    validate_recommendation_data, validate_trend_data
+    validate_recommendation_data, validate_trend_data,
+    records_to_features, load_in_parallel, CLUSTERING_FEATURES
 )
+from models.anomaly import IsolationForestScorer
+from manual_impl.manual_logistic import ManualLogisticRegression
+from manual_impl.manual_tree import ManualDecisionTree
+from training.fit_jobs import (
+    build_anomaly_detector, build_user_clusterer, select_top_k, item_norms,
+    fit_anomaly, fit_clustering, fit_recommendation
+)
+from common.batching import MicroBatcher
+from common.json_provider import OrjsonProvider
+from common.compression import install_gzip
 
 # Load environment variables
 load_dotenv()
@@ -26,68 +60,242 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
+# request.json and jsonify() go through orjson
+app.json = OrjsonProvider(app)
 CORS(app)
+# Large JSON responses are gzipped for clients that send Accept-Encoding: gzip
+install_gzip(app, min_size=int(os.getenv('COMPRESS_MIN_SIZE', '512')))
 
 # Configuration
 API_URL = os.getenv('API_URL', 'http://api:8080')
 API_KEY = os.getenv('API_KEY', '')
+API_REQUEST_TIMEOUT = (1, 5)  # (connect, read) seconds
 MODEL_DIR = 'models'
 os.makedirs(MODEL_DIR, exist_ok=True)
 
+# Neighbours kept per item in the recommendation model
+RECOMMENDATION_TOP_K = int(os.getenv('RECOMMENDATION_TOP_K', '50'))
+
+# Threads used to walk the isolation trees when scoring a batch. Every
+# Gunicorn worker scores its own batches, so the cores are split between the
+# WEB_CONCURRENCY workers (the variable Gunicorn reads its worker count from)
+SCORING_N_JOBS = max(1, (os.cpu_count() or 1) // int(os.getenv('WEB_CONCURRENCY', '1')))
+# BLAS/OpenMP threads and tree-building jobs allowed while fitting models,
+# shared by the concurrently running fit jobs
+TRAINING_N_THREADS = int(os.getenv('TRAINING_N_THREADS', str(os.cpu_count() or 1)))
+# Fit jobs run in processes started by a fork server rather than forked from
+# this threaded process, whose batcher, job and request threads may hold locks
+# at fork time. The server imports the fit functions once, so each job does
+# not pay for importing scikit-learn again
+TRAINING_MP_CONTEXT = multiprocessing.get_context('forkserver')
+TRAINING_MP_CONTEXT.set_forkserver_preload(['__main__', 'training.fit_jobs'])
+
 # Initialize models
-anomaly_detector = IsolationForest(contamination=0.1, random_state=42)
-user_clusterer = KMeans(n_clusters=5, random_state=42)
-recommendation_model = None
+anomaly_detector = build_anomaly_detector()
+anomaly_scorer = None  # Fast scoring path for the fitted anomaly detector
+user_clusterer = build_user_clusterer()
+recommendation_model = None  # (top-k neighbour indices, top-k similarities) per item
 recommendation_matrix = None  # Store the user-item matrix for recommendations
+recommendation_user_index = {}  # Backend user ID -> user-item matrix row
+recommendation_item_ids = None  # User-item matrix column -> backend product ID
+recommendation_item_index = {}  # Backend product ID -> user-item matrix column
+recommendation_item_norms = None  # L2 norm of every user-item matrix column
+user_cluster_centers = None  # (centers, squared norms) cached for fast cluster assignment
+
+def _set_anomaly_detector(model):
+    """Install an anomaly detection model and build its fast scorer"""
+    global anomaly_detector, anomaly_scorer
+    
+    anomaly_scorer = IsolationForestScorer(model) if hasattr(model, 'estimators_') else None
+    anomaly_detector = model
+    _predict_anomaly_cached.cache_clear()
+
+def _set_user_clusterer(model):
+    """Install a user clustering model and precompute its centers for assignment"""
+    global user_clusterer, user_cluster_centers
+    
+    if hasattr(model, 'cluster_centers_'):
+        centers = np.ascontiguousarray(model.cluster_centers_, dtype=np.float32)
+        centers_sq = (centers ** 2).sum(axis=1)
+        user_cluster_centers = (centers, centers_sq)
+    else:
+        user_cluster_centers = None
+    user_clusterer = model
+    _assign_user_cached.cache_clear()
+
+def _set_recommendation_model(model_data: Optional[dict]):
+    """Install a recommendation model (similarity + user-item matrix + ID maps)"""
+    global recommendation_model, recommendation_matrix, recommendation_user_index, recommendation_item_ids
+    global recommendation_item_index, recommendation_item_norms
+    
+    if model_data is None:
+        recommendation_model = None
+        recommendation_matrix = None
+        recommendation_user_index = {}
+        recommendation_item_ids = None
+        recommendation_item_index = {}
+        recommendation_item_norms = None
+        return
+    
+    matrix = model_data['user_item_matrix']
+    if not sp.issparse(matrix) or matrix.format != 'csr':
+        # Models saved before the sparse layout carry a dense matrix; convert
+        # once here so scoring always reads rated items from CSR rows
+        matrix = sp.csr_matrix(matrix, dtype=np.float32)
+        matrix.eliminate_zeros()
+    # Models saved before the ID maps were stored used positional IDs
+    user_ids = model_data.get('user_ids', np.arange(matrix.shape[0]))
+    recommendation_user_index = {user_id: row for row, user_id in enumerate(np.asarray(user_ids).tolist())}
+    recommendation_item_ids = np.asarray(model_data.get('item_ids', np.arange(matrix.shape[1])))
+    recommendation_item_index = {item_id: column for column, item_id in enumerate(recommendation_item_ids.tolist())}
+    # Models saved before the norms were stored get them computed once here
+    norms = model_data.get('item_norms')
+    recommendation_item_norms = item_norms(matrix) if norms is None else norms
+    recommendation_matrix = matrix
+    if 'top_k_indices' in model_data:
+        recommendation_model = (model_data['top_k_indices'], model_data['top_k_scores'])
+    else:
+        # Models saved before top-k truncation carry the full similarity matrix
+        recommendation_model = _top_k_neighbours(model_data['similarity_matrix'], RECOMMENDATION_TOP_K)
+
+# Installer for each versioned model type, used when a stored version is
+# swapped back in
+MODEL_INSTALLERS = {
+    'anomaly': _set_anomaly_detector,
+    'clustering': _set_user_clusterer,
+    'recommendation': _set_recommendation_model
+}
+
+def _reload_model(model_type: str):
+    """Install the version manager's current version of a model and persist it for the other workers"""
+    model, _ = version_manager.load_model(model_type)
+    MODEL_INSTALLERS[model_type](model)
+    save_models([model_type])
+
+# Saved model files shared by all worker processes, and how often (seconds)
+# a worker checks whether another one has replaced them
+MODEL_FILES = ('anomaly_detector.joblib', 'user_clusterer.joblib', 'recommendation_model.joblib')
+MODEL_SYNC_INTERVAL = float(os.getenv('MODEL_SYNC_INTERVAL', '5'))
+_model_files_state = None  # Modification times of MODEL_FILES this process last loaded or wrote
+_next_model_sync = 0.0
+_model_sync_lock = threading.Lock()
+
+def _model_files_signature() -> tuple:
+    """Modification times of the saved model files, None for missing ones"""
+    signature = []
+    for name in MODEL_FILES:
+        try:
+            signature.append(os.stat(f'{MODEL_DIR}/{name}').st_mtime_ns)
+        except FileNotFoundError:
+            signature.append(None)
+    return tuple(signature)
 
 def load_or_create_models():
     """Load existing models or create new ones if they don't exist"""
-    global anomaly_detector, user_clusterer, recommendation_model, recommendation_matrix
+    global _model_files_state
+    # Taken before loading, so a file replaced mid-load is picked up next sync
+    _model_files_state = _model_files_signature()
     
     # Load or create anomaly detector
     try:
-        anomaly_detector = joblib.load(f'{MODEL_DIR}/anomaly_detector.joblib')
+        _set_anomaly_detector(joblib.load(f'{MODEL_DIR}/anomaly_detector.joblib', mmap_mode='r'))
         logger.info("Loaded existing anomaly detector model")
     except Exception as e:
         logger.info(f"Creating new anomaly detector model: {e}")
-        anomaly_detector = IsolationForest(contamination=0.1, random_state=42)
+        _set_anomaly_detector(build_anomaly_detector())
     
     # Load or create user clusterer
     try:
-        user_clusterer = joblib.load(f'{MODEL_DIR}/user_clusterer.joblib')
+        _set_user_clusterer(joblib.load(f'{MODEL_DIR}/user_clusterer.joblib', mmap_mode='r'))
         logger.info("Loaded existing user clustering model")
     except Exception as e:
         logger.info(f"Creating new user clustering model: {e}")
-        user_clusterer = KMeans(n_clusters=5, random_state=42)
+        _set_user_clusterer(build_user_clusterer())
     
     # Load or create recommendation model
     try:
-        recommendation_data = joblib.load(f'{MODEL_DIR}/recommendation_model.joblib')
-        recommendation_model = recommendation_data['similarity_matrix']
-        recommendation_matrix = recommendation_data['user_item_matrix']
+        # Memory-map the similarity/user-item arrays read-only so worker
+        # processes share one copy through the page cache
+        _set_recommendation_model(joblib.load(f'{MODEL_DIR}/recommendation_model.joblib', mmap_mode='r'))
         logger.info("Loaded existing recommendation model")
     except Exception as e:
         logger.info(f"Creating new recommendation model: {e}")
-        recommendation_model = None
-        recommendation_matrix = None
+        _set_recommendation_model(None)
+
+def _dump_model(obj, path: str):
+    """Write a model uncompressed (mmap-able) and swap it into place atomically"""
+    # Writing through a temp file keeps pages memory-mapped from the previous
+    # file valid for processes that still have it loaded
+    tmp_path = f"{path}.tmp"
+    joblib.dump(obj, tmp_path, compress=0)
+    os.replace(tmp_path, path)
 
-def save_models():
-    """Save all models to disk"""
+def save_models(model_types=None):
+    """
+    Save models to disk
+    
+    Args:
+        model_types: Model types to write ('anomaly', 'clustering', 'recommendation'),
+            all of them when None
+    """
+    global _model_files_state
     try:
-        joblib.dump(anomaly_detector, f'{MODEL_DIR}/anomaly_detector.joblib')
-        joblib.dump(user_clusterer, f'{MODEL_DIR}/user_clusterer.joblib')
-        
-        if recommendation_model is not None and recommendation_matrix is not None:
+        # A rollback replaces a single model, so only its file is rewritten
+        # instead of serializing all three on the request thread
+        if model_types is None or 'anomaly' in model_types:
+            _dump_model(anomaly_detector, f'{MODEL_DIR}/anomaly_detector.joblib')
+        if model_types is None or 'clustering' in model_types:
+            _dump_model(user_clusterer, f'{MODEL_DIR}/user_clusterer.joblib')
+        
+        if ((model_types is None or 'recommendation' in model_types)
+                and recommendation_model is not None and recommendation_matrix is not None):
             recommendation_data = {
-                'similarity_matrix': recommendation_model,
-                'user_item_matrix': recommendation_matrix
+                'top_k_indices': recommendation_model[0],
+                'top_k_scores': recommendation_model[1],
+                'item_norms': recommendation_item_norms,
+                'user_item_matrix': recommendation_matrix.astype(np.float32),
+                'user_ids': np.array(list(recommendation_user_index)),
+                'item_ids': recommendation_item_ids
             }
-            joblib.dump(recommendation_data, f'{MODEL_DIR}/recommendation_model.joblib')
+            _dump_model(recommendation_data, f'{MODEL_DIR}/recommendation_model.joblib')
         
-        logger.info("Successfully saved all models")
+        _model_files_state = _model_files_signature()
+        logger.info(f"Successfully saved {', '.join(model_types) if model_types else 'all'} models")
     except Exception as e:
         logger.error(f"Error saving models: {e}")
 
+# Pooled keep-alive session so backend calls reuse connections instead of
+# paying a TCP/TLS handshake on every request
+http_session = requests.Session()
+_http_adapter = HTTPAdapter(pool_connections=32, pool_maxsize=64,
+                            max_retries=Retry(total=2, backoff_factor=0.1))
+http_session.mount('http://', _http_adapter)
+http_session.mount('https://', _http_adapter)
+
+# Runs backend fetches in the background so their round trips overlap with
+# local work or with each other; sized to the connection pool
+backend_executor = ThreadPoolExecutor(max_workers=32, thread_name_prefix='backend')
+
+# Recently fetched user purchases; users refresh recommendations far more
+# often than they buy, so most /recommend calls skip the backend round trip
+PURCHASE_CACHE_TTL = int(os.getenv('PURCHASE_CACHE_TTL', '60'))
+_purchase_cache = TTLCache(maxsize=10_000, ttl=PURCHASE_CACHE_TTL)
+_purchase_cache_lock = threading.Lock()
+
+def _fetch_user_purchases(user_id):
+    """Fetch a user's purchase history from the backend, cached for PURCHASE_CACHE_TTL seconds"""
+    with _purchase_cache_lock:
+        purchases = _purchase_cache.get(user_id)
+    if purchases is not None:
+        return purchases
+    
+    purchases = _make_authenticated_request(f"/api/users/{user_id}/purchases")
+    # Failed fetches are not cached so the next request retries
+    if purchases is not None:
+        with _purchase_cache_lock:
+            _purchase_cache[user_id] = purchases
+    return purchases
+
 def _make_authenticated_request(endpoint: str, method: str = 'GET', data: dict = None):
     """Make authenticated API request to backend"""
     try:
@@ -98,15 +306,15 @@ def _make_authenticated_request(endpoint: str, method: str = 'GET', data: dict =
             headers['Authorization'] = f'Bearer {API_KEY}'
         
         if method == 'GET':
-            response = requests.get(url, headers=headers, timeout=30)
+            response = http_session.get(url, headers=headers, timeout=API_REQUEST_TIMEOUT)
         elif method == 'POST':
             headers['Content-Type'] = 'application/json'
-            response = requests.post(url, headers=headers, json=data, timeout=30)
+            response = http_session.post(url, headers=headers, json=data, timeout=API_REQUEST_TIMEOUT)
         else:
             raise ValueError(f"Unsupported HTTP method: {method}")
         
         response.raise_for_status()
-        return response.json()
+        return orjson.loads(response.content)
         
     except requests.exceptions.RequestException as e:
         logger.error(f"API request failed for {endpoint}: {e}")
@@ -115,6 +323,29 @@ def _make_authenticated_request(endpoint: str, method: str = 'GET', data: dict =
         logger.error(f"Unexpected error in API request: {e}")
         return None
 
+@app.before_request
+def sync_models_from_disk():
+    """
+    Reload the models when another worker process has saved new ones
+    
+    Under Gunicorn every worker holds its own copy of the models, but /train
+    and the rollback endpoints only run in one of them; that worker saves the
+    result and the others pick it up here, at most MODEL_SYNC_INTERVAL later.
+    """
+    global _next_model_sync
+    now = time.monotonic()
+    if now < _next_model_sync or not _model_sync_lock.acquire(blocking=False):
+        return
+    try:
+        _next_model_sync = now + MODEL_SYNC_INTERVAL
+        if _model_files_signature() != _model_files_state:
+            logger.info("Saved models changed on disk, reloading")
+            load_or_create_models()
+    except Exception as e:
+        logger.error(f"Error syncing models from disk: {e}")
+    finally:
+        _model_sync_lock.release()
+
 @app.route('/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
@@ -128,6 +359,74 @@ def health_check():
         "timestamp": datetime.now().isoformat()
     })
 
+def _score_request_batch(features: np.ndarray) -> list:
+    """Score a batch of request feature rows, returning (score, is_anomaly) per row"""
+    if anomaly_scorer is None:
+        raise ValueError("Anomaly detection model is not trained")
+    scorer = anomaly_scorer
+    
+    # Score once; predict() is just score_samples compared against the
+    # threshold fitted at training time (offset_), so derive the label here
+    # instead of walking every tree a second time. Large batches spread the
+    # trees over SCORING_N_JOBS threads
+    scores = scorer.score_samples(features, n_jobs=SCORING_N_JOBS)
+
+    # Lower scores indicate anomalies
+    is_anomaly = scores < scorer.offset_
+    return list(zip(scores.tolist(), is_anomaly.tolist()))
+
+def _assign_user_batch(features: np.ndarray) -> list:
+    """Assign a batch of user feature rows to clusters"""
+    if user_cluster_centers is None:
+        raise ValueError("User clustering model is not trained")
+    centers, centers_sq = user_cluster_centers
+    
+    # argmin ||x - c||^2 == argmin ||c||^2 - 2 x.c since ||x||^2 is the same
+    # for every cluster; one small GEMM instead of KMeans.predict's validation
+    distances = centers_sq - 2 * (np.asarray(features, dtype=np.float32) @ centers.T)
+    return distances.argmin(axis=1).tolist()
+
+# Coalesce concurrent single-row requests into one model call per batch
+# Coalescing window, batch size and the longest a request waits for its result
+BATCH_WAIT_MS = float(os.getenv('BATCH_WAIT_MS', '5'))
+BATCH_MAX_SIZE = int(os.getenv('BATCH_MAX_SIZE', '64'))
+BATCH_RESULT_TIMEOUT = float(os.getenv('BATCH_RESULT_TIMEOUT', '1.0'))
+
+request_batcher = MicroBatcher(_score_request_batch, n_features=3, max_batch_size=BATCH_MAX_SIZE,
+                               batch_wait_timeout_s=BATCH_WAIT_MS / 1000, name="request-batcher")
+user_batcher = MicroBatcher(_assign_user_batch, n_features=4, max_batch_size=BATCH_MAX_SIZE,
+                            batch_wait_timeout_s=BATCH_WAIT_MS / 1000, name="user-batcher")
+
+# Repeated feature vectors (client retries, bots) are answered from an LRU
+# keyed on the features rounded to FEATURE_CACHE_DECIMALS; cleared whenever
+# the corresponding model is replaced
+FEATURE_CACHE_DECIMALS = 3
+
+@lru_cache(maxsize=2 ** 16)
+def _predict_anomaly_cached(features: tuple) -> tuple:
+    """(score, is_anomaly) for a quantized request feature tuple"""
+    return request_batcher.predict(list(features), timeout=BATCH_RESULT_TIMEOUT)
+
+@lru_cache(maxsize=2 ** 16)
+def _assign_user_cached(features: tuple) -> int:
+    """Cluster index for a quantized user feature tuple"""
+    return user_batcher.predict(list(features), timeout=BATCH_RESULT_TIMEOUT)
+
+def warm_up_models():
+    """Run one dummy prediction through each model so the first request pays no start-up cost"""
+    try:
+        # Starts the batcher worker threads and initializes BLAS thread pools;
+        # untrained models are skipped
+        if anomaly_scorer is not None:
+            request_batcher.predict([0.0] * request_batcher.n_features)
+        if user_cluster_centers is not None:
+            user_batcher.predict([0.0] * user_batcher.n_features)
+        if recommendation_model is not None:
+            generate_recommendations(0, 1)
+        logger.info("Model warm-up complete")
+    except Exception as e:
+        logger.warning(f"Model warm-up failed: {e}")
+
 @app.route('/analyze/request', methods=['POST'])
 def analyze_request():
     """Analyze request for anomalies"""
@@ -137,29 +436,58 @@ def analyze_request():
             return jsonify({"error": "No data provided"}), 400
         
         # Extract features
-        features = np.array([
-            data.get('response_time', 0),
-            data.get('request_size', 0),
-            data.get('error_count', 0)
-        ]).reshape(1, -1)
-        
-        # Predict anomaly
-        prediction = anomaly_detector.predict(features)
-        score = anomaly_detector.score_samples(features)
+        features = [
+            float(data.get('response_time', 0)),
+            float(data.get('request_size', 0)),
+            float(data.get('error_count', 0))
+        ]
         
-        # Calculate anomaly threshold (lower scores indicate anomalies)
-        is_anomaly = prediction[0] == -1
+        # Predict anomaly from the cache or as part of the next batch
+        score, is_anomaly = _predict_anomaly_cached(tuple(round(value, FEATURE_CACHE_DECIMALS) for value in features))
+        prediction = -1 if is_anomaly else 1
         
         return jsonify({
             "is_anomaly": bool(is_anomaly),
-            "anomaly_score": float(score[0]),
-            "prediction": int(prediction[0])
+            "anomaly_score": float(score),
+            "prediction": prediction
         })
         
+    except FutureTimeoutError:
+        logger.error("Timed out waiting for anomaly prediction batch")
+        return jsonify({"error": "Prediction timed out"}), 503
     except Exception as e:
         logger.error(f"Error in anomaly analysis: {e}")
         return jsonify({"error": "Internal server error"}), 500
 
+@app.route('/analyze/requests', methods=['POST'])
+def analyze_requests():
+    """Analyze a batch of requests for anomalies with a single model call"""
+    try:
+        data = request.json
+        if not data or not data.get('items'):
+            return jsonify({"error": "No items provided"}), 400
+        
+        # One row per request, scored in one vectorized pass instead of
+        # going through the single-request batcher row by row
+        features = np.asarray([
+            [float(item.get('response_time', 0)),
+             float(item.get('request_size', 0)),
+             float(item.get('error_count', 0))]
+            for item in data['items']
+        ], dtype=np.float32)
+        
+        results = [{
+            "is_anomaly": bool(is_anomaly),
+            "anomaly_score": float(score),
+            "prediction": -1 if is_anomaly else 1
+        } for score, is_anomaly in _score_request_batch(features)]
+        
+        return jsonify({"results": results})
+        
+    except Exception as e:
+        logger.error(f"Error in batch anomaly analysis: {e}")
+        return jsonify({"error": "Internal server error"}), 500
+
 @app.route('/analyze/user', methods=['POST'])
 def analyze_user_behavior():
     """Analyze user behavior patterns"""
@@ -169,15 +497,15 @@ def analyze_user_behavior():
             return jsonify({"error": "No data provided"}), 400
         
         # Extract user activity features
-        features = np.array([
-            data.get('login_count', 0),
-            data.get('purchase_count', 0),
-            data.get('cart_count', 0),
-            data.get('favorite_count', 0)
-        ]).reshape(1, -1)
+        features = [
+            float(data.get('login_count', 0)),
+            float(data.get('purchase_count', 0)),
+            float(data.get('cart_count', 0)),
+            float(data.get('favorite_count', 0))
+        ]
         
-        # Predict cluster
-        cluster = user_clusterer.predict(features)[0]
+        # Predict cluster from the cache or as part of the next batch
+        cluster = _assign_user_cached(tuple(round(value, FEATURE_CACHE_DECIMALS) for value in features))
         
         # Get cluster center for interpretation
         cluster_center = user_clusterer.cluster_centers_[cluster].tolist()
@@ -185,9 +513,12 @@ def analyze_user_behavior():
         return jsonify({
             "cluster": int(cluster),
             "cluster_center": cluster_center,
-            "user_features": features[0].tolist()
+            "user_features": features
         })
         
+    except FutureTimeoutError:
+        logger.error("Timed out waiting for user clustering batch")
+        return jsonify({"error": "Prediction timed out"}), 503
     except Exception as e:
         logger.error(f"Error in user behavior analysis: {e}")
         return jsonify({"error": "Internal server error"}), 500
@@ -206,13 +537,27 @@ def get_recommendations():
         if recommendation_model is None or recommendation_matrix is None:
             return jsonify({"error": "Recommendation model not trained"}), 400
         
-        # Get user's purchase history from backend
-        user_data = _make_authenticated_request(f"/api/users/{user_id}/purchases")
-        if user_data is None:
-            return jsonify({"error": "Failed to fetch user purchases"}), 400
-        
-        # Generate recommendations using item-based collaborative filtering
-        recommendations = generate_recommendations(user_id, top_k)
+        if user_id in recommendation_user_index:
+            # Get user's purchase history from backend while the recommendations
+            # are scored, so the round trip overlaps with the local work
+            purchases_future = backend_executor.submit(_fetch_user_purchases, user_id)
+            
+            # Generate recommendations using item-based collaborative filtering
+            recommendations = generate_recommendations(user_id, top_k)
+            
+            user_data = purchases_future.result()
+            if user_data is None:
+                return jsonify({"error": "Failed to fetch user purchases"}), 400
+        else:
+            # Users who joined after training are scored from the purchases
+            # the backend reports for them
+            user_data = _fetch_user_purchases(user_id)
+            if user_data is None:
+                return jsonify({"error": "Failed to fetch user purchases"}), 400
+            
+            recommendations = generate_cold_start_recommendations(user_data, top_k)
+            if recommendations is None:
+                recommendations = generate_recommendations(user_id, top_k)
         
         return jsonify({
             "user_id": user_id,
@@ -230,43 +575,127 @@ def generate_recommendations(user_id: int, top_k: int = 5):
         if recommendation_matrix is None:
             return []
         
-        # Convert user_id to matrix index (assuming user_id maps to row index)
-        user_index = user_id % recommendation_matrix.shape[0]
-        
-        # Get user's ratings
-        user_ratings = recommendation_matrix[user_index]
-        
-        # Calculate scores for all items
-        scores = recommendation_model.dot(user_ratings)
-        
-        # Get items user hasn't rated
-        unrated_items = np.where(user_ratings == 0)[0]
-        
-        if len(unrated_items) == 0:
-            return []
-        
-        # Get scores for unrated items only
-        unrated_scores = scores[unrated_items]
-        
-        # Get top-k recommendations
-        top_indices = np.argsort(unrated_scores)[::-1][:top_k]
-        recommended_items = unrated_items[top_indices]
+        # Convert user_id to matrix row; users unseen at training time fall
+        # back to a positional row as before
+        user_index = recommendation_user_index.get(user_id)
+        if user_index is None:
+            user_index = user_id % recommendation_matrix.shape[0]
+        
+        # Get user's ratings straight from the CSR row: the rated item indices
+        # and their values, without densifying the row
+        start, end = recommendation_matrix.indptr[user_index:user_index + 2]
+        rated_items = recommendation_matrix.indices[start:end]
+        ratings = recommendation_matrix.data[start:end]
+        n_items = recommendation_matrix.shape[1]
+        
+        # Calculate scores for all items: every rated item spreads its rating
+        # over its stored neighbours, weighted by similarity. bincount does the
+        # scatter-add and allocates the score vector in a single C pass
+        top_k_indices, top_k_scores = recommendation_model
+        scores = np.bincount(
+            top_k_indices[rated_items].ravel(),
+            weights=(top_k_scores[rated_items] * ratings[:, np.newaxis]).ravel(),
+            minlength=n_items
+        ).astype(np.float64, copy=False)  # bincount returns ints for a user with no ratings
+        
+        return _rank_items(scores, rated_items, top_k)
         
-        # Return item IDs with scores
-        recommendations = [
-            {
-                "item_id": int(item_id),
-                "score": float(scores[item_id])
-            }
-            for item_id in recommended_items
-        ]
+    except Exception as e:
+        logger.error(f"Error generating recommendations: {e}")
+        return []
+
+def generate_cold_start_recommendations(user_data: dict, top_k: int = 5):
+    """
+    Generate recommendations for a user the trained model has no row for
+    
+    The user's purchases form a rating vector over the known items, scored
+    against every item by cosine similarity: with the stored item norms this
+    is two sparse matrix-vector products, no similarity matrix needed.
+    
+    Args:
+        user_data: Backend purchase history ({"purchases": [{"product_id", "quantity"}, ...]})
+        top_k: Number of recommendations to return
         
-        return recommendations
+    Returns:
+        List of recommendations, or None if none of the purchases are known items
+    """
+    try:
+        columns, quantities = [], []
+        for purchase in user_data.get('purchases') or []:
+            column = recommendation_item_index.get(purchase.get('product_id'))
+            if column is not None:
+                columns.append(column)
+                quantities.append(float(purchase.get('quantity', 1)))
+        if not columns:
+            return None
+        
+        n_items = recommendation_matrix.shape[1]
+        ratings = np.bincount(columns, weights=quantities, minlength=n_items)
+        rated_items = np.flatnonzero(ratings)
+        
+        # sum_p rating_p * cos(p, j) = (R.T @ (R @ (ratings / norms))) / norms_j;
+        # items nobody bought have zero norm and score zero
+        norms = recommendation_item_norms.astype(np.float64)
+        inv_norms = np.divide(1.0, norms, out=np.zeros_like(norms), where=norms > 0)
+        user_space = recommendation_matrix @ (ratings * inv_norms)
+        scores = np.asarray(recommendation_matrix.T @ user_space, dtype=np.float64).ravel() * inv_norms
+        
+        return _rank_items(scores, rated_items, top_k)
         
     except Exception as e:
-        logger.error(f"Error generating recommendations: {e}")
+        logger.error(f"Error generating cold-start recommendations: {e}")
         return []
 
+def _rank_items(scores: np.ndarray, rated_items: np.ndarray, top_k: int) -> list:
+    """Turn per-item scores into the top_k unrated items as recommendation dicts"""
+    # Exclude items the user already has in place instead of gathering
+    # the unrated scores into a separate array
+    scores[rated_items] = -np.inf
+    top_k = min(top_k, len(scores) - len(rated_items))
+    if top_k <= 0:
+        return []
+    
+    # Get top-k recommendations: argpartition is O(n_items), only the k
+    # winners get sorted (score desc, ties by higher index as before)
+    top_indices = np.argpartition(scores, -top_k)[-top_k:]
+    recommended_items = top_indices[np.lexsort((top_indices, scores[top_indices]))[::-1]]
+    
+    # Return product IDs with scores
+    return [
+        {
+            "item_id": item_id,
+            "score": float(scores[item_index])
+        }
+        for item_index, item_id in zip(recommended_items, recommendation_item_ids[recommended_items].tolist())
+    ]
+
+def _top_k_neighbours(similarity, k: int, block_size: int = 1024) -> tuple:
+    """
+    Keep only the k most similar neighbours of every item
+    
+    Args:
+        similarity: (n_items, n_items) similarity matrix, dense or sparse
+        k: Number of neighbours to keep per item
+        block_size: Rows densified at a time
+        
+    Returns:
+        Tuple of (n_items, k) int32 neighbour indices and float32 similarities
+    """
+    n_items = similarity.shape[0]
+    k = max(1, min(k, n_items))
+    top_k_indices = np.empty((n_items, k), dtype=np.int32)
+    top_k_scores = np.empty((n_items, k), dtype=np.float32)
+    
+    for start in range(0, n_items, block_size):
+        block = similarity[start:start + block_size]
+        block = block.toarray() if sp.issparse(block) else np.asarray(block)
+        
+        indices, scores = select_top_k(block, k)
+        top_k_indices[start:start + len(block)] = indices
+        top_k_scores[start:start + len(block)] = scores
+    
+    return top_k_indices, top_k_scores
+
 @app.route('/train', methods=['POST'])
 def train_models_with_versioning():
     """Train all ML models using real data from backend API with versioning support"""
@@ -274,78 +703,81 @@ def train_models_with_versioning():
         logger.info("Starting model training process with versioning")
         
         # Initialize services if not already done
-        if scheduler is None or version_manager is None:
-            initialize_services()
+        initialize_services()
+        
+        # The loads are I/O-bound backend fetches, so run them side by side
+        logger.info("Loading training data")
+        datasets = load_in_parallel({
+            'anomaly': load_anomaly_data,
+            'clustering': load_clustering_data,
+            'recommendation': load_recommendation_data
+        })
+        anomaly_data = datasets['anomaly']
+        clustering_data = datasets['clustering']
+        recommendation_data = datasets['recommendation']
         
-        # Train anomaly detector
-        logger.info("Training anomaly detection model")
-        anomaly_data = load_anomaly_data()
+        jobs = {}
         if anomaly_data is not None and len(anomaly_data) > 10:
-            global anomaly_detector
-            new_anomaly_detector = IsolationForest(contamination=0.1, random_state=42)
-            new_anomaly_detector.fit(anomaly_data)
-            
-            # Save with versioning
+            jobs['anomaly'] = (fit_anomaly, anomaly_data)
+        else:
+            logger.warning("Insufficient anomaly data for training")
+        if clustering_data is not None and len(clustering_data) > 5:
+            jobs['clustering'] = (fit_clustering, clustering_data)
+        else:
+            logger.warning("Insufficient clustering data for training")
+        if recommendation_data is not None:
+            jobs['recommendation'] = (fit_recommendation, recommendation_data, RECOMMENDATION_TOP_K)
+        else:
+            logger.warning("Failed to load recommendation data")
+        
+        # The models are independent, so fit them in separate processes: the
+        # GIL-bound parts overlap and training takes as long as the slowest
+        # model instead of the sum. The BLAS thread budget is split between them
+        results = {}
+        if jobs:
+            logger.info(f"Training models: {', '.join(jobs)}")
+            n_threads = max(1, TRAINING_N_THREADS // len(jobs))
+            with ProcessPoolExecutor(max_workers=len(jobs),
+                                     mp_context=TRAINING_MP_CONTEXT) as executor:
+                futures = {
+                    model_type: executor.submit(fit_fn, *args, n_threads=n_threads)
+                    for model_type, (fit_fn, *args) in jobs.items()
+                }
+                results = {model_type: future.result() for model_type, future in futures.items()}
+        
+        # Save with versioning and install the new models
+        if 'anomaly' in results:
+            new_anomaly_detector, metadata = results['anomaly']
             if version_manager:
-                metadata = {"training_samples": len(anomaly_data), "features": anomaly_data.shape[1]}
                 version_id = version_manager.save_model(new_anomaly_detector, "anomaly", metadata)
                 logger.info(f"Anomaly detector saved as version {version_id}")
             
-            anomaly_detector = new_anomaly_detector
+            _set_anomaly_detector(new_anomaly_detector)
             logger.info(f"Anomaly detector trained with {len(anomaly_data)} samples")
-        else:
-            logger.warning("Insufficient anomaly data for training")
         
-        # Train user clusterer
-        logger.info("Training user clustering model")
-        clustering_data = load_clustering_data()
-        if clustering_data is not None and len(clustering_data) > 5:
-            global user_clusterer
-            new_user_clusterer = KMeans(n_clusters=min(5, len(clustering_data)), random_state=42)
-            new_user_clusterer.fit(clustering_data)
-            
-            # Save with versioning
+        if 'clustering' in results:
+            new_user_clusterer, metadata = results['clustering']
             if version_manager:
-                metadata = {"training_samples": len(clustering_data), "n_clusters": new_user_clusterer.n_clusters}
                 version_id = version_manager.save_model(new_user_clusterer, "clustering", metadata)
                 logger.info(f"User clusterer saved as version {version_id}")
             
-            user_clusterer = new_user_clusterer
+            _set_user_clusterer(new_user_clusterer)
             logger.info(f"User clusterer trained with {len(clustering_data)} samples")
-        else:
-            logger.warning("Insufficient clustering data for training")
         
-        # Train recommendation model
-        logger.info("Training recommendation model")
-        recommendation_data = load_recommendation_data()
-        if recommendation_data is not None:
-            user_item_matrix, df = recommendation_data
-            if user_item_matrix.size > 0:
-                global recommendation_model, recommendation_matrix
-                new_recommendation_matrix = user_item_matrix
-                new_recommendation_model = cosine_similarity(user_item_matrix.T)
-                
-                # Save with versioning
-                if version_manager:
-                    model_data = {
-                        'similarity_matrix': new_recommendation_model,
-                        'user_item_matrix': new_recommendation_matrix
-                    }
-                    metadata = {
-                        "matrix_shape": user_item_matrix.shape,
-                        "n_users": user_item_matrix.shape[0],
-                        "n_items": user_item_matrix.shape[1]
-                    }
-                    version_id = version_manager.save_model(model_data, "recommendation", metadata)
-                    logger.info(f"Recommendation model saved as version {version_id}")
-                
-                recommendation_matrix = new_recommendation_matrix
-                recommendation_model = new_recommendation_model
-                logger.info(f"Recommendation model trained with matrix shape: {user_item_matrix.shape}")
-            else:
-                logger.warning("Empty recommendation data")
-        else:
-            logger.warning("Failed to load recommendation data")
+        if results.get('recommendation') is not None:
+            model_data, metadata = results['recommendation']
+            if version_manager:
+                version_id = version_manager.save_model(model_data, "recommendation", metadata)
+                logger.info(f"Recommendation model saved as version {version_id}")
+            
+            _set_recommendation_model(model_data)
+            logger.info(f"Recommendation model trained with matrix shape: {metadata['matrix_shape']}")
+        elif 'recommendation' in results:
+            logger.warning("Empty recommendation data")
+        
+        # Persist the new models so the other worker processes load them too
+        if results:
+            save_models()
         
         return jsonify({
             "status": "success",
@@ -363,20 +795,71 @@ def retrain_models():
     """Trigger model retraining"""
     return train_models_with_versioning()
 
+@app.route('/train/incremental', methods=['POST'])
+def train_clusterer_incremental():
+    """Update the user clusterer with newly arrived user activities via partial_fit"""
+    try:
+        data = request.json
+        if not data or not validate_clustering_data(data):
+            return jsonify({"error": "Request must contain valid user_activities"}), 400
+        
+        # Initialize services if not already done
+        initialize_services()
+        
+        new_rows = records_to_features(data['user_activities'], CLUSTERING_FEATURES)
+        
+        # Update a copy so requests keep using the current model until the swap;
+        # models that cannot be updated incrementally are replaced
+        if hasattr(user_clusterer, 'partial_fit') and user_cluster_centers is not None:
+            new_user_clusterer = copy.deepcopy(user_clusterer)
+            # partial_fit needs rows in the dtype the centers were fitted with
+            new_rows = new_rows.astype(new_user_clusterer.cluster_centers_.dtype, copy=False)
+        else:
+            new_user_clusterer = build_user_clusterer()
+        
+        if user_cluster_centers is None and len(new_rows) < new_user_clusterer.n_clusters:
+            return jsonify({"error": f"Need at least {new_user_clusterer.n_clusters} samples to initialize clustering"}), 400
+        
+        with threadpool_limits(limits=TRAINING_N_THREADS):
+            new_user_clusterer.partial_fit(new_rows)
+        
+        # Save with versioning
+        version_id = None
+        if version_manager:
+            metadata = {"incremental": True, "batch_samples": len(new_rows), "n_clusters": new_user_clusterer.n_clusters}
+            version_id = version_manager.save_model(new_user_clusterer, "clustering", metadata)
+            logger.info(f"Incrementally updated user clusterer saved as version {version_id}")
+        
+        _set_user_clusterer(new_user_clusterer)
+        save_models()
+        
+        return jsonify({
+            "status": "success",
+            "samples": len(new_rows),
+            "version_id": version_id,
+            "timestamp": datetime.now().isoformat()
+        })
+        
+    except Exception as e:
+        logger.error(f"Error in incremental clustering update: {e}")
+        return jsonify({"error": f"Incremental training failed: {str(e)}"}), 500
+
 # Manual ML Implementation Endpoints
+def _features_array(data: dict) -> np.ndarray:
+    """Request features as one contiguous float64 array, built in a single pass instead of letting numpy infer the dtype"""
+    return np.ascontiguousarray(data.get('features', []), dtype=np.float64)
+
 @app.route('/train/manual-logistic', methods=['POST'])
 def train_manual_logistic():
     """Train manual logistic regression model"""
     try:
-        from manual_impl.manual_logistic import ManualLogisticRegression
-        
         data = request.json
         if not data:
             return jsonify({"error": "No training data provided"}), 400
         
         # Extract features and labels
-        X = np.array(data.get('features', []))
-        y = np.array(data.get('labels', []))
+        X = _features_array(data)
+        y = np.asarray(data.get('labels', []))
         
         if len(X) == 0 or len(y) == 0:
             return jsonify({"error": "Empty training data"}), 400
@@ -389,18 +872,26 @@ def train_manual_logistic():
         n_iter = data.get('n_iterations', 1000)
         regularization = data.get('regularization', None)
         lambda_reg = data.get('lambda_reg', 0.01)
+        warm_start = data.get('warm_start', False)
+        model_path = f'{MODEL_DIR}/manual_logistic.joblib'
         
         # Train model
         model = ManualLogisticRegression(
             lr=lr, 
             n_iter=n_iter, 
             regularization=regularization, 
-            lambda_reg=lambda_reg
+            lambda_reg=lambda_reg,
+            warm_start=warm_start
         )
+        if warm_start and os.path.exists(model_path):
+            # Resume from the saved model; fit() copies the weights, so the
+            # cached instance serving predictions is left untouched
+            previous = _cached_load(model_path)
+            model.weights, model.bias = previous.weights, previous.bias
         model.fit(X, y)
         
         # Save model
-        joblib.dump(model, f'{MODEL_DIR}/manual_logistic.joblib')
+        joblib.dump(model, model_path)
         
         return jsonify({
             "status": "success",
@@ -412,7 +903,8 @@ def train_manual_logistic():
                 "lambda_reg": lambda_reg,
                 "n_features": len(X[0]),
                 "n_samples": len(X),
-                "final_cost": float(model.cost_history[-1]) if model.cost_history else None
+                "n_iterations_run": len(model.cost_history),
+                "final_cost": float(model.cost_history[-1]) if len(model.cost_history) else None
             }
         })
         
@@ -424,15 +916,13 @@ def train_manual_logistic():
 def train_manual_tree():
     """Train manual decision tree model"""
     try:
-        from manual_impl.manual_tree import ManualDecisionTree
-        
         data = request.json
         if not data:
             return jsonify({"error": "No training data provided"}), 400
         
         # Extract features and labels
-        X = np.array(data.get('features', []))
-        y = np.array(data.get('labels', []))
+        X = _features_array(data)
+        y = np.asarray(data.get('labels', []))
         
         if len(X) == 0 or len(y) == 0:
             return jsonify({"error": "Empty training data"}), 400
@@ -481,19 +971,42 @@ def train_manual_tree():
         logger.error(f"Error training manual decision tree: {e}")
         return jsonify({"error": f"Training failed: {str(e)}"}), 500
 
+# Manual models loaded by the predict endpoints: path -> (file mtime, model)
+_model_cache = {}
+
+def _cached_load(path: str):
+    """
+    Load a joblib model once and reuse it until the file on disk changes
+    
+    Args:
+        path: Path of the joblib file
+        
+    Returns:
+        The loaded model; raises FileNotFoundError if the file does not exist
+    """
+    mtime = os.stat(path).st_mtime_ns
+    entry = _model_cache.get(path)
+    if entry is not None and entry[0] == mtime:
+        return entry[1]
+    
+    # Retraining rewrites the file, which changes its mtime and reloads here
+    model = joblib.load(path)
+    _model_cache[path] = (mtime, model)
+    return model
+
 @app.route('/predict/manual-logistic', methods=['POST'])
 def predict_manual_logistic():
     """Make predictions using manual logistic regression"""
     try:
         # Load model
-        model = joblib.load(f'{MODEL_DIR}/manual_logistic.joblib')
+        model = _cached_load(f'{MODEL_DIR}/manual_logistic.joblib')
         
         data = request.json
         if not data:
             return jsonify({"error": "No prediction data provided"}), 400
         
         # Extract features
-        X = np.array(data.get('features', []))
+        X = _features_array(data)
         if len(X) == 0:
             return jsonify({"error": "Empty prediction data"}), 400
         
@@ -518,14 +1031,14 @@ def predict_manual_tree():
     """Make predictions using manual decision tree"""
     try:
         # Load model
-        model = joblib.load(f'{MODEL_DIR}/manual_tree.joblib')
+        model = _cached_load(f'{MODEL_DIR}/manual_tree.joblib')
         
         data = request.json
         if not data:
             return jsonify({"error": "No prediction data provided"}), 400
         
         # Extract features
-        X = np.array(data.get('features', []))
+        X = _features_array(data)
         if len(X) == 0:
             return jsonify({"error": "Empty prediction data"}), 400
         
@@ -544,150 +1057,283 @@ def predict_manual_tree():
         logger.error(f"Error in manual decision tree prediction: {e}")
         return jsonify({"error": f"Prediction failed: {str(e)}"}), 500
 
+# Background jobs: /compare/models trains four models, which is too slow to
+# hold a request thread for. Job state is kept as JSON files so that any
+# worker process can answer a poll, not just the one that ran the job
+JOB_DIR = os.path.join(MODEL_DIR, 'jobs')
+JOB_RETENTION = timedelta(hours=int(os.getenv('JOB_RETENTION_HOURS', '24')))
+os.makedirs(JOB_DIR, exist_ok=True)
+job_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='jobs')
+
+def _write_job(job_id: str, state: dict):
+    """Atomically replace the state file of a background job"""
+    path = os.path.join(JOB_DIR, f'{job_id}.json')
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(orjson.dumps(state, option=orjson.OPT_SERIALIZE_NUMPY))
+    os.replace(tmp_path, path)
+
+def _cleanup_jobs():
+    """Remove state files of jobs older than JOB_RETENTION"""
+    cutoff = (datetime.now() - JOB_RETENTION).timestamp()
+    with os.scandir(JOB_DIR) as entries:
+        for entry in entries:
+            if entry.stat().st_mtime < cutoff:
+                try:
+                    os.remove(entry.path)
+                except FileNotFoundError:
+                    pass
+
+def submit_job(job_type: str, fn, *args) -> str:
+    """
+    Run fn(*args) on the job executor and record its progress and result
+    
+    Args:
+        job_type: Name reported by /jobs/<job_id>
+        fn: Callable returning a JSON-serializable result
+        
+    Returns:
+        The job ID to poll
+    """
+    job_id = uuid.uuid4().hex
+    state = {"job_id": job_id, "type": job_type, "status": "pending",
+             "submitted_at": datetime.now().isoformat()}
+    _write_job(job_id, state)
+    
+    def run():
+        _write_job(job_id, {**state, "status": "running"})
+        try:
+            result = fn(*args)
+            _write_job(job_id, {**state, "status": "done", "result": result,
+                                "finished_at": datetime.now().isoformat()})
+        except Exception as e:
+            logger.error(f"Background job {job_id} ({job_type}) failed: {e}")
+            _write_job(job_id, {**state, "status": "failed", "error": str(e),
+                                "finished_at": datetime.now().isoformat()})
+    
+    job_executor.submit(run)
+    _cleanup_jobs()
+    return job_id
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id: str):
+    """Get the status, and once done the result, of a background job"""
+    try:
+        # Job IDs are uuid4 hex strings; anything else cannot name a job file
+        if len(job_id) != 32 or not all(c in '0123456789abcdef' for c in job_id):
+            return jsonify({"error": "Job not found"}), 404
+        
+        with open(os.path.join(JOB_DIR, f'{job_id}.json'), 'rb') as f:
+            state = orjson.loads(f.read())
+        return jsonify(state)
+        
+    except FileNotFoundError:
+        return jsonify({"error": "Job not found"}), 404
+    except Exception as e:
+        logger.error(f"Error reading job {job_id}: {e}")
+        return jsonify({"error": "Internal server error"}), 500
+
+def run_model_comparison(X: np.ndarray, y: np.ndarray, test_size: float) -> dict:
+    """
+    Train and evaluate the manual and sklearn implementations side by side
+    
+    Args:
+        X: Feature matrix
+        y: Labels
+        test_size: Fraction of the samples held out for evaluation
+        
+    Returns:
+        Comparison results per algorithm plus a summary
+    """
+    # Split data
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=test_size, random_state=42)
+    
+    results = {}
+    
+    # Compare Logistic Regression
+    logger.info("Comparing Logistic Regression implementations")
+    
+    # Manual implementation
+    start_time = time.time()
+    manual_lr = ManualLogisticRegression(lr=0.01, n_iter=1000)
+    manual_lr.fit(X_train, y_train)
+    manual_lr_time = time.time() - start_time
+    
+    manual_lr_pred = manual_lr.predict(X_test)
+    manual_lr_accuracy = accuracy_score(y_test, manual_lr_pred)
+    
+    # Sklearn implementation
+    start_time = time.time()
+    sklearn_lr = LogisticRegression(max_iter=1000, random_state=42)
+    sklearn_lr.fit(X_train, y_train)
+    sklearn_lr_time = time.time() - start_time
+    
+    sklearn_lr_pred = sklearn_lr.predict(X_test)
+    sklearn_lr_accuracy = accuracy_score(y_test, sklearn_lr_pred)
+    
+    results['logistic_regression'] = {
+        'manual': {
+            'accuracy': float(manual_lr_accuracy),
+            'training_time': float(manual_lr_time),
+            'final_cost': float(manual_lr.cost_history[-1]) if len(manual_lr.cost_history) else None
+        },
+        'sklearn': {
+            'accuracy': float(sklearn_lr_accuracy),
+            'training_time': float(sklearn_lr_time)
+        }
+    }
+    
+    # Compare Decision Tree
+    logger.info("Comparing Decision Tree implementations")
+    
+    # Manual implementation
+    start_time = time.time()
+    manual_tree = ManualDecisionTree(max_depth=5, criterion='gini')
+    manual_tree.fit(X_train, y_train)
+    manual_tree_time = time.time() - start_time
+    
+    manual_tree_pred = manual_tree.predict(X_test)
+    manual_tree_accuracy = accuracy_score(y_test, manual_tree_pred)
+    
+    # Sklearn implementation
+    start_time = time.time()
+    # sklearn trees work on float32 and would copy float64 input on both
+    # fit and predict; the manual tree keeps float64 so its thresholds
+    # match the values it is later queried with
+    X_train_32 = X_train.astype(np.float32)
+    X_test_32 = X_test.astype(np.float32)
+    sklearn_tree = DecisionTreeClassifier(max_depth=5, criterion='gini', random_state=42)
+    sklearn_tree.fit(X_train_32, y_train)
+    sklearn_tree_time = time.time() - start_time
+    
+    sklearn_tree_pred = sklearn_tree.predict(X_test_32)
+    sklearn_tree_accuracy = accuracy_score(y_test, sklearn_tree_pred)
+    
+    results['decision_tree'] = {
+        'manual': {
+            'accuracy': float(manual_tree_accuracy),
+            'training_time': float(manual_tree_time),
+            'tree_depth': manual_tree.get_depth(),
+            'n_leaves': manual_tree.get_n_leaves()
+        },
+        'sklearn': {
+            'accuracy': float(sklearn_tree_accuracy),
+            'training_time': float(sklearn_tree_time),
+            'tree_depth': sklearn_tree.get_depth(),
+            'n_leaves': sklearn_tree.get_n_leaves()
+        }
+    }
+    
+    # Overall comparison
+    results['summary'] = {
+        'dataset_info': {
+            'n_samples': len(X),
+            'n_features': X.shape[1],
+            'n_classes': len(np.unique(y)),
+            'test_size': test_size
+        },
+        'performance_comparison': {
+            'logistic_regression_accuracy_diff': float(manual_lr_accuracy - sklearn_lr_accuracy),
+            'decision_tree_accuracy_diff': float(manual_tree_accuracy - sklearn_tree_accuracy),
+            'logistic_regression_time_ratio': float(manual_lr_time / sklearn_lr_time) if sklearn_lr_time > 0 else None,
+            'decision_tree_time_ratio': float(manual_tree_time / sklearn_tree_time) if sklearn_tree_time > 0 else None
+        }
+    }
+    
+    return results
+
 @app.route('/compare/models', methods=['POST'])
 def compare_models():
-    """Compare manual implementations with sklearn implementations"""
+    """Start comparing manual implementations with sklearn implementations; poll /jobs/<job_id> for the results"""
     try:
-        from sklearn.linear_model import LogisticRegression
-        from sklearn.tree import DecisionTreeClassifier
-        from sklearn.model_selection import train_test_split
-        from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score
-        from manual_impl.manual_logistic import ManualLogisticRegression
-        from manual_impl.manual_tree import ManualDecisionTree
-        import time
-        
         data = request.json
         if not data:
             return jsonify({"error": "No comparison data provided"}), 400
         
         # Extract features and labels
-        X = np.array(data.get('features', []))
-        y = np.array(data.get('labels', []))
+        X = _features_array(data)
+        y = np.asarray(data.get('labels', []))
         
         if len(X) == 0 or len(y) == 0:
             return jsonify({"error": "Empty comparison data"}), 400
         
-        # Split data
-        test_size = data.get('test_size', 0.2)
-        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=test_size, random_state=42)
-        
-        results = {}
-        
-        # Compare Logistic Regression
-        logger.info("Comparing Logistic Regression implementations")
-        
-        # Manual implementation
-        start_time = time.time()
-        manual_lr = ManualLogisticRegression(lr=0.01, n_iter=1000)
-        manual_lr.fit(X_train, y_train)
-        manual_lr_time = time.time() - start_time
-        
-        manual_lr_pred = manual_lr.predict(X_test)
-        manual_lr_accuracy = accuracy_score(y_test, manual_lr_pred)
-        
-        # Sklearn implementation
-        start_time = time.time()
-        sklearn_lr = LogisticRegression(max_iter=1000, random_state=42)
-        sklearn_lr.fit(X_train, y_train)
-        sklearn_lr_time = time.time() - start_time
-        
-        sklearn_lr_pred = sklearn_lr.predict(X_test)
-        sklearn_lr_accuracy = accuracy_score(y_test, sklearn_lr_pred)
-        
-        results['logistic_regression'] = {
-            'manual': {
-                'accuracy': float(manual_lr_accuracy),
-                'training_time': float(manual_lr_time),
-                'final_cost': float(manual_lr.cost_history[-1]) if manual_lr.cost_history else None
-            },
-            'sklearn': {
-                'accuracy': float(sklearn_lr_accuracy),
-                'training_time': float(sklearn_lr_time)
-            }
-        }
-        
-        # Compare Decision Tree
-        logger.info("Comparing Decision Tree implementations")
-        
-        # Manual implementation
-        start_time = time.time()
-        manual_tree = ManualDecisionTree(max_depth=5, criterion='gini')
-        manual_tree.fit(X_train, y_train)
-        manual_tree_time = time.time() - start_time
-        
-        manual_tree_pred = manual_tree.predict(X_test)
-        manual_tree_accuracy = accuracy_score(y_test, manual_tree_pred)
-        
-        # Sklearn implementation
-        start_time = time.time()
-        sklearn_tree = DecisionTreeClassifier(max_depth=5, criterion='gini', random_state=42)
-        sklearn_tree.fit(X_train, y_train)
-        sklearn_tree_time = time.time() - start_time
-        
-        sklearn_tree_pred = sklearn_tree.predict(X_test)
-        sklearn_tree_accuracy = accuracy_score(y_test, sklearn_tree_pred)
-        
-        results['decision_tree'] = {
-            'manual': {
-                'accuracy': float(manual_tree_accuracy),
-                'training_time': float(manual_tree_time),
-                'tree_depth': manual_tree.get_depth(),
-                'n_leaves': manual_tree.get_n_leaves()
-            },
-            'sklearn': {
-                'accuracy': float(sklearn_tree_accuracy),
-                'training_time': float(sklearn_tree_time),
-                'tree_depth': sklearn_tree.get_depth(),
-                'n_leaves': sklearn_tree.get_n_leaves()
-            }
-        }
-        
-        # Overall comparison
-        results['summary'] = {
-            'dataset_info': {
-                'n_samples': len(X),
-                'n_features': X.shape[1],
-                'n_classes': len(np.unique(y)),
-                'test_size': test_size
-            },
-            'performance_comparison': {
-                'logistic_regression_accuracy_diff': float(manual_lr_accuracy - sklearn_lr_accuracy),
-                'decision_tree_accuracy_diff': float(manual_tree_accuracy - sklearn_tree_accuracy),
-                'logistic_regression_time_ratio': float(manual_lr_time / sklearn_lr_time) if sklearn_lr_time > 0 else None,
-                'decision_tree_time_ratio': float(manual_tree_time / sklearn_tree_time) if sklearn_tree_time > 0 else None
-            }
-        }
+        job_id = submit_job('model_comparison', run_model_comparison, X, y, data.get('test_size', 0.2))
         
         return jsonify({
-            "status": "success",
-            "comparison_results": results
-        })
+            "status": "accepted",
+            "job_id": job_id,
+            "status_url": f"/jobs/{job_id}"
+        }), 202
         
     except Exception as e:
         logger.error(f"Error in model comparison: {e}")
         return jsonify({"error": f"Comparison failed: {str(e)}"}), 500
 
-if __name__ == '__main__':
-    load_or_create_models()
-    app.run(host='0.0.0.0', port=5000)
-
 # Scheduler and Version Management Integration
-from training.scheduler import get_scheduler
+from training.scheduler import get_scheduler, RETRAIN_TIMEOUT
 from models.version_manager import get_version_manager
 
+def _retrain_in_process(model_type: str) -> bool:
+    """Scheduler callback: run the /train handler directly instead of over HTTP, for the app.run server"""
+    # /train always retrains every model type it has data for
+    with app.app_context():
+        response = app.make_response(train_models_with_versioning())
+    return response.status_code == 200
+
+# Control API of a scheduler running as its own process (python -m
+# training.scheduler). When set, no scheduler is started here and the
+# /scheduler endpoints forward to it
+SCHEDULER_URL = os.getenv('SCHEDULER_URL')
+
 # Initialize scheduler and version manager
 scheduler = None
 version_manager = None
+_services_lock = threading.Lock()
+# Whether initialize_services() may start a scheduler in this process
+_local_scheduler = not SCHEDULER_URL
 
-def initialize_services():
-    """Initialize scheduler and version manager services"""
-    global scheduler, version_manager
-    try:
-        scheduler = get_scheduler()
-        version_manager = get_version_manager()
-        logger.info("Scheduler and version manager initialized successfully")
-    except Exception as e:
-        logger.error(f"Error initializing services: {e}")
+def initialize_services(in_process_retrain: bool = False, local_scheduler: bool = True):
+    """
+    Initialize scheduler and version manager services once, safe to call from any thread
+    
+    Args:
+        in_process_retrain: Let scheduled retrains call /train directly. Only for a process that
+            serves requests itself
+        local_scheduler: Start the retraining scheduler in this process. wsgi.py passes False:
+            a scheduler started in the Gunicorn master would keep firing there while the
+            workers' /scheduler endpoints act on inert forked copies. The setting sticks, so
+            the lazy calls from /train in the workers do not start one either
+    """
+    global scheduler, version_manager, _local_scheduler
+    if not local_scheduler:
+        _local_scheduler = False
+    if (scheduler is not None or not _local_scheduler) and version_manager is not None:
+        return
+    
+    # Concurrent first callers would otherwise each construct a scheduler and
+    # leak its background thread
+    with _services_lock:
+        try:
+            if scheduler is None and _local_scheduler:
+                scheduler = get_scheduler(local_callback=_retrain_in_process if in_process_retrain else None)
+            if version_manager is None:
+                version_manager = get_version_manager()
+            logger.info("Scheduler and version manager initialized successfully")
+        except Exception as e:
+            logger.error(f"Error initializing services: {e}")
+
+def _scheduler_elsewhere():
+    """Answer a /scheduler request in a process that does not run the scheduler itself"""
+    if SCHEDULER_URL:
+        # A trigger waits for the retrain it starts
+        response = http_session.request(request.method, f"{SCHEDULER_URL}{request.path}",
+                                        data=request.get_data(), headers={'Content-Type': 'application/json'},
+                                        timeout=RETRAIN_TIMEOUT + 60)
+        return response.content, response.status_code, {'Content-Type': response.headers.get('Content-Type', 'application/json')}
+    if _local_scheduler:
+        return jsonify({"error": "Scheduler not initialized"}), 500
+    return jsonify({"error": "Scheduler runs as a separate process (python -m training.scheduler); "
+                             "set SCHEDULER_URL to its control API"}), 501
 
 # Scheduler Management Endpoints
 @app.route('/scheduler/status', methods=['GET'])
@@ -695,7 +1341,7 @@ def get_scheduler_status():
     """Get scheduler status and job information"""
     try:
         if scheduler is None:
-            return jsonify({"error": "Scheduler not initialized"}), 500
+            return _scheduler_elsewhere()
         
         status = scheduler.get_schedule_status()
         return jsonify({
@@ -712,7 +1358,7 @@ def trigger_manual_retrain():
     """Manually trigger model retraining"""
     try:
         if scheduler is None:
-            return jsonify({"error": "Scheduler not initialized"}), 500
+            return _scheduler_elsewhere()
         
         data = request.json or {}
         model_type = data.get('model_type', 'all')
@@ -733,7 +1379,7 @@ def pause_scheduled_job(job_id: str):
     """Pause a specific scheduled job"""
     try:
         if scheduler is None:
-            return jsonify({"error": "Scheduler not initialized"}), 500
+            return _scheduler_elsewhere()
         
         scheduler.pause_schedule(job_id)
         
@@ -751,7 +1397,7 @@ def resume_scheduled_job(job_id: str):
     """Resume a specific scheduled job"""
     try:
         if scheduler is None:
-            return jsonify({"error": "Scheduler not initialized"}), 500
+            return _scheduler_elsewhere()
         
         scheduler.resume_schedule(job_id)
         
@@ -809,20 +1455,14 @@ def rollback_model():
         if not model_type or not version_id:
             return jsonify({"error": "model_type and version_id are required"}), 400
         
+        if model_type not in MODEL_INSTALLERS:
+            return jsonify({"error": f"Unknown model_type: {model_type}"}), 400
+        
         success = version_manager.rollback_model(model_type, version_id)
         
         if success:
             # Reload the model in the application
-            global anomaly_detector, user_clusterer, recommendation_model, recommendation_matrix
-            
-            if model_type == 'anomaly':
-                anomaly_detector, _ = version_manager.load_model('anomaly')
-            elif model_type == 'clustering':
-                user_clusterer, _ = version_manager.load_model('clustering')
-            elif model_type == 'recommendation':
-                model_data, _ = version_manager.load_model('recommendation')
-                recommendation_model = model_data['similarity_matrix']
-                recommendation_matrix = model_data['user_item_matrix']
+            _reload_model(model_type)
             
             return jsonify({
                 "status": "success",
@@ -918,22 +1558,16 @@ def check_auto_rollback():
         if not model_type:
             return jsonify({"error": "model_type is required"}), 400
         
+        if model_type not in MODEL_INSTALLERS:
+            return jsonify({"error": f"Unknown model_type: {model_type}"}), 400
+        
         rollback_performed = version_manager.auto_rollback_on_degradation(
             model_type, current_metrics, threshold_metric, degradation_threshold
         )
         
         if rollback_performed:
             # Reload the model in the application
-            global anomaly_detector, user_clusterer, recommendation_model, recommendation_matrix
-            
-            if model_type == 'anomaly':
-                anomaly_detector, _ = version_manager.load_model('anomaly')
-            elif model_type == 'clustering':
-                user_clusterer, _ = version_manager.load_model('clustering')
-            elif model_type == 'recommendation':
-                model_data, _ = version_manager.load_model('recommendation')
-                recommendation_model = model_data['similarity_matrix']
-                recommendation_matrix = model_data['user_item_matrix']
+            _reload_model(model_type)
             
             return jsonify({
                 "status": "success",
@@ -952,7 +1586,11 @@ def check_auto_rollback():
         return jsonify({"error": f"Auto-rollback check failed: {str(e)}"}), 500
 
 if __name__ == '__main__':
-    # Initialize services
-    initialize_services()
+    # Initialize services; this process serves the requests, so scheduled
+    # retrains can run here instead of going over HTTP
+    initialize_services(in_process_retrain=True)
     load_or_create_models()
-    app.run(host='0.0.0.0', port=5000) 
\ No newline at end of file
+    warm_up_models()
+    # One thread per connection; concurrent /analyze requests are coalesced
+    # by the batchers, whose worker thread owns the model call
+    app.run(host='0.0.0.0', port=5000, threaded=True)
@@ -0,0 +1,120 @@
+# Dynamic request batching for single-row model inference
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class MicroBatcher:
+    def __init__(self, predict_fn: Callable[[np.ndarray], Sequence[Any]], n_features: int,
+                 max_batch_size: int = 64, batch_wait_timeout_s: float = 0.01,
+                 dtype: Any = np.float32, name: str = "batcher"):
+        """
+        Coalesce concurrent single-row predictions into one batched model call
+
+        Request threads submit one feature row each; a single worker thread
+        stacks whatever arrived within the wait window into one ndarray, calls
+        predict_fn once and fans the per-row results back through futures.
+        Rows are copied into a buffer allocated once per worker, so no array
+        is built per request or per batch.
+
+        Args:
+            predict_fn: Called with an (n_rows, n_features) view of the worker's
+                buffer, must return one result per row and not keep the view
+            n_features: Number of values in each row
+            max_batch_size: Maximum number of rows dispatched in a single call
+            batch_wait_timeout_s: How long to wait for more rows after the first one arrives
+            dtype: Dtype of the batch buffer
+            name: Name of the worker thread (used in logs)
+        """
+        self.predict_fn = predict_fn
+        self.n_features = n_features
+        self.max_batch_size = max_batch_size
+        self.batch_wait_timeout_s = batch_wait_timeout_s
+        self.dtype = dtype
+        self.name = name
+
+        self._lock = threading.Lock()
+        self._queue = None
+        self._worker = None
+        self._pid = None
+
+    def submit(self, row: Sequence[float]) -> Future:
+        """Queue a single feature row and return a future for its result"""
+        future = Future()
+        self._ensure_worker().put((row, future))
+        return future
+
+    def predict(self, row: Sequence[float], timeout: Optional[float] = None) -> Any:
+        """
+        Predict a single feature row, blocking until its batch is processed
+
+        Args:
+            row: Feature values
+            timeout: Seconds to wait for the result; raises concurrent.futures.TimeoutError when exceeded
+
+        Returns:
+            The predict_fn result for this row
+        """
+        return self.submit(row).result(timeout=timeout)
+
+    def _ensure_worker(self) -> queue.Queue:
+        """Start the worker thread on first use (and again in forked children)"""
+        if self._pid == os.getpid():
+            return self._queue
+
+        with self._lock:
+            if self._pid != os.getpid():
+                # Threads do not survive fork(), so a pre-forking server needs a
+                # fresh queue and worker in every child process
+                self._queue = queue.Queue()
+                self._worker = threading.Thread(target=self._run, args=(self._queue,),
+                                                name=self.name, daemon=True)
+                self._worker.start()
+                self._pid = os.getpid()
+                logger.info(f"Started {self.name} worker (max_batch_size={self.max_batch_size})")
+        return self._queue
+
+    def _collect(self, q: queue.Queue) -> List[Tuple[Sequence[float], Future]]:
+        """Block for the first row, then gather more until the batch is full or the window closes"""
+        batch = [q.get()]
+        deadline = time.monotonic() + self.batch_wait_timeout_s
+
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(q.get(timeout=remaining))
+            except queue.Empty:
+                break
+
+        return batch
+
+    def _run(self, q: queue.Queue):
+        """Worker loop: one predict_fn call per collected batch"""
+        buffer = np.empty((self.max_batch_size, self.n_features), dtype=self.dtype)
+
+        while True:
+            batch = self._collect(q)
+            futures = [future for _, future in batch]
+
+            try:
+                for i, (row, _) in enumerate(batch):
+                    buffer[i] = row
+                results = self.predict_fn(buffer[:len(batch)])
+            except Exception as e:
+                logger.error(f"Batch prediction failed in {self.name}: {e}")
+                for future in futures:
+                    future.set_exception(e)
+                continue
+
+            for future, result in zip(futures, results):
+                future.set_result(result)
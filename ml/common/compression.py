@@ -0,0 +1,43 @@
+# gzip compression for Flask responses
+import gzip
+
+from flask import Flask, Response, request
+
+# Only text formats are worth compressing; the binary model payloads are not
+COMPRESSIBLE_MIMETYPES = {'application/json', 'text/html', 'text/plain', 'text/csv'}
+
+
+def install_gzip(app: Flask, min_size: int = 512, level: int = 6):
+    """
+    Gzip responses for clients that accept it
+
+    The JSON bodies repeat the same keys on every record, so they typically
+    shrink 5-10x. Small bodies are sent as they are, since compressing them
+    costs more than the bytes it saves.
+
+    Args:
+        app: Application whose responses to compress
+        min_size: Smallest body, in bytes, that is compressed
+        level: gzip compression level (1 fastest - 9 smallest)
+    """
+
+    @app.after_request
+    def gzip_response(response: Response) -> Response:
+        if (response.direct_passthrough
+                or response.status_code < 200 or response.status_code in (204, 304)
+                or response.mimetype not in COMPRESSIBLE_MIMETYPES
+                or 'Content-Encoding' in response.headers):
+            return response
+
+        # Caches must keep the compressed and plain variants apart
+        response.vary.add('Accept-Encoding')
+        if not request.accept_encodings['gzip']:
+            return response
+
+        data = response.get_data()
+        if len(data) < min_size:
+            return response
+
+        response.set_data(gzip.compress(data, compresslevel=level))
+        response.headers['Content-Encoding'] = 'gzip'
+        return response
@@ -1,11 +1,23 @@
 # Load data from the DB or CSV (reusable)
 import numpy as np
 import pandas as pd
+import scipy.sparse as sp
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import ijson
 import os
-from typing import Tuple, Optional, Dict, Any
+import threading
+from cachetools import LRUCache, TTLCache
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from typing import Tuple, Optional, Dict, Any, Callable
 import logging
 from datetime import datetime
+from pydantic import TypeAdapter, ValidationError
+from common.schema import RequestLogRecord, UserActivityRecord, PurchaseRecord, SalesTrendRecord
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -15,17 +27,81 @@ logger = logging.getLogger(__name__)
 API_URL = os.getenv('API_URL', 'http://api:8080')
 API_TIMEOUT = int(os.getenv('API_TIMEOUT', '30'))
 
+# Pooled keep-alive session shared by all loaders, so repeated loads reuse
+# connections instead of paying a TCP/TLS handshake each. Gateway errors are
+# retried with backoff; once retries run out the last response is returned
+# and raise_for_status() reports it as before
+http_session = requests.Session()
+_http_adapter = HTTPAdapter(pool_connections=10, pool_maxsize=20,
+                            max_retries=Retry(total=3, backoff_factor=0.2,
+                                              status_forcelist=[502, 503, 504],
+                                              raise_on_status=False))
+http_session.mount('http://', _http_adapter)
+http_session.mount('https://', _http_adapter)
+
+# Parsed API responses and streamed feature matrices are reused for
+# API_CACHE_TTL seconds without asking the backend again. After that they are
+# revalidated with the ETag the backend sent, so an unchanged dataset costs a
+# 304 instead of a full body download
+API_CACHE_TTL = int(os.getenv('API_CACHE_TTL', '60'))
+_response_cache = TTLCache(maxsize=32, ttl=API_CACHE_TTL)  # key -> data
+_etag_cache = LRUCache(maxsize=32)  # key -> (ETag, data)
+_cache_lock = threading.Lock()
+
+def _cache_key(endpoint: str, params: Optional[Dict]) -> tuple:
+    return endpoint, tuple(sorted((params or {}).items()))
+
+# Feature columns extracted from the backend records
+ANOMALY_FEATURES = ['response_time', 'request_size', 'error_count']
+CLUSTERING_FEATURES = ['login_count', 'purchase_count', 'cart_count', 'favorite_count']
+PURCHASE_FIELDS = ['user_id', 'product_id', 'quantity']
+
+def records_to_features(records: list, columns: list, dtype: Any = np.float32) -> np.ndarray:
+    """
+    Convert a list of JSON records into a numeric feature matrix in one pass
+    
+    Args:
+        records: List of dicts as returned by the backend API
+        columns: Keys to extract, in feature order; missing keys count as 0
+        dtype: Dtype of the returned matrix
+        
+    Returns:
+        (n_records, n_columns) array
+    """
+    df = pd.DataFrame.from_records(records, columns=columns)
+    return df.fillna(0).to_numpy(dtype=dtype)
+
 def _make_api_request(endpoint: str, params: Optional[Dict] = None) -> Optional[Dict[Any, Any]]:
-    """Make API request with error handling and retries"""
+    """Make API request with error handling and retries; the returned data is cached and must not be modified"""
     try:
+        key = _cache_key(endpoint, params)
+        with _cache_lock:
+            data = _response_cache.get(key)
+            etag_entry = _etag_cache.get(key)
+        if data is not None:
+            logger.info(f"Using cached response for {endpoint}")
+            return data
+        
         url = f"{API_URL}{endpoint}"
         logger.info(f"Making API request to: {url}")
         
-        response = requests.get(url, params=params, timeout=API_TIMEOUT)
-        response.raise_for_status()
+        headers = {'If-None-Match': etag_entry[0]} if etag_entry else None
+        response = http_session.get(url, params=params, headers=headers, timeout=API_TIMEOUT)
+        
+        if response.status_code == 304 and etag_entry:
+            data = etag_entry[1]
+            logger.info(f"Data from {endpoint} not modified, reusing cached response")
+        else:
+            response.raise_for_status()
+            # orjson parses the raw body bytes without decoding to str first
+            data = orjson.loads(response.content)
+            logger.info(f"Successfully fetched data from {endpoint}")
         
-        data = response.json()
-        logger.info(f"Successfully fetched data from {endpoint}")
+        with _cache_lock:
+            _response_cache[key] = data
+            etag = response.headers.get('ETag')
+            if etag:
+                _etag_cache[key] = (etag, data)
         return data
         
     except requests.exceptions.Timeout:
@@ -41,122 +117,211 @@ def _make_api_request(endpoint: str, params: Optional[Dict] = None) -> Optional[
         logger.error(f"Unexpected error for endpoint {endpoint}: {e}")
         return None
 
-def load_anomaly_data() -> Optional[np.ndarray]:
-    """Load and return data for anomaly detection from backend API."""
-    data = _make_api_request('/api/requests/logs')
+def _parse_feature_stream(response: requests.Response, item_path: str, columns: list,
+                          chunk_size: int, dtype: Any) -> np.ndarray:
+    """Parse the records under item_path of a streamed response into a feature matrix"""
+    response.raw.decode_content = True  # Let urllib3 undo gzip/deflate
     
-    if data is None:
-        logger.warning("Failed to fetch anomaly data, using fallback mock data")
-        return np.random.randn(1000, 3)  # Reduced features to match expected format
+    records = ijson.items(response.raw, f'{item_path}.item', use_float=True)
+    features = np.empty((chunk_size, len(columns)), dtype=dtype)
+    n_rows = 0
     
+    while True:
+        chunk = list(islice(records, chunk_size))
+        if not chunk:
+            break
+        rows = records_to_features(chunk, columns, dtype)
+        
+        # Grow the buffer geometrically instead of per chunk
+        if n_rows + len(rows) > len(features):
+            grown = np.empty((max(2 * len(features), n_rows + len(rows)), len(columns)), dtype=dtype)
+            grown[:n_rows] = features[:n_rows]
+            features = grown
+        features[n_rows:n_rows + len(rows)] = rows
+        n_rows += len(rows)
+    
+    return features[:n_rows]
+
+def _stream_api_features(endpoint: str, item_path: str, columns: list,
+                         chunk_size: int = 4096, dtype: Any = np.float32) -> Optional[np.ndarray]:
+    """
+    Stream a JSON array from the API straight into a numeric feature matrix
+    
+    Records are parsed incrementally and converted chunk by chunk, so neither
+    the response body nor the full list of dicts is ever held in memory. The
+    matrix is cached like _make_api_request responses and returned read-only.
+    
+    Args:
+        endpoint: API endpoint returning a JSON object
+        item_path: Key of the array of records inside the response object
+        columns: Keys to extract from each record, in feature order
+        chunk_size: Records converted per step
+        dtype: Dtype of the returned matrix
+        
+    Returns:
+        (n_records, n_columns) array, or None if the request failed
+    """
     try:
-        # Validate and extract features
-        request_logs = data.get('request_logs', [])
-        if not request_logs:
-            logger.warning("No request logs found, using mock data")
-            return np.random.randn(1000, 3)
+        key = (endpoint, item_path, tuple(columns), np.dtype(dtype).str)
+        with _cache_lock:
+            features = _response_cache.get(key)
+            etag_entry = _etag_cache.get(key)
+        if features is not None:
+            logger.info(f"Using cached features for {endpoint}")
+            return features
         
-        features = []
-        for log in request_logs:
-            # Extract features: response_time, request_size, error_count
-            feature_row = [
-                float(log.get('response_time', 0)),
-                float(log.get('request_size', 0)),
-                float(log.get('error_count', 0))
-            ]
-            features.append(feature_row)
+        url = f"{API_URL}{endpoint}"
+        logger.info(f"Streaming API request to: {url}")
         
-        if len(features) < 10:  # Need minimum samples for training
-            logger.warning("Insufficient data samples, using mock data")
-            return np.random.randn(1000, 3)
-            
-        logger.info(f"Loaded {len(features)} anomaly detection samples")
-        return np.array(features)
+        headers = {'If-None-Match': etag_entry[0]} if etag_entry else None
+        with http_session.get(url, stream=True, headers=headers, timeout=API_TIMEOUT) as response:
+            if response.status_code == 304 and etag_entry:
+                features = etag_entry[1]
+                logger.info(f"Data from {endpoint} not modified, reusing cached features")
+            else:
+                response.raise_for_status()
+                features = _read_only(_parse_feature_stream(response, item_path, columns, chunk_size, dtype))
+                logger.info(f"Successfully streamed {len(features)} records from {endpoint}")
         
+        with _cache_lock:
+            _response_cache[key] = features
+            etag = response.headers.get('ETag')
+            if etag:
+                _etag_cache[key] = (etag, features)
+        return features
+        
+    except requests.exceptions.Timeout:
+        logger.error(f"Timeout error for endpoint {endpoint}")
+        return None
+    except requests.exceptions.ConnectionError:
+        logger.error(f"Connection error for endpoint {endpoint}")
+        return None
+    except requests.exceptions.HTTPError as e:
+        logger.error(f"HTTP error for endpoint {endpoint}: {e}")
+        return None
+
+# The mock fallbacks are generated once and handed out read-only, so a
+# backend outage does not cost a fresh batch of random numbers per load
+def _read_only(array: np.ndarray) -> np.ndarray:
+    array.setflags(write=False)
+    return array
+
+@lru_cache(maxsize=1)
+def _mock_anomaly_data() -> np.ndarray:
+    """Random request features in the same float32 layout as the API path"""
+    # Drawn as float32 directly rather than generating float64 and copying
+    return _read_only(np.random.default_rng().standard_normal((1000, len(ANOMALY_FEATURES)), dtype=np.float32))
+
+@lru_cache(maxsize=1)
+def _mock_clustering_data() -> np.ndarray:
+    """Random user activity features in the same float32 layout as the API path"""
+    return _read_only(np.random.rand(500, len(CLUSTERING_FEATURES)).astype(np.float32))
+
+def load_anomaly_data() -> Optional[np.ndarray]:
+    """Load and return data for anomaly detection from backend API."""
+    try:
+        # Extract features: response_time, request_size, error_count
+        features = _stream_api_features('/api/requests/logs', 'request_logs', ANOMALY_FEATURES)
     except Exception as e:
         logger.error(f"Error processing anomaly data: {e}")
-        return np.random.randn(1000, 3)
+        return _mock_anomaly_data()
+    
+    if features is None:
+        logger.warning("Failed to fetch anomaly data, using fallback mock data")
+        return _mock_anomaly_data()
+    
+    if len(features) == 0:
+        logger.warning("No request logs found, using mock data")
+        return _mock_anomaly_data()
+    
+    if len(features) < 10:  # Need minimum samples for training
+        logger.warning("Insufficient data samples, using mock data")
+        return _mock_anomaly_data()
+        
+    logger.info(f"Loaded {len(features)} anomaly detection samples")
+    return features
 
 def load_clustering_data() -> Optional[np.ndarray]:
     """Load and return data for user clustering from backend API."""
-    data = _make_api_request('/api/users/activity-stats')
+    try:
+        # Extract features: login_count, purchase_count, cart_count, favorite_count
+        features = _stream_api_features('/api/users/activity-stats', 'user_activities', CLUSTERING_FEATURES)
+    except Exception as e:
+        logger.error(f"Error processing clustering data: {e}")
+        return _mock_clustering_data()
     
-    if data is None:
+    if features is None:
         logger.warning("Failed to fetch clustering data, using fallback mock data")
-        return np.random.rand(500, 4)  # 4 features for user activity
+        return _mock_clustering_data()
     
-    try:
-        # Validate and extract features
-        user_activities = data.get('user_activities', [])
-        if not user_activities:
-            logger.warning("No user activities found, using mock data")
-            return np.random.rand(500, 4)
-        
-        features = []
-        for activity in user_activities:
-            # Extract features: login_count, purchase_count, cart_count, favorite_count
-            feature_row = [
-                float(activity.get('login_count', 0)),
-                float(activity.get('purchase_count', 0)),
-                float(activity.get('cart_count', 0)),
-                float(activity.get('favorite_count', 0))
-            ]
-            features.append(feature_row)
-        
-        if len(features) < 5:  # Need minimum samples for clustering
-            logger.warning("Insufficient user activity samples, using mock data")
-            return np.random.rand(500, 4)
-            
-        logger.info(f"Loaded {len(features)} user clustering samples")
-        return np.array(features)
+    if len(features) == 0:
+        logger.warning("No user activities found, using mock data")
+        return _mock_clustering_data()
+    
+    if len(features) < 5:  # Need minimum samples for clustering
+        logger.warning("Insufficient user activity samples, using mock data")
+        return _mock_clustering_data()
         
-    except Exception as e:
-        logger.error(f"Error processing clustering data: {e}")
-        return np.random.rand(500, 4)
+    logger.info(f"Loaded {len(features)} user clustering samples")
+    return features
 
-def load_recommendation_data() -> Optional[Tuple[np.ndarray, pd.DataFrame]]:
-    """Load and return user-item matrix for recommendations from backend API."""
-    data = _make_api_request('/api/purchases/user-item-matrix')
-    
-    if data is None:
-        logger.warning("Failed to fetch recommendation data, using fallback mock data")
-        return np.random.randint(0, 2, (100, 50)), pd.DataFrame()
+@lru_cache(maxsize=1)
+def _mock_recommendation_matrix() -> sp.csr_matrix:
+    return sp.csr_matrix(np.random.randint(0, 2, (100, 50)), dtype=np.float32)
+
+def _mock_recommendation_data() -> Tuple[sp.csr_matrix, np.ndarray, np.ndarray]:
+    """Random user-item matrix with positional user/product IDs"""
+    # Copied because callers may prune the matrix in place; copying the
+    # stored entries is still far cheaper than drawing them again
+    matrix = _mock_recommendation_matrix().copy()
+    return matrix, np.arange(matrix.shape[0]), np.arange(matrix.shape[1])
+
+def load_recommendation_data() -> Optional[Tuple[sp.csr_matrix, np.ndarray, np.ndarray]]:
+    """
+    Load and return user-item matrix for recommendations from backend API.
     
+    Returns:
+        Tuple of (user-item CSR matrix, user ID per row, product ID per column)
+    """
     try:
-        # Validate and extract purchase data
-        purchases = data.get('purchases', [])
-        if not purchases:
-            logger.warning("No purchase data found, using mock data")
-            return np.random.randint(0, 2, (100, 50)), pd.DataFrame()
+        # The purchase triplets are stream-parsed into one numeric array, so
+        # neither the response body nor a list of purchase dicts is held in
+        # memory. float64 keeps IDs exact (float32 would round them past 2**24)
+        triplets = _stream_api_features('/api/purchases/user-item-matrix', 'purchases',
+                                        PURCHASE_FIELDS, dtype=np.float64)
+        if triplets is None:
+            logger.warning("Failed to fetch recommendation data, using fallback mock data")
+            return _mock_recommendation_data()
         
-        # Convert to DataFrame for easier manipulation
-        df = pd.DataFrame(purchases)
-        
-        # Validate required columns
-        required_cols = ['user_id', 'product_id', 'quantity']
-        if not all(col in df.columns for col in required_cols):
-            logger.warning("Missing required columns in purchase data, using mock data")
-            return np.random.randint(0, 2, (100, 50)), pd.DataFrame()
+        if len(triplets) == 0:
+            logger.warning("No purchase data found, using mock data")
+            return _mock_recommendation_data()
         
-        # Create user-item matrix
-        user_item_matrix = df.pivot_table(
-            index='user_id',
-            columns='product_id',
-            values='quantity',
-            fill_value=0,
-            aggfunc='sum'
-        )
+        # Create sparse user-item matrix straight from the purchase triplets;
+        # duplicate (user, product) pairs are summed on conversion to CSR
+        user_idx, user_ids = pd.factorize(triplets[:, 0].astype(np.int64), sort=True)
+        product_idx, product_ids = pd.factorize(triplets[:, 1].astype(np.int64), sort=True)
+        quantities = triplets[:, 2].astype(np.float32)
+        user_item_matrix = sp.coo_matrix(
+            (quantities, (user_idx, product_idx)),
+            shape=(len(user_ids), len(product_ids))
+        ).tocsr()
         
-        if user_item_matrix.empty or user_item_matrix.shape[0] < 5:
+        if user_item_matrix.nnz == 0 or user_item_matrix.shape[0] < 5:
             logger.warning("Insufficient purchase data, using mock data")
-            return np.random.randint(0, 2, (100, 50)), pd.DataFrame()
+            return _mock_recommendation_data()
             
-        logger.info(f"Loaded user-item matrix: {user_item_matrix.shape}")
-        return user_item_matrix.values, user_item_matrix
+        logger.info(f"Loaded user-item matrix: {user_item_matrix.shape} ({user_item_matrix.nnz} non-zeros)")
+        return user_item_matrix, user_ids, product_ids
         
     except Exception as e:
         logger.error(f"Error processing recommendation data: {e}")
-        return np.random.randint(0, 2, (100, 50)), pd.DataFrame()
+        return _mock_recommendation_data()
+
+@lru_cache(maxsize=1)
+def _mock_trend_data() -> Tuple[np.ndarray, np.ndarray]:
+    """Random monthly sales figures"""
+    return _read_only(np.arange(24).reshape(-1, 1)), _read_only(np.random.rand(24) * 100)
 
 def load_trend_data() -> Optional[Tuple[np.ndarray, np.ndarray]]:
     """Load and return data for trend analysis from backend API."""
@@ -164,18 +329,14 @@ def load_trend_data() -> Optional[Tuple[np.ndarray, np.ndarray]]:
     
     if data is None:
         logger.warning("Failed to fetch trend data, using fallback mock data")
-        X = np.arange(24).reshape(-1, 1)
-        y = np.random.rand(24) * 100
-        return X, y
+        return _mock_trend_data()
     
     try:
         # Validate and extract trend data
         sales_trends = data.get('sales_trends', [])
         if not sales_trends:
             logger.warning("No sales trend data found, using mock data")
-            X = np.arange(24).reshape(-1, 1)
-            y = np.random.rand(24) * 100
-            return X, y
+            return _mock_trend_data()
         
         # Convert to DataFrame for easier manipulation
         df = pd.DataFrame(sales_trends)
@@ -184,9 +345,7 @@ def load_trend_data() -> Optional[Tuple[np.ndarray, np.ndarray]]:
         required_cols = ['date', 'sales_count']
         if not all(col in df.columns for col in required_cols):
             logger.warning("Missing required columns in trend data, using mock data")
-            X = np.arange(24).reshape(-1, 1)
-            y = np.random.rand(24) * 100
-            return X, y
+            return _mock_trend_data()
         
         # Sort by date and prepare features
         df['date'] = pd.to_datetime(df['date'])
@@ -201,119 +360,69 @@ def load_trend_data() -> Optional[Tuple[np.ndarray, np.ndarray]]:
         
         if len(X) < 5:  # Need minimum samples for trend analysis
             logger.warning("Insufficient trend data samples, using mock data")
-            X = np.arange(24).reshape(-1, 1)
-            y = np.random.rand(24) * 100
-            return X, y
+            return _mock_trend_data()
             
         logger.info(f"Loaded {len(X)} trend analysis samples")
         return X, y
         
     except Exception as e:
         logger.error(f"Error processing trend data: {e}")
-        X = np.arange(24).reshape(-1, 1)
-        y = np.random.rand(24) * 100
-        return X, y
+        return _mock_trend_data()
 
-def validate_anomaly_data(data: Dict[str, Any]) -> bool:
-    """Validate incoming request log data format"""
-    required_fields = ['response_time', 'request_size', 'error_count']
+def load_in_parallel(loaders: Dict[str, Callable[[], Any]]) -> Dict[str, Any]:
+    """
+    Run several data loaders side by side
     
-    if not isinstance(data, dict):
-        return False
-    
-    request_logs = data.get('request_logs', [])
-    if not isinstance(request_logs, list) or not request_logs:
-        return False
+    Every loader is one or more backend round trips, so running them on
+    their own threads overlaps the waits; the pooled session keeps one
+    connection per concurrent loader alive for the next call.
     
-    # Check first few samples for required fields
-    for log in request_logs[:5]:
-        if not all(field in log for field in required_fields):
-            return False
+    Args:
+        loaders: Mapping of name to a zero-argument loader function
         
-        # Check data types
-        try:
-            float(log['response_time'])
-            float(log['request_size'])
-            float(log['error_count'])
-        except (ValueError, TypeError):
-            return False
-    
-    return True
+    Returns:
+        Mapping of the same names to each loader's result
+    """
+    with ThreadPoolExecutor(max_workers=max(1, len(loaders)), thread_name_prefix='loader') as executor:
+        futures = {name: executor.submit(loader) for name, loader in loaders.items()}
+        return {name: future.result() for name, future in futures.items()}
 
-def validate_clustering_data(data: Dict[str, Any]) -> bool:
-    """Validate user activity data format"""
-    required_fields = ['login_count', 'purchase_count', 'cart_count', 'favorite_count']
-    
+# Record validators compiled once; pydantic-core checks and coerces every
+# field of a sample in a single pass instead of per-field float()/int() calls
+_REQUEST_LOGS_ADAPTER = TypeAdapter(list[RequestLogRecord])
+_USER_ACTIVITIES_ADAPTER = TypeAdapter(list[UserActivityRecord])
+_PURCHASES_ADAPTER = TypeAdapter(list[PurchaseRecord])
+_SALES_TRENDS_ADAPTER = TypeAdapter(list[SalesTrendRecord])
+
+def _validate_records(data: Dict[str, Any], key: str, adapter: TypeAdapter) -> bool:
+    """Check that data[key] is a non-empty list whose first few records match the schema"""
     if not isinstance(data, dict):
         return False
     
-    user_activities = data.get('user_activities', [])
-    if not isinstance(user_activities, list) or not user_activities:
+    records = data.get(key, [])
+    if not isinstance(records, list) or not records:
         return False
     
-    # Check first few samples for required fields
-    for activity in user_activities[:5]:
-        if not all(field in activity for field in required_fields):
-            return False
-        
-        # Check data types
-        try:
-            float(activity['login_count'])
-            float(activity['purchase_count'])
-            float(activity['cart_count'])
-            float(activity['favorite_count'])
-        except (ValueError, TypeError):
-            return False
+    # Check first few samples for required fields and data types
+    try:
+        adapter.validate_python(records[:5])
+    except ValidationError:
+        return False
     
     return True
 
+def validate_anomaly_data(data: Dict[str, Any]) -> bool:
+    """Validate incoming request log data format"""
+    return _validate_records(data, 'request_logs', _REQUEST_LOGS_ADAPTER)
+
+def validate_clustering_data(data: Dict[str, Any]) -> bool:
+    """Validate user activity data format"""
+    return _validate_records(data, 'user_activities', _USER_ACTIVITIES_ADAPTER)
+
 def validate_recommendation_data(data: Dict[str, Any]) -> bool:
     """Validate purchase data format"""
-    required_fields = ['user_id', 'product_id', 'quantity']
-    
-    if not isinstance(data, dict):
-        return False
-    
-    purchases = data.get('purchases', [])
-    if not isinstance(purchases, list) or not purchases:
-        return False
-    
-    # Check first few samples for required fields
-    for purchase in purchases[:5]:
-        if not all(field in purchase for field in required_fields):
-            return False
-        
-        # Check data types
-        try:
-            int(purchase['user_id'])
-            int(purchase['product_id'])
-            float(purchase['quantity'])
-        except (ValueError, TypeError):
-            return False
-    
-    return True
+    return _validate_records(data, 'purchases', _PURCHASES_ADAPTER)
 
 def validate_trend_data(data: Dict[str, Any]) -> bool:
     """Validate sales trend data format"""
-    required_fields = ['date', 'sales_count']
-    
-    if not isinstance(data, dict):
-        return False
-    
-    sales_trends = data.get('sales_trends', [])
-    if not isinstance(sales_trends, list) or not sales_trends:
-        return False
-    
-    # Check first few samples for required fields
-    for trend in sales_trends[:5]:
-        if not all(field in trend for field in required_fields):
-            return False
-        
-        # Check data types
-        try:
-            pd.to_datetime(trend['date'])
-            float(trend['sales_count'])
-        except (ValueError, TypeError):
-            return False
-    
-    return True
\ No newline at end of file
+    return _validate_records(data, 'sales_trends', _SALES_TRENDS_ADAPTER)
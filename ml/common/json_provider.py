@@ -0,0 +1,39 @@
+# Flask JSON provider backed by orjson
+from typing import Any
+
+import orjson
+from flask.json.provider import JSONProvider
+
+
+def _default(obj: Any) -> Any:
+    """Serialize the values orjson has no native support for"""
+    # Remaining numpy types (e.g. float16 scalars, object arrays)
+    if hasattr(obj, 'tolist'):
+        return obj.tolist()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+class OrjsonProvider(JSONProvider):
+    """
+    Parse request bodies and render jsonify() responses with orjson
+
+    orjson is several times faster than the stdlib json module on large
+    feature payloads, writes bytes straight into the response without an
+    intermediate str, and serializes numpy arrays and scalars natively, so
+    handlers can return model outputs without converting them first.
+    """
+
+    option = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        return orjson.dumps(obj, default=_default, option=self.option).decode()
+
+    def loads(self, s: str | bytes, **kwargs: Any) -> Any:
+        return orjson.loads(s)
+
+    def response(self, *args: Any, **kwargs: Any):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(
+            orjson.dumps(obj, default=_default, option=self.option),
+            mimetype='application/json'
+        )
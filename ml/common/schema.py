@@ -1,4 +1,7 @@
 # Define expected input/output formats
+from datetime import datetime
+
+from pydantic import BaseModel
 
 # Anomaly Detection
 ANOMALY_INPUT_SCHEMA = {
@@ -31,4 +34,24 @@ TREND_INPUT_SCHEMA = {
 }
 TREND_OUTPUT_SCHEMA = {
     'y_pred': 'np.ndarray, shape (n_samples,)'
-}
\ No newline at end of file
+}
+# Backend API records, validated by the data loader before training
+class RequestLogRecord(BaseModel):
+    response_time: float
+    request_size: float
+    error_count: float
+
+class UserActivityRecord(BaseModel):
+    login_count: float
+    purchase_count: float
+    cart_count: float
+    favorite_count: float
+
+class PurchaseRecord(BaseModel):
+    user_id: int
+    product_id: int
+    quantity: float
+
+class SalesTrendRecord(BaseModel):
+    date: datetime
+    sales_count: float
@@ -0,0 +1,24 @@
+# Gunicorn settings for the ML service, read automatically from the working
+# directory (or pass -c gunicorn.conf.py)
+#
+#   gunicorn wsgi:application
+import os
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:5000')
+
+# WEB_CONCURRENCY is also read by the service to split the scoring threads
+# between the workers, so the worker count is only set through it
+workers = int(os.getenv('WEB_CONCURRENCY', '4'))
+
+# Threaded workers rather than gevent: request handlers block in numpy/BLAS
+# and scikit-learn (which release the GIL) and share in-process thread pools,
+# neither of which cooperates with gevent's monkey-patched greenlets
+worker_class = 'gthread'
+threads = int(os.getenv('GUNICORN_THREADS', '8'))
+
+# Load the models once in the master (see wsgi.py) so the forked workers
+# share their memory-mapped arrays copy-on-write
+preload_app = True
+
+keepalive = 15
+timeout = 60
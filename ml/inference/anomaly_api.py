@@ -1,10 +1,14 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request, Response
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
 import numpy as np
 import joblib
 import os
+from ml.common.batching import MicroBatcher
 
 MODEL_PATH = os.getenv('ANOMALY_MODEL_PATH', 'anomaly_model.joblib')
+BATCH_WAIT_MS = float(os.getenv('BATCH_WAIT_MS', '5'))
+BATCH_MAX_SIZE = int(os.getenv('BATCH_MAX_SIZE', '256'))
 
 class PredictRequest(BaseModel):
     features: list[list[float]]
@@ -12,16 +16,64 @@ class PredictRequest(BaseModel):
 class PredictResponse(BaseModel):
     prediction: list[int]
 
+class BulkPredictRequest(BaseModel):
+    batches: list[list[list[float]]]
+
+class BulkPredictResponse(BaseModel):
+    predictions: list[list[int]]
+
 app = FastAPI()
 
-model = joblib.load(MODEL_PATH)
+# Memory-mapped read-only: the forest's arrays stay in the page cache and are
+# shared by every worker (copy-on-write after a preloading fork)
+model = joblib.load(MODEL_PATH, mmap_mode='r')
+
+# Concurrent single-row /predict calls are coalesced into one model.predict;
+# the lambda reads the global so a retrained model is picked up
+predict_batcher = MicroBatcher(lambda X: model.predict(X), n_features=model.n_features_in_,
+                               max_batch_size=BATCH_MAX_SIZE, batch_wait_timeout_s=BATCH_WAIT_MS / 1000,
+                               name="predict-batcher")
 
 @app.post('/predict', response_model=PredictResponse)
 def predict(req: PredictRequest):
-    X = np.array(req.features)
+    X = np.asarray(req.features, dtype=np.float32)
+    if len(X) == 1 and X.shape[1] == predict_batcher.n_features:
+        return PredictResponse(prediction=[int(predict_batcher.predict(X[0]))])
+    # Multi-row requests are already a batch
     pred = model.predict(X)
     return PredictResponse(prediction=pred.tolist())
 
+@app.post('/predict/bulk', response_model=BulkPredictResponse)
+def predict_bulk(req: BulkPredictRequest):
+    """Predict several feature matrices with a single model call"""
+    rows = [row for batch in req.batches for row in batch]
+    if not rows:
+        return BulkPredictResponse(predictions=[[] for _ in req.batches])
+    X = np.asarray(rows, dtype=np.float32)
+    pred = model.predict(X).tolist()
+    # Split the flat predictions back into one list per submitted matrix
+    bounds = np.cumsum([0] + [len(batch) for batch in req.batches]).tolist()
+    return BulkPredictResponse(predictions=[pred[start:end] for start, end in zip(bounds, bounds[1:])])
+
+@app.post('/predict/binary')
+async def predict_binary(request: Request, cols: int):
+    """
+    Predict from a raw float32 feature matrix, for high-throughput callers
+
+    The body is the row-major little-endian float32 bytes of an (n, cols)
+    matrix; the response is one int8 label (-1 or 1) per row. This skips JSON
+    encoding and parsing entirely and sends 4 bytes per value.
+    """
+    if cols != model.n_features_in_:
+        raise HTTPException(status_code=400, detail=f"Model expects {model.n_features_in_} features, got cols={cols}")
+    body = await request.body()
+    if not body or len(body) % (4 * cols):
+        raise HTTPException(status_code=400, detail="Body must hold a whole number of float32 rows of length cols")
+    # A zero-copy view over the request body
+    X = np.frombuffer(body, dtype='<f4').reshape(-1, cols)
+    pred = await run_in_threadpool(model.predict, X)
+    return Response(content=pred.astype(np.int8).tobytes(), media_type='application/octet-stream')
+
 @app.post('/retrain')
 def retrain(req: PredictRequest):
     try:
@@ -31,8 +83,10 @@ def retrain(req: PredictRequest):
         new_model = AnomalyDetector(method='isolation_forest', n_estimators=100)
         new_model.fit(X)
         new_model.save(MODEL_PATH)
+        # Serve the freshly fitted estimator directly rather than reading back
+        # the file that was just written
         global model
-        model = joblib.load(MODEL_PATH)
+        model = new_model.model
         return {"status": "retrained", "n_samples": len(X)}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e)) 
\ No newline at end of file
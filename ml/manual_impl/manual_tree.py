@@ -1,10 +1,13 @@
+import joblib
 import numpy as np
+from joblib import Parallel, delayed
 from typing import Dict, Any, Optional, Union
-from collections import Counter
+from collections import deque
 
 class ManualDecisionTree:
     def __init__(self, max_depth: int = 3, min_samples_split: int = 2, min_samples_leaf: int = 1, 
-                 criterion: str = 'gini', max_features: Optional[int] = None):
+                 criterion: str = 'gini', max_features: Optional[int] = None,
+                 max_bins: Optional[int] = None, n_jobs: int = 1, parallel_min_samples: int = 5000):
         """
         Manual implementation of Decision Tree with information gain and pruning
         
@@ -14,16 +17,28 @@ class ManualDecisionTree:
             min_samples_leaf: Minimum samples required at a leaf node
             criterion: Splitting criterion ('gini' or 'entropy')
             max_features: Maximum number of features to consider for splitting
+            max_bins: Number of quantile bins (at most 256) each feature is binned
+                into once before training, with splits searched over per-node bin
+                histograms; None tries every midpoint at every node
+            n_jobs: Threads to split the features over at nodes with at least
+                parallel_min_samples samples
+            parallel_min_samples: Smallest node whose split search is parallelized
         """
         self.max_depth = max_depth
         self.min_samples_split = min_samples_split
         self.min_samples_leaf = min_samples_leaf
         self.criterion = criterion
         self.max_features = max_features
+        self.max_bins = max_bins
+        self.n_jobs = n_jobs
+        self.parallel_min_samples = parallel_min_samples
+        self.bin_edges_ = None
         self.tree = None
+        self.nodes_ = None
         self.feature_importances_ = None
         self.n_features_ = None
         self.n_classes_ = None
+        self.classes_ = None
 
     def _gini_impurity(self, y: np.ndarray) -> float:
         """Calculate Gini impurity"""
@@ -54,108 +69,181 @@ class ManualDecisionTree:
         else:
             raise ValueError(f"Unknown criterion: {self.criterion}")
 
-    def _information_gain(self, y: np.ndarray, left_y: np.ndarray, right_y: np.ndarray) -> float:
-        """Calculate information gain from a split"""
-        if len(y) == 0:
-            return 0
-        
-        # Calculate weighted impurity after split
-        n_total = len(y)
-        n_left = len(left_y)
-        n_right = len(right_y)
-        
-        if n_left == 0 or n_right == 0:
-            return 0
-        
-        impurity_before = self._calculate_impurity(y)
-        impurity_after = (n_left / n_total) * self._calculate_impurity(left_y) + \
-                        (n_right / n_total) * self._calculate_impurity(right_y)
-        
-        return impurity_before - impurity_after
+    def _impurity_from_counts(self, counts: np.ndarray, n_samples: np.ndarray) -> np.ndarray:
+        """Impurity of every row of a (n_splits, n_classes) class-count table"""
+        probabilities = counts / n_samples[:, None]
+        if self.criterion == 'gini':
+            return 1 - np.sum(probabilities ** 2, axis=1)
+        elif self.criterion == 'entropy':
+            # Empty classes contribute 0 (the p * log(p) limit) instead of nan
+            with np.errstate(divide='ignore', invalid='ignore'):
+                terms = np.where(probabilities > 0, probabilities * np.log2(probabilities), 0)
+            return -np.sum(terms, axis=1)
+        else:
+            raise ValueError(f"Unknown criterion: {self.criterion}")
+
+    def _evaluate_feature(self, X: np.ndarray, y_codes: np.ndarray, class_counts: np.ndarray,
+                          impurity_before: float, sample_idx: np.ndarray,
+                          X_binned: Optional[np.ndarray], feature: int) -> tuple:
+        """Best (gain, threshold) of a single feature over the node's samples, or (-inf, None) if it cannot be split"""
+        n_samples = len(y_codes)
+        n_classes = len(class_counts)
+        
+        # Every split point of the feature is evaluated at once from cumulative
+        # class counts, either over the sorted column or over its bin histogram
+        if X_binned is None:
+            column = X[sample_idx, feature]
+            order = np.argsort(column, kind='stable')
+            values = column[order]
+            
+            one_hot = np.zeros((n_samples, n_classes), dtype=np.int64)
+            one_hot[np.arange(n_samples), y_codes[order]] = 1
+            left_counts = np.cumsum(one_hot, axis=0)[:-1]
+            
+            # Thresholds lie halfway between consecutive distinct values;
+            # splitting after position i puts i + 1 samples on the left
+            n_left = np.arange(1, n_samples)
+            valid = values[:-1] < values[1:]
+        else:
+            # Class counts per bin; splitting after bin i sends every
+            # sample with a value <= bin_edges_[feature][i] left
+            edges = self.bin_edges_[feature]
+            n_bins = len(edges) + 1
+            hist = np.bincount(X_binned[sample_idx, feature].astype(np.intp) * n_classes + y_codes,
+                               minlength=n_bins * n_classes).reshape(n_bins, n_classes)
+            left_counts = np.cumsum(hist, axis=0)[:-1]
+            
+            n_left = left_counts.sum(axis=1)
+            valid = (n_left > 0) & (n_left < n_samples)
+        n_right = n_samples - n_left
+        
+        # Check minimum samples constraint
+        valid &= (n_left >= self.min_samples_leaf) & (n_right >= self.min_samples_leaf)
+        if not valid.any():
+            return -np.inf, None
+        
+        right_counts = class_counts - left_counts
+        
+        # The parent impurity is the same for every split point, so the best
+        # split is the one with the lowest sample-weighted child impurity;
+        # only that one is converted into an information gain
+        with np.errstate(divide='ignore', invalid='ignore'):
+            weighted_impurity = n_left * self._impurity_from_counts(left_counts, n_left) + \
+                                n_right * self._impurity_from_counts(right_counts, n_right)
+        weighted_impurity = np.where(valid, weighted_impurity, np.inf)
+        
+        i = np.argmin(weighted_impurity)
+        threshold = (values[i] + values[i + 1]) / 2 if X_binned is None else edges[i]
+        return impurity_before - weighted_impurity[i] / n_samples, threshold
 
-    def _find_best_split(self, X: np.ndarray, y: np.ndarray) -> tuple:
-        """Find the best feature and threshold for splitting"""
+    def _find_best_split(self, X: np.ndarray, y_codes: np.ndarray, class_counts: np.ndarray,
+                         impurity_before: float, sample_idx: np.ndarray,
+                         X_binned: Optional[np.ndarray] = None) -> tuple:
+        """Find the best feature and threshold for splitting the rows sample_idx of X, given their encoded labels and class counts"""
         best_gain = -1
         best_feature = None
         best_threshold = None
         
+        n_samples = len(sample_idx)
         n_features = X.shape[1]
         
-        # Select features to consider
+        # Select features to consider, as an int32 index array either way
         if self.max_features is not None:
             features_to_consider = np.random.choice(n_features, 
                                                   min(self.max_features, n_features), 
-                                                  replace=False)
+                                                  replace=False).astype(np.int32)
+        else:
+            features_to_consider = np.arange(n_features, dtype=np.int32)
+        
+        if self.n_jobs != 1 and n_samples >= self.parallel_min_samples:
+            # The features are independent and the NumPy sorts and sums release
+            # the GIL, so large nodes evaluate them in threads
+            results = Parallel(n_jobs=self.n_jobs, prefer='threads')(
+                delayed(self._evaluate_feature)(X, y_codes, class_counts, impurity_before, sample_idx, X_binned, feature)
+                for feature in features_to_consider
+            )
         else:
-            features_to_consider = range(n_features)
+            results = [self._evaluate_feature(X, y_codes, class_counts, impurity_before, sample_idx, X_binned, feature)
+                       for feature in features_to_consider]
         
-        for feature in features_to_consider:
-            # Get unique values for this feature
-            unique_values = np.unique(X[:, feature])
-            
-            # Try each unique value as a threshold
-            for i in range(len(unique_values) - 1):
-                threshold = (unique_values[i] + unique_values[i + 1]) / 2
-                
-                # Split data
-                left_mask = X[:, feature] <= threshold
-                right_mask = ~left_mask
-                
-                left_y = y[left_mask]
-                right_y = y[right_mask]
-                
-                # Check minimum samples constraint
-                if len(left_y) < self.min_samples_leaf or len(right_y) < self.min_samples_leaf:
-                    continue
-                
-                # Calculate information gain
-                gain = self._information_gain(y, left_y, right_y)
-                
-                if gain > best_gain:
-                    best_gain = gain
-                    best_feature = feature
-                    best_threshold = threshold
+        for feature, (gain, threshold) in zip(features_to_consider, results):
+            if gain > best_gain:
+                best_gain = gain
+                best_feature = feature
+                best_threshold = threshold
         
         return best_feature, best_threshold, best_gain
 
-    def _build_tree(self, X: np.ndarray, y: np.ndarray, depth: int = 0) -> Union[Dict[str, Any], int]:
-        """Recursively build the decision tree"""
+    def _build_tree(self, X: np.ndarray, y: np.ndarray, sample_idx: np.ndarray, depth: int = 0,
+                    X_binned: Optional[np.ndarray] = None) -> Union[Dict[str, Any], int]:
+        """
+        Recursively build the decision tree over the rows sample_idx of X
+        
+        Nodes pass index arrays down instead of copies of X; labels are
+        encoded as indices into classes_.
+        """
+        node_y = y[sample_idx]
+        
+        # Labels are class indices into classes_, so one bincount gives the
+        # node's class counts for the leaf vote, the split search and its impurity
+        class_counts = np.bincount(node_y, minlength=self.n_classes_)
+        
         # Check stopping criteria
         if (depth >= self.max_depth or 
-            len(y) < self.min_samples_split or 
-            len(np.unique(y)) == 1 or
-            len(y) < 2 * self.min_samples_leaf):
+            len(node_y) < self.min_samples_split or 
+            (node_y == node_y[0]).all() or
+            len(node_y) < 2 * self.min_samples_leaf):
             # Return most common class
-            return Counter(y).most_common(1)[0][0]
+            return self.classes_[class_counts.argmax()]
+        
+        impurity = self._impurity_from_counts(class_counts[None, :], np.array([len(node_y)]))[0]
         
         # Find best split
-        best_feature, best_threshold, best_gain = self._find_best_split(X, y)
+        best_feature, best_threshold, best_gain = self._find_best_split(X, node_y, class_counts, impurity, sample_idx, X_binned)
         
         # If no good split found, return leaf
         if best_feature is None or best_gain <= 0:
-            return Counter(y).most_common(1)[0][0]
+            return self.classes_[class_counts.argmax()]
         
         # Split data
-        left_mask = X[:, best_feature] <= best_threshold
-        right_mask = ~left_mask
+        left_mask = X[sample_idx, best_feature] <= best_threshold
+        left_idx = sample_idx[left_mask]
+        right_idx = sample_idx[~left_mask]
         
         # Update feature importance
         if self.feature_importances_ is not None:
-            self.feature_importances_[best_feature] += best_gain * len(y) / len(self.y_train_)
+            self.feature_importances_[best_feature] += best_gain * len(node_y) / len(self.y_train_)
         
         # Recursively build subtrees
-        left_subtree = self._build_tree(X[left_mask], y[left_mask], depth + 1)
-        right_subtree = self._build_tree(X[right_mask], y[right_mask], depth + 1)
+        left_subtree = self._build_tree(X, y, left_idx, depth + 1, X_binned)
+        right_subtree = self._build_tree(X, y, right_idx, depth + 1, X_binned)
         
-        return {
+        node = {
             'feature': best_feature,
             'threshold': best_threshold,
             'left': left_subtree,
             'right': right_subtree,
             'gain': best_gain,
-            'samples': len(y),
-            'impurity': self._calculate_impurity(y)
+            'value': self.classes_[class_counts.argmax()],
+            'samples': len(node_y),
+            'impurity': impurity
         }
+        self._update_subtree_size(node)
+        return node
+
+    def _update_subtree_size(self, node: Dict[str, Any]) -> None:
+        """Store the subtree's depth and leaf count on the node, from its children's"""
+        node['depth'] = 1 + max(self.get_depth(node['left']), self.get_depth(node['right']))
+        node['n_leaves'] = self.get_n_leaves(node['left']) + self.get_n_leaves(node['right'])
+
+    def _bin_edges(self, values: np.ndarray) -> np.ndarray:
+        """Sorted bin edges of one feature: its quantiles, or every midpoint if it has few values"""
+        unique_values = np.unique(values)
+        if len(unique_values) <= self.max_bins:
+            # Few distinct values (e.g. binary features): one bin per value
+            return (unique_values[:-1] + unique_values[1:]) / 2
+        quantiles = np.linspace(0, 1, self.max_bins + 1)[1:-1]
+        return np.unique(np.quantile(values, quantiles))
 
     def fit(self, X: np.ndarray, y: np.ndarray) -> 'ManualDecisionTree':
         """
@@ -166,14 +254,30 @@ class ManualDecisionTree:
             y: Training labels (n_samples,)
         """
         self.n_features_ = X.shape[1]
-        self.n_classes_ = len(np.unique(y))
+        # Build on class indices; leaves store the original labels
+        self.classes_, y_encoded = np.unique(y, return_inverse=True)
+        self.n_classes_ = len(self.classes_)
         self.y_train_ = y  # Store for feature importance calculation
         
         # Initialize feature importances
         self.feature_importances_ = np.zeros(self.n_features_)
         
+        # Bin every feature once; a node then only counts classes per bin
+        # instead of sorting its samples by every feature
+        self.bin_edges_ = None
+        X_binned = None
+        if self.max_bins is not None:
+            if not 2 <= self.max_bins <= 256:
+                raise ValueError(f"max_bins must be between 2 and 256, got {self.max_bins}")
+            self.bin_edges_ = [self._bin_edges(X[:, feature]) for feature in range(self.n_features_)]
+            X_binned = np.empty(X.shape, dtype=np.uint8, order='F')
+            for feature, edges in enumerate(self.bin_edges_):
+                X_binned[:, feature] = np.searchsorted(edges, X[:, feature], side='left')
+        
         # Build tree
-        self.tree = self._build_tree(X, y)
+        # Nodes gather single columns of their rows, which Fortran order keeps contiguous
+        self.tree = self._build_tree(np.asfortranarray(X), y_encoded, np.arange(len(y_encoded)), X_binned=X_binned)
+        self.nodes_ = self._flatten_tree(self.tree)
         
         # Normalize feature importances
         if np.sum(self.feature_importances_) > 0:
@@ -181,6 +285,126 @@ class ManualDecisionTree:
         
         return self
 
+    @staticmethod
+    def _flatten_tree(tree: Union[Dict[str, Any], int]) -> Dict[str, np.ndarray]:
+        """
+        Lay the tree out as flat per-node arrays for batch prediction
+        
+        Nodes are numbered in breadth-first order, so the top levels that
+        every sample passes through sit next to each other in memory.
+        
+        Args:
+            tree: Root of the nested-dict tree
+            
+        Returns:
+            Dict of equal-length arrays indexed by node: 'feature', 'threshold',
+            'left' and 'right' (-1 at leaves), 'value' (index into 'classes' of
+            the class the node predicts, -1 if unknown) and the split 'gain',
+            'samples' and 'impurity' (0 at leaves), plus the 'classes' themselves
+        """
+        features, thresholds, lefts, rights, values = [], [], [], [], []
+        gains, samples, impurities = [], [], []
+        leaf_classes = []
+        
+        # Breadth-first walk; a node's children are patched in once their
+        # indices are known
+        queue = deque([(tree, -1, None)])
+        while queue:
+            node, parent, side = queue.popleft()
+            index = len(features)
+            if parent >= 0:
+                (lefts if side == 'left' else rights)[parent] = index
+            
+            lefts.append(-1)
+            rights.append(-1)
+            if isinstance(node, dict):
+                features.append(node['feature'])
+                thresholds.append(node['threshold'])
+                gains.append(node['gain'])
+                samples.append(node['samples'])
+                impurities.append(node['impurity'])
+                if 'value' in node:
+                    values.append(len(leaf_classes))
+                    leaf_classes.append(node['value'])
+                else:
+                    values.append(-1)
+                queue.append((node['left'], index, 'left'))
+                queue.append((node['right'], index, 'right'))
+            else:
+                features.append(0)
+                thresholds.append(0.0)
+                gains.append(0.0)
+                samples.append(0)
+                impurities.append(0.0)
+                values.append(len(leaf_classes))
+                leaf_classes.append(node)
+        
+        # int32 indices keep the arrays compact; thresholds stay float64 so
+        # comparisons match the training-time splits exactly
+        return {
+            'feature': np.array(features, dtype=np.int32),
+            'threshold': np.array(thresholds, dtype=np.float64),
+            'left': np.array(lefts, dtype=np.int32),
+            'right': np.array(rights, dtype=np.int32),
+            'value': np.array(values, dtype=np.int32),
+            'gain': np.array(gains, dtype=np.float64),
+            'samples': np.array(samples, dtype=np.int64),
+            'impurity': np.array(impurities, dtype=np.float64),
+            'classes': np.array(leaf_classes)
+        }
+
+    def _unflatten_tree(self, nodes: Dict[str, np.ndarray]) -> Union[Dict[str, Any], int]:
+        """Rebuild the nested-dict tree from the flat node arrays"""
+        subtrees = [None] * len(nodes['left'])
+        
+        # Children always come after their parent in breadth-first order, so
+        # walking backwards builds every subtree before it is needed
+        for index in range(len(subtrees) - 1, -1, -1):
+            left = nodes['left'][index]
+            if left == -1:
+                subtrees[index] = nodes['classes'][nodes['value'][index]]
+                continue
+            
+            node = {
+                'feature': int(nodes['feature'][index]),
+                'threshold': float(nodes['threshold'][index]),
+                'left': subtrees[left],
+                'right': subtrees[nodes['right'][index]],
+                'gain': float(nodes['gain'][index]),
+                'samples': int(nodes['samples'][index]),
+                'impurity': float(nodes['impurity'][index])
+            }
+            if nodes['value'][index] != -1:
+                node['value'] = nodes['classes'][nodes['value'][index]]
+            self._update_subtree_size(node)
+            subtrees[index] = node
+            subtrees[left] = subtrees[nodes['right'][index]] = None
+        
+        return subtrees[0]
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # Pickle the flat node arrays rather than one dict per node, and drop
+        # the training labels, which are only needed while fitting
+        state = self.__dict__.copy()
+        state.pop('y_train_', None)
+        if state.get('nodes_') is not None:
+            state['tree'] = None
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        if self.__dict__.get('tree') is None and self.__dict__.get('nodes_') is not None:
+            self.tree = self._unflatten_tree(self.nodes_)
+
+    def save(self, path: str) -> None:
+        """Save the fitted tree; its node arrays are stored as plain NumPy arrays"""
+        joblib.dump(self, path)
+
+    def load(self, path: str) -> 'ManualDecisionTree':
+        """Load a tree saved with save(), memory-mapping its node arrays"""
+        self.__dict__.update(joblib.load(path, mmap_mode='r').__dict__)
+        return self
+
     def _predict_one(self, x: np.ndarray, node: Union[Dict[str, Any], int]) -> int:
         """Predict class for a single sample"""
         # If leaf node, return class
@@ -198,46 +422,71 @@ class ManualDecisionTree:
         if self.tree is None:
             raise ValueError("Model must be fitted before making predictions")
         
-        return np.array([self._predict_one(x, self.tree) for x in X])
+        # Trees pickled before the flat arrays existed
+        if getattr(self, 'nodes_', None) is None:
+            return np.array([self._predict_one(x, self.tree) for x in X])
+        
+        # Walk all samples down the tree in lockstep, one level per pass;
+        # only the samples still at internal nodes are moved on
+        X = np.asarray(X)
+        nodes = self.nodes_
+        node = np.zeros(len(X), dtype=np.int32)
+        active = np.flatnonzero(nodes['left'][node] != -1)
+        while active.size:
+            current = node[active]
+            go_left = X[active, nodes['feature'][current]] <= nodes['threshold'][current]
+            node[active] = np.where(go_left, nodes['left'][current], nodes['right'][current])
+            active = active[nodes['left'][node[active]] != -1]
+        
+        return nodes['classes'][nodes['value'][node]]
 
     def score(self, X: np.ndarray, y: np.ndarray) -> float:
         """Calculate accuracy score"""
         predictions = self.predict(X)
         return np.mean(predictions == y)
 
-    def _prune_node(self, node: Dict[str, Any], X_val: np.ndarray, y_val: np.ndarray) -> Union[Dict[str, Any], int]:
-        """Prune a node if it improves validation accuracy"""
-        if not isinstance(node, dict):
-            return node
+    def _prune_node(self, node: Union[Dict[str, Any], int], X_val: np.ndarray,
+                    y_val: np.ndarray) -> tuple:
+        """
+        Reduced-error pruning of a subtree, bottom-up
         
-        # Recursively prune children
-        node['left'] = self._prune_node(node['left'], X_val, y_val)
-        node['right'] = self._prune_node(node['right'], X_val, y_val)
+        Each validation sample is routed down the tree once, so pruning is
+        linear in the tree size instead of rescoring the validation set for
+        every candidate node.
         
-        # If both children are leaves, consider pruning this node
-        if (not isinstance(node['left'], dict) and 
-            not isinstance(node['right'], dict)):
-            
-            # Calculate accuracy before pruning
-            original_tree = self.tree
-            accuracy_before = self.score(X_val, y_val)
-            
-            # Try pruning (replace with most common class)
-            most_common_class = Counter(y_val).most_common(1)[0][0]
-            
-            # Temporarily replace node with leaf
-            temp_tree = self.tree
-            self.tree = most_common_class
-            accuracy_after = self.score(X_val, y_val)
-            
-            # Restore original tree
-            self.tree = temp_tree
+        Args:
+            node: Subtree root
+            X_val: Validation features of the samples reaching this node
+            y_val: Their labels
             
-            # Prune if accuracy doesn't decrease
-            if accuracy_after >= accuracy_before:
-                return most_common_class
+        Returns:
+            Tuple of the (possibly pruned) subtree and its validation errors
+        """
+        if not isinstance(node, dict):
+            return node, int(np.sum(y_val != node))
+        
+        # Recursively prune children on the samples that reach them
+        left_mask = X_val[:, node['feature']] <= node['threshold']
+        node['left'], left_errors = self._prune_node(node['left'], X_val[left_mask], y_val[left_mask])
+        node['right'], right_errors = self._prune_node(node['right'], X_val[~left_mask], y_val[~left_mask])
+        self._update_subtree_size(node)
+        
+        # The class this node would predict as a leaf: its training majority,
+        # or the validation majority on trees pickled without it
+        if 'value' in node:
+            leaf_class = node['value']
+        elif len(y_val) > 0:
+            values, counts = np.unique(y_val, return_counts=True)
+            leaf_class = values[counts.argmax()]
+        else:
+            return node, left_errors + right_errors
         
-        return node
+        # Prune if the leaf makes no more errors than the subtree
+        leaf_errors = int(np.sum(y_val != leaf_class))
+        if leaf_errors <= left_errors + right_errors:
+            return leaf_class, leaf_errors
+        
+        return node, left_errors + right_errors
 
     def prune(self, X_val: np.ndarray, y_val: np.ndarray) -> 'ManualDecisionTree':
         """
@@ -250,7 +499,8 @@ class ManualDecisionTree:
         if self.tree is None:
             raise ValueError("Model must be fitted before pruning")
         
-        self.tree = self._prune_node(self.tree, X_val, y_val)
+        self.tree, _ = self._prune_node(self.tree, np.asarray(X_val), np.asarray(y_val))
+        self.nodes_ = self._flatten_tree(self.tree)
         return self
 
     def get_depth(self, node: Union[Dict[str, Any], int] = None) -> int:
@@ -260,6 +510,9 @@ class ManualDecisionTree:
         
         if not isinstance(node, dict):
             return 0
+        # Stored at build time; trees pickled before that are walked
+        if 'depth' in node:
+            return node['depth']
         
         return 1 + max(self.get_depth(node['left']), self.get_depth(node['right']))
 
@@ -270,6 +523,8 @@ class ManualDecisionTree:
         
         if not isinstance(node, dict):
             return 1
+        if 'n_leaves' in node:
+            return node['n_leaves']
         
         return self.get_n_leaves(node['left']) + self.get_n_leaves(node['right'])
 
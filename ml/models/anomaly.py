@@ -1,4 +1,6 @@
+import os
 import joblib
+from joblib import Parallel, delayed
 from sklearn.ensemble import IsolationForest
 from sklearn.svm import OneClassSVM
 import numpy as np
@@ -16,11 +18,135 @@ class AnomalyDetector:
     def fit(self, X):
         self.model.fit(X)
 
+    @classmethod
+    def fit_many(cls, Xs, n_jobs=-1, **kwargs):
+        """
+        Fit one independent detector per dataset, in parallel processes
+
+        Args:
+            Xs: List of (n_samples, n_features) arrays, e.g. one per user segment
+            n_jobs: Worker processes (-1 for one per core)
+            **kwargs: Constructor arguments shared by every detector
+
+        Returns:
+            List of fitted AnomalyDetector, in the order of Xs
+        """
+        # The fits share no state, so loky processes scale with the cores
+        # without contending for the GIL
+        return Parallel(n_jobs=n_jobs, backend='loky')(
+            delayed(_fit_detector)(cls, X, kwargs) for X in Xs
+        )
+
     def predict(self, X):
         return self.model.predict(X)
 
+    def score_and_predict(self, X):
+        """Anomaly scores and -1/1 labels from a single pass over the model"""
+        # predict() is score_samples compared against offset_, so calling both
+        # would walk the model twice
+        scores = self.model.score_samples(X)
+        return scores, np.where(scores < self.model.offset_, -1, 1)
+
     def save(self, path):
-        joblib.dump(self.model, path)
+        # Dump next to the target and swap it in, so processes that memory-map
+        # the previous file keep valid pages instead of seeing it truncated
+        tmp_path = f"{path}.tmp"
+        joblib.dump(self.model, tmp_path)
+        os.replace(tmp_path, path)
 
     def load(self, path):
-        self.model = joblib.load(path) 
\ No newline at end of file
+        self.model = joblib.load(path) 
+
+def _fit_detector(cls, X, kwargs):
+    """Build and fit a single detector; module level so worker processes can unpickle it"""
+    detector = cls(**kwargs)
+    detector.fit(X)
+    return detector
+
+def _average_path_length(n_samples):
+    """Average path length of an unsuccessful BST search over n_samples points"""
+    n_samples = np.asarray(n_samples, dtype=np.float64)
+    lengths = np.zeros_like(n_samples)
+    lengths[n_samples == 2] = 1.0
+    large = n_samples > 2
+    n = n_samples[large]
+    lengths[large] = 2.0 * (np.log(n - 1.0) + np.euler_gamma) - 2.0 * (n - 1.0) / n
+    return lengths
+
+
+class IsolationForestScorer:
+    """
+    Fast score_samples for a fitted sklearn IsolationForest
+
+    Every node's contribution to the path length (its depth plus the average
+    path length of the samples that reached it) is precomputed once, so
+    scoring is one tree_.apply() and one gather per tree with none of
+    sklearn's per-call input validation. Scores match
+    IsolationForest.score_samples.
+    """
+
+    def __init__(self, forest: IsolationForest, parallel_min_rows: int = 256):
+        self.offset_ = forest.offset_
+        self.parallel_min_rows = parallel_min_rows
+        self.n_features = forest.n_features_in_
+        self._trees = []
+
+        subsample_features = forest._max_features != forest.n_features_in_
+        for tree, features in zip(forest.estimators_, forest.estimators_features_):
+            tree_ = tree.tree_
+            self._trees.append((
+                tree_,
+                np.asarray(features) if subsample_features else None,
+                self._node_path_lengths(tree_)
+            ))
+
+        self._denominator = len(self._trees) * _average_path_length([forest.max_samples_])[0]
+
+    @staticmethod
+    def _node_path_lengths(tree_) -> np.ndarray:
+        """Depth of each node plus the expected remaining depth below it"""
+        depths = np.zeros(tree_.node_count, dtype=np.float64)
+        internal = np.flatnonzero(tree_.children_left != -1)
+        left, right = tree_.children_left[internal], tree_.children_right[internal]
+        # Every pass pushes parent depths one level down for all nodes at once,
+        # so max_depth vectorized passes replace a Python loop over the nodes
+        for _ in range(tree_.max_depth):
+            depths[left] = depths[internal] + 1.0
+            depths[right] = depths[internal] + 1.0
+        return depths + _average_path_length(tree_.n_node_samples)
+
+    def _path_length_sum(self, X: np.ndarray, trees) -> np.ndarray:
+        depths = np.zeros(X.shape[0], dtype=np.float64)
+        for tree_, features, path_lengths in trees:
+            X_subset = X if features is None else np.ascontiguousarray(X[:, features])
+            depths += path_lengths[tree_.apply(X_subset)]
+        return depths
+
+    def score_samples(self, X, n_jobs: int = 1) -> np.ndarray:
+        """
+        Anomaly score of each row, lower is more abnormal
+
+        Args:
+            X: (n_samples, n_features) feature rows
+            n_jobs: Threads to split the trees over for batches of at least parallel_min_rows
+
+        Returns:
+            Array of scores, identical to IsolationForest.score_samples
+        """
+        # tree_.apply() only accepts C-contiguous float32
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        if X.ndim != 2 or X.shape[1] != self.n_features:
+            raise ValueError(f"Expected {self.n_features} features, got {X.shape}")
+
+        if n_jobs > 1 and X.shape[0] >= self.parallel_min_rows:
+            # tree_.apply() releases the GIL, so threads scale over tree chunks
+            chunks = [self._trees[i::n_jobs] for i in range(n_jobs)]
+            depths = sum(Parallel(n_jobs=n_jobs, prefer='threads')(
+                delayed(self._path_length_sum)(X, chunk) for chunk in chunks
+            ))
+        else:
+            depths = self._path_length_sum(X, self._trees)
+
+        if self._denominator == 0:
+            return -np.full(X.shape[0], 0.5)
+        return -(2.0 ** (-depths / self._denominator))
@@ -1,12 +1,31 @@
 import joblib
-from sklearn.cluster import KMeans
+from sklearn.cluster import KMeans, MiniBatchKMeans
 import numpy as np
 
+# Sample count above which fit() switches to mini-batch k-means
+MINI_BATCH_MIN_SAMPLES = 50_000
+
 class UserClustering:
-    def __init__(self, n_clusters=3, **kwargs):
+    def __init__(self, n_clusters=3, mini_batch=None, batch_size=4096, **kwargs):
+        """
+        Args:
+            n_clusters: Number of user clusters
+            mini_batch: Fit with MiniBatchKMeans; None decides by the number of samples
+            batch_size: Rows per mini-batch
+            **kwargs: Further arguments for the k-means estimator
+        """
+        self.n_clusters = n_clusters
+        self.mini_batch = mini_batch
+        self.batch_size = batch_size
+        self.kwargs = kwargs
         self.model = KMeans(n_clusters=n_clusters, **kwargs)
 
     def fit(self, X):
+        mini_batch = self.mini_batch if self.mini_batch is not None else len(X) > MINI_BATCH_MIN_SAMPLES
+        if mini_batch:
+            # Each step reads one batch instead of every row, so large user
+            # bases converge in a fraction of the passes over the data
+            self.model = MiniBatchKMeans(n_clusters=self.n_clusters, batch_size=self.batch_size, **self.kwargs)
         self.model.fit(X)
 
     def predict(self, X):
@@ -16,4 +35,4 @@ class UserClustering:
         joblib.dump(self.model, path)
 
     def load(self, path):
-        self.model = joblib.load(path) 
\ No newline at end of file
+        self.model = joblib.load(path) 
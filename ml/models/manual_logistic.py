@@ -1,28 +1,62 @@
 import numpy as np
+from scipy.optimize import minimize
 
 class ManualLogisticRegression:
-    def __init__(self, lr=0.01, n_iter=1000):
+    def __init__(self, lr=0.01, n_iter=1000, solver='gd'):
         self.lr = lr
         self.n_iter = n_iter
+        self.solver = solver
         self.weights = None
         self.bias = None
 
     def fit(self, X, y):
         n_samples, n_features = X.shape
+        # Fortran order makes the columns contiguous for X.T @ error, the
+        # second of the two matrix-vector products per iteration
+        X = np.asfortranarray(X, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        if self.solver == 'lbfgs':
+            self._fit_lbfgs(X, y)
+            return
+        elif self.solver != 'gd':
+            raise ValueError(f"Unknown solver: {self.solver}")
+
         self.weights = np.zeros(n_features)
         self.bias = 0
         for _ in range(self.n_iter):
-            linear_model = np.dot(X, self.weights) + self.bias
+            linear_model = X @ self.weights + self.bias
             y_pred = self._sigmoid(linear_model)
-            dw = (1 / n_samples) * np.dot(X.T, (y_pred - y))
-            db = (1 / n_samples) * np.sum(y_pred - y)
+            error = y_pred - y
+            dw = (1 / n_samples) * (X.T @ error)
+            db = (1 / n_samples) * np.sum(error)
             self.weights -= self.lr * dw
             self.bias -= self.lr * db
 
+    def _fit_lbfgs(self, X, y):
+        """Minimize the mean log loss with L-BFGS; converges in tens of iterations instead of n_iter steps"""
+        n_samples, n_features = X.shape
+
+        def loss_and_grad(params):
+            w, b = params[:-1], params[-1]
+            linear_model = X @ w + b
+            # log(1 + e^z) - y * z is the log loss without overflow for large |z|
+            loss = np.mean(np.logaddexp(0, linear_model) - y * linear_model)
+            error = self._sigmoid(linear_model) - y
+            grad = np.empty_like(params)
+            grad[:-1] = (X.T @ error) / n_samples
+            grad[-1] = error.mean()
+            return loss, grad
+
+        result = minimize(loss_and_grad, np.zeros(n_features + 1), jac=True,
+                          method='L-BFGS-B', options={'maxiter': self.n_iter})
+        self.weights = result.x[:-1]
+        self.bias = result.x[-1]
+
     def predict(self, X):
         linear_model = np.dot(X, self.weights) + self.bias
         y_pred = self._sigmoid(linear_model)
         return np.where(y_pred > 0.5, 1, 0)
 
     def _sigmoid(self, x):
-        return 1 / (1 + np.exp(-x)) 
\ No newline at end of file
+        # Clip to avoid overflow in exp for large negative inputs
+        return 1 / (1 + np.exp(-np.clip(x, -500, 500)))
@@ -12,7 +12,7 @@ class ManualDecisionTree:
         return np.array([self._predict_one(x, self.tree) for x in X])
 
     def _build_tree(self, X, y, depth):
-        if depth >= self.max_depth or len(set(y)) == 1:
+        if depth >= self.max_depth or (y == y[0]).all():
             return np.bincount(y).argmax()
         best_feat = 0  # For demo, always split on first feature
         thresh = np.median(X[:, best_feat])
@@ -1,24 +1,58 @@
 import joblib
 import numpy as np
-from sklearn.metrics.pairwise import cosine_similarity
+import scipy.sparse as sp
+from sklearn.preprocessing import normalize
 
 class ItemBasedRecommender:
     def __init__(self):
-        self.item_similarity = None
         self.user_item_matrix = None
+        self.normalized_matrix = None
+        self.item_inv_norms = None
 
     def fit(self, user_item_matrix):
-        self.user_item_matrix = user_item_matrix
-        self.item_similarity = cosine_similarity(user_item_matrix.T)
+        matrix = sp.csr_matrix(user_item_matrix)
+        matrix.eliminate_zeros()
+        if np.all(matrix.data == 1):
+            # Implicit feedback: the interaction pattern is all there is, so it
+            # is kept as one byte per interaction instead of a float64 matrix
+            # plus a normalized float64 copy. Cosines are rescaled per item
+            # with 1 / sqrt(number of users who interacted)
+            self.user_item_matrix = matrix.astype(np.uint8)
+            counts = np.bincount(matrix.indices, minlength=matrix.shape[1])
+            self.item_inv_norms = np.divide(1.0, np.sqrt(counts), out=np.zeros(len(counts)), where=counts > 0)
+            self.normalized_matrix = None
+            return
+
+        self.user_item_matrix = matrix.astype(np.float64)
+        self.item_inv_norms = None
+        # Unit-length item columns: the item-item cosine similarity is
+        # normalized_matrix.T @ normalized_matrix, which is never materialized
+        # since it would take O(n_items^2) memory
+        self.normalized_matrix = normalize(self.user_item_matrix, axis=0).tocsr()
 
     def recommend(self, user_index, top_k=5):
-        user_ratings = self.user_item_matrix[user_index]
-        scores = self.item_similarity.dot(user_ratings)
+        user_ratings = self.user_item_matrix[user_index].toarray().ravel()
+        # ratings @ similarity, evaluated right to left as two sparse
+        # matrix-vector products over the interactions only
+        if self.normalized_matrix is None:
+            # Binary matrix: the column scaling moves onto the vectors
+            weighted = user_ratings * self.item_inv_norms
+            scores = self.item_inv_norms * (self.user_item_matrix.T @ (self.user_item_matrix @ weighted))
+        else:
+            scores = self.normalized_matrix.T @ (self.normalized_matrix @ user_ratings)
+        if 0 < top_k < len(scores):
+            # Find the top_k best items in linear time, then sort only those
+            candidates = np.argpartition(scores, -top_k)[-top_k:]
+            return candidates[np.argsort(scores[candidates])[::-1]]
         recommended = np.argsort(scores)[::-1]
         return recommended[:top_k]
 
     def save(self, path):
-        joblib.dump((self.item_similarity, self.user_item_matrix), path)
+        joblib.dump(self.user_item_matrix, path)
 
     def load(self, path):
-        self.item_similarity, self.user_item_matrix = joblib.load(path) 
\ No newline at end of file
+        saved = joblib.load(path)
+        # Models saved before the sparse layout are (similarity, matrix) tuples
+        if isinstance(saved, tuple):
+            saved = saved[1]
+        self.fit(saved)
@@ -1,14 +1,75 @@
 import joblib
+from joblib import Parallel, delayed
 from sklearn.linear_model import LinearRegression
 import numpy as np
+from scipy.linalg import LinAlgError, cho_factor, cho_solve
+
+# Feature count below which fit() solves the normal equations directly
+NORMAL_EQUATIONS_MAX_FEATURES = 64
+# Largest condition number of X^T X (estimated from its Cholesky factor) that
+# is still solved directly; squaring cond(X) loses that many digits
+NORMAL_EQUATIONS_MAX_CONDITION = 1e8
 
 class TrendPredictor:
     def __init__(self, **kwargs):
         self.model = LinearRegression(**kwargs)
 
     def fit(self, X, y):
+        X = np.asarray(X, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        # Few features: the normal equations are a p x p Cholesky solve,
+        # much cheaper than the SVD-based lstsq LinearRegression runs. Fall
+        # back to it for other settings and for singular or ill-conditioned
+        # problems, which _fit_normal_equations rejects with LinAlgError
+        if (X.ndim == 2 and y.ndim == 1 and X.shape[1] < NORMAL_EQUATIONS_MAX_FEATURES
+                and X.shape[0] > X.shape[1] and not self.model.positive):
+            try:
+                self._fit_normal_equations(X, y)
+                return
+            except LinAlgError:
+                pass
         self.model.fit(X, y)
 
+    def _fit_normal_equations(self, X, y):
+        """Solve (X^T X) coef = X^T y and store the result on the LinearRegression, so predict/save are unchanged"""
+        if self.model.fit_intercept:
+            X_mean, y_mean = X.mean(axis=0), y.mean()
+            X, y = X - X_mean, y - y_mean
+        gram = X.T @ X
+        scale = np.sqrt(np.diag(gram))
+        if not np.all(scale > 0):
+            raise LinAlgError("constant feature")
+        # Unit-diagonal scaling makes the Cholesky diagonal measure collinearity
+        # rather than feature units; its squared spread bounds cond(X^T X) below
+        factor, lower = cho_factor(gram / np.outer(scale, scale))
+        diagonal = np.abs(np.diag(factor))
+        if (diagonal.max() / diagonal.min()) ** 2 > NORMAL_EQUATIONS_MAX_CONDITION:
+            raise LinAlgError("ill-conditioned normal equations")
+        coef = cho_solve((factor, lower), X.T @ y / scale) / scale
+        self.model.coef_ = coef
+        self.model.intercept_ = y_mean - X_mean @ coef if self.model.fit_intercept else 0.0
+        self.model.n_features_in_ = X.shape[1]
+
+    @classmethod
+    def fit_many(cls, Xs, ys, n_jobs=-1, **kwargs):
+        """
+        Fit one independent trend model per (X, y) pair, in parallel threads
+
+        Args:
+            Xs: List of (n_samples, n_features) arrays, e.g. one per product
+            ys: List of matching targets
+            n_jobs: Threads to use (-1 for one per core)
+            **kwargs: Constructor arguments shared by every model
+
+        Returns:
+            List of fitted TrendPredictor, in the order of Xs
+        """
+        # Each fit is a small least-squares solve in LAPACK, which releases
+        # the GIL, so threads avoid the cost of shipping data to processes
+        return Parallel(n_jobs=n_jobs, prefer='threads')(
+            delayed(_fit_predictor)(cls, X, y, kwargs) for X, y in zip(Xs, ys)
+        )
+
     def predict(self, X):
         return self.model.predict(X)
 
@@ -16,4 +77,10 @@ class TrendPredictor:
         joblib.dump(self.model, path)
 
     def load(self, path):
-        self.model = joblib.load(path) 
\ No newline at end of file
+        self.model = joblib.load(path) 
+
+def _fit_predictor(cls, X, y, kwargs):
+    """Build and fit a single trend model"""
+    predictor = cls(**kwargs)
+    predictor.fit(X, y)
+    return predictor
@@ -1,17 +1,219 @@
+import io
 import os
+import mmap
+import pickle
 import shutil
+import sqlite3
+import threading
 import joblib
-import json
 import logging
+import orjson
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any, Tuple
 from pathlib import Path
 import numpy as np
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+# Logging is configured by the application; importing this module leaves the root logger alone
 logger = logging.getLogger(__name__)
 
+# Metadata stays human-readable; numpy metric values and non-string keys
+# are serialized as they are
+METADATA_JSON_OPTIONS = orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+METADATA_DB_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+# One row per version in metadata.db, holding the whole metadata document
+# and, separately, its performance metrics for SQL lookups
+METADATA_DB_SCHEMA = """
+CREATE TABLE IF NOT EXISTS versions (
+    model_type TEXT NOT NULL,
+    version_id TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    metadata_json TEXT NOT NULL,
+    metrics_json TEXT NOT NULL,
+    PRIMARY KEY (model_type, version_id)
+);
+CREATE INDEX IF NOT EXISTS versions_by_created_at ON versions (model_type, created_at DESC);
+"""
+
+# Model files are pickled with protocol 5 and their contiguous array buffers
+# are written out of band to a "<model file>.buf" sidecar, each starting at a
+# multiple of this many bytes
+BUFFER_ALIGNMENT = 64
+
+# Legacy metadata files are read on a thread pool once there are more than
+# this many; file reads release the GIL, so on a networked filesystem the
+# round trips overlap instead of adding up
+PARALLEL_READ_THRESHOLD = 16
+PARALLEL_READ_WORKERS = 16
+
+# Model files in the out-of-band format end in MODEL_SUFFIX and start with
+# OUT_OF_BAND_MAGIC; joblib cannot read them. Versions saved before it are
+# plain joblib files ending in LEGACY_MODEL_SUFFIX
+MODEL_SUFFIX = ".pkl"
+LEGACY_MODEL_SUFFIX = ".joblib"
+OUT_OF_BAND_MAGIC = b"version-manager/out-of-band/1"
+
+# mmap access for each joblib-style mmap_mode accepted by load_model
+MMAP_ACCESS = {'r': mmap.ACCESS_READ, 'c': mmap.ACCESS_COPY, 'r+': mmap.ACCESS_WRITE, 'w+': mmap.ACCESS_WRITE}
+
+def _buffer_path(model_path: Path) -> Path:
+    """Sidecar file holding the out-of-band array buffers of a model file"""
+    return model_path.with_name(model_path.name + ".buf")
+
+def _split_model_name(name: str) -> Optional[Tuple[str, str]]:
+    """(model_type, version_id) of a model file name in either format; None for other files"""
+    for suffix in (MODEL_SUFFIX, LEGACY_MODEL_SUFFIX):
+        if name.endswith(suffix) and '_' in name:
+            model_type, version_id = name[:-len(suffix)].split('_', 1)
+            return model_type, version_id
+    return None
+
+def _is_out_of_band_header(obj: Any) -> bool:
+    """Whether obj is the (spans, payload) header of an out-of-band model file without its magic"""
+    return (isinstance(obj, tuple) and len(obj) == 2
+            and isinstance(obj[0], list) and isinstance(obj[1], bytes))
+
+def _dump_out_of_band(model: Any, model_path: Path):
+    """
+    Pickle model with protocol 5, writing its array buffers to the sidecar
+    
+    The pickler hands every contiguous numpy buffer to buffer_callback instead
+    of copying it into the stream, so arrays are written to disk straight from
+    their memory. The model file holds OUT_OF_BAND_MAGIC, the (offset, length)
+    of each buffer in the sidecar and the remaining, small, pickle payload
+    """
+    buffers = []
+    payload = io.BytesIO()
+    pickle.dump(model, payload, protocol=5, buffer_callback=buffers.append)
+    
+    # Both files are written under temporary names and renamed into place,
+    # so a process that has the previous sidecar mapped keeps its pages
+    buffer_path = _buffer_path(model_path)
+    tmp_buffer_path = buffer_path.with_suffix(buffer_path.suffix + f".tmp.{os.getpid()}")
+    tmp_model_path = model_path.with_suffix(model_path.suffix + f".tmp.{os.getpid()}")
+    try:
+        spans = []
+        offset = 0
+        with open(tmp_buffer_path, 'wb') as f:
+            for buffer in buffers:
+                raw = buffer.raw()
+                padding = -offset % BUFFER_ALIGNMENT
+                f.write(b'\0' * padding)
+                offset += padding
+                f.write(raw)
+                spans.append((offset, raw.nbytes))
+                offset += raw.nbytes
+            f.flush()
+            os.fsync(f.fileno())
+        
+        with open(tmp_model_path, 'wb') as f:
+            pickle.dump((OUT_OF_BAND_MAGIC, spans, payload.getvalue()), f, protocol=5)
+            f.flush()
+            os.fsync(f.fileno())
+        
+        # The sidecar goes first, so the model file never names missing buffers
+        os.replace(tmp_buffer_path, buffer_path)
+        os.replace(tmp_model_path, model_path)
+    except BaseException:
+        tmp_buffer_path.unlink(missing_ok=True)
+        tmp_model_path.unlink(missing_ok=True)
+        raise
+
+def _load_out_of_band(model_path: Path, mmap_mode: Optional[str]) -> Any:
+    """
+    Load a model written by _dump_out_of_band
+    
+    With an mmap_mode the arrays are views of a single mapping of the sidecar,
+    so loading copies nothing and processes share the pages; otherwise the
+    sidecar is read into one writable buffer
+    
+    Raises:
+        ValueError: If model_path is not an out-of-band model file
+        FileNotFoundError: If the sidecar holding its buffers is missing
+    """
+    with open(model_path, 'rb') as f:
+        header = pickle.load(f)
+    if isinstance(header, tuple) and len(header) == 3 and header[0] == OUT_OF_BAND_MAGIC:
+        _, spans, payload = header
+    elif _is_out_of_band_header(header):
+        # Written before the header carried the magic
+        spans, payload = header
+    else:
+        raise ValueError(f"{model_path} is not an out-of-band model file")
+    
+    buffer_path = _buffer_path(model_path)
+    if spans and not buffer_path.exists():
+        raise FileNotFoundError(f"Buffer file {buffer_path} of {model_path} is missing")
+    
+    # An empty sidecar (no buffers, or only empty arrays) cannot be mapped
+    data = memoryview(b'')
+    if any(length for _, length in spans):
+        with open(buffer_path, 'rb') as f:
+            if mmap_mode is None:
+                data = memoryview(bytearray(f.read()))
+            else:
+                mapping = mmap.mmap(f.fileno(), 0, access=MMAP_ACCESS[mmap_mode])
+                # Read ahead now rather than faulting pages in on first inference
+                if hasattr(mmap, 'MADV_WILLNEED'):
+                    mapping.madvise(mmap.MADV_WILLNEED)
+                data = memoryview(mapping)
+    return pickle.loads(payload, buffers=[data[start:start + length] for start, length in spans])
+
+@dataclass(slots=True)
+class VersionRef:
+    """A listed model version whose metadata document is only parsed when first accessed"""
+    model_type: str
+    version_id: str
+    created_at: datetime
+    _metadata_json: Optional[str] = None
+    _metadata: Optional[Dict] = None
+
+    @classmethod
+    def parsed(cls, metadata: Dict) -> 'VersionRef':
+        """Reference to metadata that is already a dictionary"""
+        return cls(metadata["model_type"], metadata["version_id"],
+                   datetime.fromisoformat(metadata["created_at"]), _metadata=metadata)
+
+    @property
+    def metadata(self) -> Dict:
+        if self._metadata is None:
+            self._metadata = orjson.loads(self._metadata_json)
+        return self._metadata
+
+def _prefault_memmaps(obj: Any, max_depth: int = 8) -> int:
+    """
+    Ask the kernel to read ahead every memory-mapped array reachable from obj
+    
+    joblib maps arrays lazily, so without this the first predictions after a
+    load stall on page faults. Walks dicts, lists, tuples and instance
+    attributes, and returns the number of mappings advised
+    """
+    if not hasattr(mmap, 'MADV_WILLNEED'):
+        return 0
+    seen = set()
+    advised = set()
+    stack = [(obj, 0)]
+    while stack:
+        item, depth = stack.pop()
+        if id(item) in seen or depth > max_depth:
+            continue
+        seen.add(id(item))
+        if isinstance(item, np.ndarray):
+            mapping = getattr(item, '_mmap', None)
+            if mapping is not None and id(mapping) not in advised:
+                mapping.madvise(mmap.MADV_WILLNEED)
+                advised.add(id(mapping))
+        elif isinstance(item, dict):
+            stack.extend((value, depth + 1) for value in item.values())
+        elif isinstance(item, (list, tuple)):
+            stack.extend((value, depth + 1) for value in item)
+        elif hasattr(item, '__dict__'):
+            stack.extend((value, depth + 1) for value in vars(item).values())
+    return len(advised)
+
 class ModelVersionManager:
     def __init__(self, base_model_dir: str = "models", max_versions: int = 10, retention_days: int = 30):
         """
@@ -33,24 +235,171 @@ class ModelVersionManager:
         self.metadata_dir = self.base_model_dir / "metadata"
         self.metadata_dir.mkdir(exist_ok=True)
         
+        # Version metadata lives in one SQLite database instead of being
+        # parsed from a JSON file per version on every query. The JSON files
+        # are still written for older checkouts, and versions that only have
+        # one are imported into the database when first listed
+        self.metadata_db_path = self.base_model_dir / "metadata.db"
+        self._db_connection: Optional[sqlite3.Connection] = None
+        self._db_pid: Optional[int] = None
+        self._db_lock = threading.Lock()
+        with self._db_lock:
+            self._db().executescript(METADATA_DB_SCHEMA)
+        
+        # Version references per model type, with the storage stamp they were read at
+        self._versions_cache: Dict[str, Tuple[Tuple[int, int], List[VersionRef]]] = {}
+        
         logger.info(f"Model Version Manager initialized with base dir: {self.base_model_dir}")
 
-    def _generate_version_id(self) -> str:
-        """Generate a timestamp-based version ID"""
-        return datetime.now().strftime("%Y%m%d_%H%M%S")
+    def _generate_version_id(self, model_type: str) -> str:
+        """Generate a timestamp-based version ID not yet used by model_type"""
+        # Microseconds keep saves within the same second apart
+        while True:
+            version_id = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+            if self._find_model_path(model_type, version_id) is None:
+                return version_id
 
     def _get_model_path(self, model_type: str, version_id: str) -> Path:
-        """Get the path for a specific model version"""
-        return self.versions_dir / f"{model_type}_{version_id}.joblib"
+        """Get the path new versions are saved to"""
+        return self.versions_dir / f"{model_type}_{version_id}{MODEL_SUFFIX}"
+
+    def _find_model_path(self, model_type: str, version_id: str) -> Optional[Path]:
+        """Path of an existing model version in either format; None if it does not exist"""
+        for suffix in (MODEL_SUFFIX, LEGACY_MODEL_SUFFIX):
+            model_path = self.versions_dir / f"{model_type}_{version_id}{suffix}"
+            if model_path.exists():
+                return model_path
+        return None
 
     def _get_metadata_path(self, model_type: str, version_id: str) -> Path:
         """Get the path for model metadata"""
         return self.metadata_dir / f"{model_type}_{version_id}_metadata.json"
 
     def _get_current_version_path(self, model_type: str) -> Path:
-        """Get the path for the current version symlink"""
+        """Get the path for the legacy current version symlink"""
         return self.base_model_dir / f"{model_type}_current.joblib"
 
+    def _get_current_pointer_path(self, model_type: str) -> Path:
+        """Get the path for the current version pointer file"""
+        return self.base_model_dir / f"{model_type}_current.json"
+
+    def _current_version_id(self, model_type: str) -> Optional[str]:
+        """
+        Version id of the current version; None if there is none
+        
+        Read from the {type}_current.json pointer, or from the symlink that
+        versions saved before the pointer file existed still use
+        """
+        try:
+            filename = orjson.loads(self._get_current_pointer_path(model_type).read_bytes())["current"]
+        except FileNotFoundError:
+            try:
+                filename = os.readlink(self._get_current_version_path(model_type))
+            except OSError:
+                return None
+        return Path(filename).stem.split('_', 1)[1]
+
+    def _set_current_version(self, model_type: str, version_id: str):
+        """Point the current version of a model type at version_id with one atomic replace"""
+        model_path = self._get_model_path(model_type, version_id)
+        self._replace_file(self._get_current_pointer_path(model_type), orjson.dumps({"current": model_path.name}))
+        
+        # A legacy symlink would otherwise outlive the version it points to
+        current_path = self._get_current_version_path(model_type)
+        if current_path.is_symlink():
+            current_path.unlink()
+
+    def _db(self) -> sqlite3.Connection:
+        """Connection to metadata.db, opened again after a fork; callers hold _db_lock"""
+        if self._db_connection is None or self._db_pid != os.getpid():
+            connection = sqlite3.connect(self.metadata_db_path, isolation_level=None,
+                                         check_same_thread=False, timeout=30)
+            # Readers in other worker processes never block the writer
+            connection.execute("PRAGMA journal_mode=WAL")
+            self._db_connection, self._db_pid = connection, os.getpid()
+        return self._db_connection
+
+    def _store_metadata(self, *documents: Dict):
+        """Insert or replace the metadata rows of the given versions in one transaction"""
+        rows = [(document["model_type"], document["version_id"], document["created_at"],
+                 orjson.dumps(document, option=METADATA_DB_OPTIONS).decode(),
+                 orjson.dumps(document.get("performance_metrics", {}), option=METADATA_DB_OPTIONS).decode())
+                for document in documents]
+        with self._db_lock:
+            db = self._db()
+            db.execute("BEGIN")
+            with db:
+                db.executemany("INSERT OR REPLACE INTO versions VALUES (?, ?, ?, ?, ?)", rows)
+
+    def _fetch_metadata(self, model_type: str, version_id: str) -> Optional[Dict]:
+        """Metadata of one version from metadata.db, or from its JSON file if it predates the database"""
+        with self._db_lock:
+            row = self._db().execute(
+                "SELECT metadata_json FROM versions WHERE model_type = ? AND version_id = ?",
+                (model_type, version_id)
+            ).fetchone()
+        if row is not None:
+            return orjson.loads(row[0])
+        metadata_path = self._get_metadata_path(model_type, version_id)
+        if metadata_path.exists():
+            return self._read_metadata(metadata_path)
+        return None
+
+    def _storage_stamp(self) -> Tuple[int, int]:
+        """
+        Modification time of the versions directory and metadata.db's data_version
+        
+        The first changes whenever a model file is added or removed, the second
+        whenever another connection, e.g. in another worker process, commits
+        to metadata.db. Changes made through this instance invalidate the
+        cache explicitly
+        """
+        with self._db_lock:
+            data_version = self._db().execute("PRAGMA data_version").fetchone()[0]
+        return (os.stat(self.versions_dir).st_mtime_ns, data_version)
+
+    def _invalidate_versions(self, model_type: str):
+        """Drop the cached version list of a model type after changing its files"""
+        self._versions_cache.pop(model_type, None)
+
+    @staticmethod
+    def _read_metadata(metadata_path: Path) -> Dict:
+        """Parse a metadata file straight from its bytes with orjson"""
+        return orjson.loads(metadata_path.read_bytes())
+
+    @classmethod
+    def _write_metadata(cls, metadata_path: Path, metadata: Dict):
+        """Serialize metadata with orjson and replace the file atomically"""
+        cls._replace_file(metadata_path, orjson.dumps(metadata, option=METADATA_JSON_OPTIONS))
+
+    @staticmethod
+    def _replace_file(path: Path, data: bytes):
+        """
+        Replace a file's contents atomically
+        
+        The bytes go to a temporary file that is synced and then renamed over
+        the target, so a concurrent reader or a crash mid-write never sees a
+        truncated file
+        """
+        tmp_path = path.with_suffix(path.suffix + f".tmp.{os.getpid()}")
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+        except BaseException:
+            tmp_path.unlink(missing_ok=True)
+            raise
+        
+        # Persist the rename itself
+        if os.name == 'posix':
+            dir_fd = os.open(path.parent, os.O_RDONLY)
+            try:
+                getattr(os, 'fdatasync', os.fsync)(dir_fd)
+            finally:
+                os.close(dir_fd)
+
     def save_model(self, model: Any, model_type: str, metadata: Optional[Dict] = None, 
                    performance_metrics: Optional[Dict] = None) -> str:
         """
@@ -66,13 +415,13 @@ class ModelVersionManager:
             version_id: The version ID of the saved model
         """
         try:
-            version_id = self._generate_version_id()
+            version_id = self._generate_version_id(model_type)
             model_path = self._get_model_path(model_type, version_id)
             metadata_path = self._get_metadata_path(model_type, version_id)
-            current_path = self._get_current_version_path(model_type)
             
-            # Save the model
-            joblib.dump(model, model_path)
+            # Save the model with its arrays out of band, which load_model
+            # memory-maps as a whole
+            _dump_out_of_band(model, model_path)
             logger.info(f"Saved {model_type} model version {version_id} to {model_path}")
             
             # Prepare metadata
@@ -86,16 +435,12 @@ class ModelVersionManager:
             }
             
             # Save metadata
-            with open(metadata_path, 'w') as f:
-                json.dump(model_metadata, f, indent=2)
-            
-            # Update current version symlink
-            if current_path.exists() or current_path.is_symlink():
-                current_path.unlink()
+            self._write_metadata(metadata_path, model_metadata)
+            self._store_metadata(model_metadata)
+            self._invalidate_versions(model_type)
             
-            # Create relative symlink
-            relative_path = os.path.relpath(model_path, self.base_model_dir)
-            current_path.symlink_to(relative_path)
+            # Update current version pointer
+            self._set_current_version(model_type, version_id)
             
             logger.info(f"Updated current {model_type} model to version {version_id}")
             
@@ -108,13 +453,18 @@ class ModelVersionManager:
             logger.error(f"Error saving {model_type} model: {e}")
             raise
 
-    def load_model(self, model_type: str, version_id: Optional[str] = None) -> Tuple[Any, Dict]:
+    def load_model(self, model_type: str, version_id: Optional[str] = None,
+                   mmap_mode: Optional[str] = 'r') -> Tuple[Any, Dict]:
         """
         Load a model by type and version
         
         Args:
             model_type: Type of model to load
             version_id: Specific version to load (None for current)
+            mmap_mode: Memory-map mode for the model's numpy arrays ('r', 'c',
+                'r+' or 'w+' as in joblib); the default 'r' maps them read-only
+                from the page cache, so workers loading the same version share
+                its memory. None copies them
             
         Returns:
             Tuple of (model, metadata)
@@ -122,27 +472,30 @@ class ModelVersionManager:
         try:
             if version_id is None:
                 # Load current version
-                current_path = self._get_current_version_path(model_type)
-                if not current_path.exists():
+                version_id = self._current_version_id(model_type)
+                if version_id is None:
                     raise FileNotFoundError(f"No current version found for {model_type} model")
-                
-                model_path = current_path.resolve()
-                # Extract version_id from filename
-                version_id = model_path.stem.split('_', 1)[1]
-            else:
-                model_path = self._get_model_path(model_type, version_id)
-                if not model_path.exists():
-                    raise FileNotFoundError(f"Model version {version_id} not found for {model_type}")
             
-            # Load model
-            model = joblib.load(model_path)
+            model_path = self._find_model_path(model_type, version_id)
+            if model_path is None:
+                raise FileNotFoundError(f"Model version {version_id} not found for {model_type}")
+            
+            # Load model; versions saved before the out-of-band format are
+            # plain joblib files, whose mapped arrays are prefetched so the
+            # first inference does not fault them in page by page. Early
+            # out-of-band files still carry the joblib suffix and are told
+            # apart by their sidecar or, if it was lost, by their header
+            if model_path.suffix == MODEL_SUFFIX or _buffer_path(model_path).exists():
+                model = _load_out_of_band(model_path, mmap_mode)
+            else:
+                model = joblib.load(model_path, mmap_mode=mmap_mode)
+                if _is_out_of_band_header(model):
+                    raise FileNotFoundError(f"Buffer file of {model_path} is missing")
+                if mmap_mode is not None:
+                    _prefault_memmaps(model)
             
             # Load metadata
-            metadata_path = self._get_metadata_path(model_type, version_id)
-            metadata = {}
-            if metadata_path.exists():
-                with open(metadata_path, 'r') as f:
-                    metadata = json.load(f)
+            metadata = self._fetch_metadata(model_type, version_id) or {}
             
             logger.info(f"Loaded {model_type} model version {version_id}")
             return model, metadata
@@ -162,43 +515,85 @@ class ModelVersionManager:
             List of version metadata dictionaries
         """
         try:
-            versions = []
-            
-            # Find all model files for this type
-            pattern = f"{model_type}_*.joblib"
-            model_files = list(self.versions_dir.glob(pattern))
-            
-            for model_file in model_files:
-                # Extract version_id from filename
-                version_id = model_file.stem.split('_', 1)[1]
-                
-                # Load metadata if available
-                metadata_path = self._get_metadata_path(model_type, version_id)
-                if metadata_path.exists():
-                    with open(metadata_path, 'r') as f:
-                        metadata = json.load(f)
-                    versions.append(metadata)
-                else:
-                    # Create basic metadata if file exists but metadata doesn't
-                    basic_metadata = {
-                        "model_type": model_type,
-                        "version_id": version_id,
-                        "created_at": datetime.fromtimestamp(model_file.stat().st_mtime).isoformat(),
-                        "model_path": str(model_file),
-                        "performance_metrics": {},
-                        "metadata": {}
-                    }
-                    versions.append(basic_metadata)
-            
-            # Sort by creation time (newest first)
-            versions.sort(key=lambda x: x["created_at"], reverse=True)
-            
-            return versions
+            return [ref.metadata for ref in self._version_refs(model_type)]
             
         except Exception as e:
             logger.error(f"Error listing versions for {model_type}: {e}")
             return []
 
+    def _version_refs(self, model_type: str) -> List[VersionRef]:
+        """
+        Versions of a model type, newest first, as references whose metadata is parsed on first access
+        
+        Only the version ids and creation times are read up front, so cleanup
+        and the best-version lookup never parse a metadata document
+        """
+        # Reuse the listing while neither the model files nor the database
+        # have changed, including changes made by other worker processes
+        stamp = self._storage_stamp()
+        cached = self._versions_cache.get(model_type)
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+        
+        # Find all model files for this type, keyed by version_id
+        prefix = f"{model_type}_"
+        with os.scandir(self.versions_dir) as entries:
+            model_entries = {}
+            for entry in entries:
+                name = _split_model_name(entry.name) if entry.name.startswith(prefix) else None
+                if name is not None and name[0] == model_type:
+                    model_entries[name[1]] = entry
+        
+        # All stored versions of the type in one query, already newest first
+        # straight from the primary key index; the metadata documents stay unparsed
+        with self._db_lock:
+            rows = self._db().execute(
+                "SELECT version_id, created_at, metadata_json FROM versions WHERE model_type = ? "
+                "ORDER BY version_id DESC",
+                (model_type,)
+            ).fetchall()
+        refs = [VersionRef(model_type, version_id, datetime.fromisoformat(created_at), metadata_json)
+                for version_id, created_at, metadata_json in rows if version_id in model_entries]
+        stored = {version_id for version_id, _, _ in rows}
+        
+        # Versions saved before metadata.db only have a JSON file; import them once
+        legacy = [version_id for version_id in model_entries if version_id not in stored]
+        if legacy:
+            with os.scandir(self.metadata_dir) as entries:
+                metadata_names = {entry.name for entry in entries if entry.name.startswith(prefix)}
+            metadata_paths = [self._get_metadata_path(model_type, version_id) for version_id in legacy]
+            metadata_paths = [path for path in metadata_paths if path.name in metadata_names]
+            if len(metadata_paths) > PARALLEL_READ_THRESHOLD:
+                with ThreadPoolExecutor(max_workers=PARALLEL_READ_WORKERS, thread_name_prefix='metadata') as executor:
+                    imported = list(executor.map(self._read_metadata, metadata_paths))
+            else:
+                imported = [self._read_metadata(path) for path in metadata_paths]
+            if imported:
+                self._store_metadata(*imported)
+                stored.update(metadata["version_id"] for metadata in imported)
+                refs.extend(VersionRef.parsed(metadata) for metadata in imported)
+        
+        for version_id, entry in model_entries.items():
+            if version_id not in stored:
+                # Create basic metadata if file exists but metadata doesn't
+                basic_metadata = {
+                    "model_type": model_type,
+                    "version_id": version_id,
+                    "created_at": datetime.fromtimestamp(entry.stat(follow_symlinks=False).st_mtime).isoformat(),
+                    "model_path": str(self.versions_dir / entry.name),
+                    "performance_metrics": {},
+                    "metadata": {}
+                }
+                refs.append(VersionRef.parsed(basic_metadata))
+        
+        # Sort newest first; version ids are fixed-width YYYYMMDD_HHMMSS
+        # timestamps, so they order like their creation times. Only imported
+        # and basic entries can be out of order
+        refs.sort(key=lambda ref: ref.version_id, reverse=True)
+        
+        self._versions_cache[model_type] = (stamp, refs)
+        return refs
+
     def rollback_model(self, model_type: str, version_id: str) -> bool:
         """
         Rollback to a specific model version
@@ -211,20 +606,13 @@ class ModelVersionManager:
             True if successful, False otherwise
         """
         try:
-            model_path = self._get_model_path(model_type, version_id)
-            if not model_path.exists():
+            if self._find_model_path(model_type, version_id) is None:
                 logger.error(f"Cannot rollback: version {version_id} not found for {model_type}")
                 return False
             
-            current_path = self._get_current_version_path(model_type)
-            
-            # Remove current symlink
-            if current_path.exists() or current_path.is_symlink():
-                current_path.unlink()
-            
-            # Create new symlink to the specified version
-            relative_path = os.path.relpath(model_path, self.base_model_dir)
-            current_path.symlink_to(relative_path)
+            # Point the current version at the specified version
+            self._set_current_version(model_type, version_id)
+            self._invalidate_versions(model_type)
             
             logger.info(f"Rolled back {model_type} model to version {version_id}")
             return True
@@ -245,18 +633,18 @@ class ModelVersionManager:
             True if successful, False otherwise
         """
         try:
-            model_path = self._get_model_path(model_type, version_id)
+            model_path = self._find_model_path(model_type, version_id)
             metadata_path = self._get_metadata_path(model_type, version_id)
             
             # Check if this is the current version
-            current_path = self._get_current_version_path(model_type)
-            if current_path.exists() and current_path.resolve() == model_path.resolve():
+            if version_id == self._current_version_id(model_type):
                 logger.error(f"Cannot delete current version {version_id} of {model_type} model")
                 return False
             
             # Delete model file
-            if model_path.exists():
+            if model_path is not None:
                 model_path.unlink()
+                _buffer_path(model_path).unlink(missing_ok=True)
                 logger.info(f"Deleted model file: {model_path}")
             
             # Delete metadata file
@@ -264,6 +652,11 @@ class ModelVersionManager:
                 metadata_path.unlink()
                 logger.info(f"Deleted metadata file: {metadata_path}")
             
+            with self._db_lock:
+                self._db().execute("DELETE FROM versions WHERE model_type = ? AND version_id = ?",
+                                   (model_type, version_id))
+            
+            self._invalidate_versions(model_type)
             return True
             
         except Exception as e:
@@ -273,24 +666,29 @@ class ModelVersionManager:
     def _cleanup_old_versions(self, model_type: str):
         """Clean up old versions based on retention policy"""
         try:
-            versions = self.list_versions(model_type)
+            versions = self._version_refs(model_type)
             
-            # Remove versions beyond max_versions limit
-            if len(versions) > self.max_versions:
-                versions_to_delete = versions[self.max_versions:]
-                for version_metadata in versions_to_delete:
-                    version_id = version_metadata["version_id"]
-                    logger.info(f"Cleaning up old version {version_id} of {model_type} (max versions exceeded)")
-                    self.delete_version(model_type, version_id)
+            # The current version is never deleted, so it is skipped up front
+            # instead of being rejected by delete_version on every cleanup
+            current_version = self._current_version_id(model_type)
             
-            # Remove versions older than retention_days
+            # Collect the versions beyond max_versions and those older than
+            # retention_days in one pass, so each is deleted once even when
+            # both limits apply (versions are sorted newest first)
             cutoff_date = datetime.now() - timedelta(days=self.retention_days)
-            for version_metadata in versions:
-                created_at = datetime.fromisoformat(version_metadata["created_at"])
-                if created_at < cutoff_date:
-                    version_id = version_metadata["version_id"]
-                    logger.info(f"Cleaning up old version {version_id} of {model_type} (retention period exceeded)")
-                    self.delete_version(model_type, version_id)
+            victims = {}
+            for position, ref in enumerate(versions):
+                version_id = ref.version_id
+                if version_id == current_version:
+                    continue
+                if position >= self.max_versions:
+                    victims[version_id] = "max versions exceeded"
+                elif ref.created_at < cutoff_date:
+                    victims[version_id] = "retention period exceeded"
+            
+            for version_id, reason in victims.items():
+                logger.info(f"Cleaning up old version {version_id} of {model_type} ({reason})")
+                self.delete_version(model_type, version_id)
             
         except Exception as e:
             logger.error(f"Error during cleanup for {model_type}: {e}")
@@ -309,23 +707,21 @@ class ModelVersionManager:
             True if successful, False otherwise
         """
         try:
-            metadata_path = self._get_metadata_path(model_type, version_id)
-            
-            if not metadata_path.exists():
+            # Load existing metadata
+            metadata = self._fetch_metadata(model_type, version_id)
+            if metadata is None:
                 logger.error(f"Metadata not found for {model_type} version {version_id}")
                 return False
             
-            # Load existing metadata
-            with open(metadata_path, 'r') as f:
-                metadata = json.load(f)
-            
             # Update performance metrics
             metadata["performance_metrics"].update(performance_metrics)
             metadata["last_updated"] = datetime.now().isoformat()
             
-            # Save updated metadata
-            with open(metadata_path, 'w') as f:
-                json.dump(metadata, f, indent=2)
+            # Save updated metadata; other processes notice the commit through
+            # data_version, this one drops its cache explicitly
+            self._write_metadata(self._get_metadata_path(model_type, version_id), metadata)
+            self._store_metadata(metadata)
+            self._invalidate_versions(model_type)
             
             logger.info(f"Updated performance metrics for {model_type} version {version_id}")
             return True
@@ -346,18 +742,25 @@ class ModelVersionManager:
             Version ID of the best performing model, or None if not found
         """
         try:
-            versions = self.list_versions(model_type)
-            
             best_version = None
-            best_score = -float('inf')
-            
-            for version_metadata in versions:
-                performance_metrics = version_metadata.get("performance_metrics", {})
-                if metric in performance_metrics:
-                    score = performance_metrics[metric]
-                    if score > best_score:
-                        best_score = score
-                        best_version = version_metadata["version_id"]
+            best_score = None
+            
+            # Listing imports versions that only have a JSON file, and gives
+            # the versions whose model file still exists
+            existing = {ref.version_id for ref in self._version_refs(model_type)}
+            
+            # Numeric scores of the metric, best first and newest on ties
+            with self._db_lock:
+                candidates = self._db().execute(
+                    "SELECT v.version_id, m.value FROM versions AS v, json_each(v.metrics_json) AS m "
+                    "WHERE v.model_type = ? AND m.key = ? AND m.type IN ('integer', 'real') "
+                    "ORDER BY m.value DESC, v.version_id DESC",
+                    (model_type, metric)
+                )
+                for version_id, score in candidates:
+                    if version_id in existing:
+                        best_version, best_score = version_id, score
+                        break
             
             if best_version:
                 logger.info(f"Best performing {model_type} version for {metric}: {best_version} (score: {best_score})")
@@ -391,13 +794,15 @@ class ModelVersionManager:
                 return False
             
             current_score = current_metrics[threshold_metric]
-            versions = self.list_versions(model_type)
+            versions = self._version_refs(model_type)
             
-            # Find the previous version with performance data
+            # Find the previous version with performance data; only the
+            # versions up to it have their metadata parsed
             previous_version = None
             previous_score = None
             
-            for version_metadata in versions[1:]:  # Skip current version (index 0)
+            for ref in versions[1:]:  # Skip current version (index 0)
+                version_metadata = ref.metadata
                 performance_metrics = version_metadata.get("performance_metrics", {})
                 if threshold_metric in performance_metrics:
                     previous_version = version_metadata["version_id"]
@@ -434,27 +839,28 @@ class ModelVersionManager:
         try:
             summary = {}
             
-            # Find all unique model types
-            model_types = set()
-            for model_file in self.versions_dir.glob("*.joblib"):
-                model_type = model_file.stem.split('_')[0]
-                model_types.add(model_type)
-            
-            for model_type in model_types:
-                versions = self.list_versions(model_type)
-                current_path = self._get_current_version_path(model_type)
-                current_version = None
-                
-                if current_path.exists():
-                    current_model_path = current_path.resolve()
-                    current_version = current_model_path.stem.split('_', 1)[1]
+            # Group the version ids of all model types in one directory read;
+            # the summary needs no metadata, so nothing else is opened
+            versions_by_type = defaultdict(list)
+            with os.scandir(self.versions_dir) as entries:
+                for entry in entries:
+                    name = _split_model_name(entry.name)
+                    if name is not None:
+                        model_type, version_id = name
+                        versions_by_type[model_type].append(version_id)
+            
+            for model_type, versions in versions_by_type.items():
+                # Version ids are %Y%m%d_%H%M%S timestamps, with _%f
+                # microseconds since, so newest first is reverse string order
+                versions.sort(reverse=True)
+                current_version = self._current_version_id(model_type)
                 
                 summary[model_type] = {
                     "total_versions": len(versions),
                     "current_version": current_version,
-                    "latest_version": versions[0]["version_id"] if versions else None,
-                    "oldest_version": versions[-1]["version_id"] if versions else None,
-                    "versions": [v["version_id"] for v in versions]
+                    "latest_version": versions[0],
+                    "oldest_version": versions[-1],
+                    "versions": versions
                 }
             
             return summary
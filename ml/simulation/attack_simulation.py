@@ -1,61 +1,120 @@
-import requests
+import argparse
+import asyncio
+import sys
 import time
+import httpx
 
 API_URL = 'http://localhost:8080/log-request'
 
+# One connection pool for the whole run: at most 64 connections open at once,
+# 16 of them kept alive between requests
+CLIENT_LIMITS = httpx.Limits(max_connections=64, max_keepalive_connections=16)
+# Seconds before a request to an unresponsive server is reported as an error
+REQUEST_TIMEOUT = 5
 
-def send_request(ip=None, headers=None):
-    session = requests.Session()
+
+class RateLimiter:
+    """Token bucket of one token: each request reserves the next free slot, at most rate per second"""
+    def __init__(self, rate):
+        self.interval = 1 / rate
+        self.next_slot = time.monotonic()
+
+    async def wait(self):
+        now = time.monotonic()
+        slot = max(self.next_slot, now)
+        self.next_slot = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+# Set by --rate; None sends as fast as the server answers
+rate_limiter = None
+
+# Report lines are buffered and written once per simulation step instead of
+# one print() per response
+_report_lines = []
+
+def report(line):
+    _report_lines.append(line)
+
+def flush_report():
+    if _report_lines:
+        sys.stdout.write("\n".join(_report_lines) + "\n")
+        sys.stdout.flush()
+        _report_lines.clear()
+
+
+async def send_request(client, ip=None, headers=None):
+    # Headers are passed per request; the client and its keep-alive
+    # connections are shared by every simulated IP
+    request_headers = {}
     if ip:
-        session.headers.update({'X-Forwarded-For': ip})
+        request_headers['X-Forwarded-For'] = ip
     if headers:
-        session.headers.update(headers)
+        request_headers.update(headers)
+    if rate_limiter is not None:
+        await rate_limiter.wait()
     try:
-        resp = session.post(API_URL)
-        print(f"Request from {ip or 'default'}: {resp.status_code} {resp.text}")
+        resp = await client.post(API_URL, headers=request_headers)
+        report(f"Request from {ip or 'default'}: {resp.status_code} {resp.text}")
         return resp
     except Exception as e:
-        print(f"Error for {ip}: {e}")
+        report(f"Error for {ip}: {e}")
         return None
 
-def simulate_normal():
-    print("--- Normal Requests ---")
-    for i in range(3):
-        send_request(ip=f"10.0.0.{i+1}")
-        time.sleep(1)
+async def send_burst(client, count, ip=None, headers=None):
+    """Send count requests at once, so the load is bounded by the server rather than by the simulator"""
+    return await asyncio.gather(*[send_request(client, ip=ip, headers=headers) for _ in range(count)])
 
-def simulate_rapid():
-    print("--- Rapid Requests (Potential Anomaly) ---")
+async def simulate_normal(client):
+    report("--- Normal Requests ---")
+    # One request per IP, all in flight together
+    await asyncio.gather(*[send_request(client, ip=f"10.0.0.{i+1}") for i in range(3)])
+
+async def simulate_rapid(client, burst=5):
+    report("--- Rapid Requests (Potential Anomaly) ---")
     ip = "20.0.0.1"
-    for i in range(5):
-        send_request(ip=ip)
-        time.sleep(0.1)
+    await send_burst(client, burst, ip=ip)
 
-def simulate_anomalous():
-    print("--- Anomalous Requests (Malformed) ---")
+async def simulate_anomalous(client):
+    report("--- Anomalous Requests (Malformed) ---")
     ip = "30.0.0.1"
     # Simulate strange user agent or path
-    for i in range(3):
-        send_request(ip=ip, headers={"User-Agent": "sqlmap/1.0"})
-        time.sleep(0.2)
+    await send_burst(client, 3, ip=ip, headers={"User-Agent": "sqlmap/1.0"})
 
-def test_ban():
-    print("--- Test Banned IP ---")
+async def test_ban(client):
+    report("--- Test Banned IP ---")
     ip = "40.0.0.1"
     # Simulate anomaly to trigger ban
-    send_request(ip=ip, headers={"User-Agent": "attack-bot"})
+    await send_request(client, ip=ip, headers={"User-Agent": "attack-bot"})
     # Immediately try again
-    resp = send_request(ip=ip)
+    resp = await send_request(client, ip=ip)
     if resp is not None and resp.status_code == 403:
-        print(f"IP {ip} is banned as expected.")
+        report(f"IP {ip} is banned as expected.")
     else:
-        print(f"IP {ip} is NOT banned (unexpected).")
+        report(f"IP {ip} is NOT banned (unexpected).")
+
+async def run_simulation(burst=5):
+    async with httpx.AsyncClient(limits=CLIENT_LIMITS, timeout=REQUEST_TIMEOUT) as client:
+        await simulate_normal(client)
+        flush_report()
+        await simulate_rapid(client, burst)
+        flush_report()
+        await simulate_anomalous(client)
+        flush_report()
+        await test_ban(client)
+        flush_report()
 
 def main():
-    simulate_normal()
-    simulate_rapid()
-    simulate_anomalous()
-    test_ban()
+    global rate_limiter
+    parser = argparse.ArgumentParser(description="Simulate normal and attack traffic against the backend")
+    parser.add_argument('--rate', type=float, default=None,
+                        help="Throttle to at most this many requests per second (default: unthrottled)")
+    parser.add_argument('--burst', type=int, default=5,
+                        help="Number of concurrent requests in the rapid-request burst (default: 5)")
+    args = parser.parse_args()
+    if args.rate:
+        rate_limiter = RateLimiter(args.rate)
+    asyncio.run(run_simulation(args.burst))
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
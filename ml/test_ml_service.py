@@ -4,185 +4,220 @@ Test script for ML service functionality
 """
 
 import requests
-import json
+import orjson
 import numpy as np
 from sklearn.datasets import make_classification, make_blobs
+from concurrent.futures import ThreadPoolExecutor
 import time
+import threading
 
 # Configuration
 ML_SERVICE_URL = "http://localhost:5000"
 
+def post_json(url, payload):
+    """POST payload as JSON; numpy arrays are encoded directly by orjson without tolist()"""
+    return requests.post(url, data=orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY),
+                         headers={'Content-Type': 'application/json'})
+
+# Lines reported by the test running on each thread; tests run in parallel,
+# so their output is printed only once they are done, one test at a time
+_output = threading.local()
+
+def report(line=""):
+    """Record a line of output for the running test"""
+    _output.lines.append(line)
+
+def run_test(test):
+    """Run a test, returning its result and the lines it reported"""
+    _output.lines = []
+    return test(), _output.lines
+
+def make_dataset(**kwargs):
+    """make_classification data as float32 features and int8 labels, which encode to about half the JSON of float64"""
+    X, y = make_classification(**kwargs)
+    return X.astype(np.float32), y.astype(np.int8)
+
 def test_health_check():
     """Test health check endpoint"""
-    print("Testing health check...")
+    report("Testing health check...")
     try:
         response = requests.get(f"{ML_SERVICE_URL}/health")
         if response.status_code == 200:
-            data = response.json()
-            print(f"✓ Health check passed: {data}")
+            data = orjson.loads(response.content)
+            report(f"✓ Health check passed: {data}")
             return True
         else:
-            print(f"✗ Health check failed: {response.status_code}")
+            report(f"✗ Health check failed: {response.status_code}")
             return False
     except Exception as e:
-        print(f"✗ Health check error: {e}")
+        report(f"✗ Health check error: {e}")
         return False
 
 def test_manual_logistic_regression():
     """Test manual logistic regression implementation"""
-    print("\nTesting manual logistic regression...")
+    report("\nTesting manual logistic regression...")
     try:
         # Generate synthetic data
-        X, y = make_classification(n_samples=1000, n_features=4, n_classes=2, random_state=42)
+        X, y = make_dataset(n_samples=1000, n_features=4, n_classes=2, random_state=42)
         
         # Train model
         train_data = {
-            "features": X.tolist(),
-            "labels": y.tolist(),
+            "features": X,
+            "labels": y,
             "learning_rate": 0.01,
             "n_iterations": 500,
             "regularization": "l2",
             "lambda_reg": 0.01
         }
         
-        response = requests.post(f"{ML_SERVICE_URL}/train/manual-logistic", json=train_data)
+        response = post_json(f"{ML_SERVICE_URL}/train/manual-logistic", train_data)
         if response.status_code == 200:
-            result = response.json()
-            print(f"✓ Manual logistic regression training: {result['message']}")
+            result = orjson.loads(response.content)
+            report(f"✓ Manual logistic regression training: {result['message']}")
             
             # Test prediction
             test_X = X[:10]  # Use first 10 samples for testing
-            pred_data = {"features": test_X.tolist()}
+            pred_data = {"features": test_X}
             
-            pred_response = requests.post(f"{ML_SERVICE_URL}/predict/manual-logistic", json=pred_data)
+            pred_response = post_json(f"{ML_SERVICE_URL}/predict/manual-logistic", pred_data)
             if pred_response.status_code == 200:
-                pred_result = pred_response.json()
-                print(f"✓ Manual logistic regression prediction: {len(pred_result['predictions'])} predictions made")
+                pred_result = orjson.loads(pred_response.content)
+                report(f"✓ Manual logistic regression prediction: {len(pred_result['predictions'])} predictions made")
                 return True
             else:
-                print(f"✗ Manual logistic regression prediction failed: {pred_response.status_code}")
+                report(f"✗ Manual logistic regression prediction failed: {pred_response.status_code}")
                 return False
         else:
-            print(f"✗ Manual logistic regression training failed: {response.status_code}")
+            report(f"✗ Manual logistic regression training failed: {response.status_code}")
             return False
     except Exception as e:
-        print(f"✗ Manual logistic regression error: {e}")
+        report(f"✗ Manual logistic regression error: {e}")
         return False
 
 def test_manual_decision_tree():
     """Test manual decision tree implementation"""
-    print("\nTesting manual decision tree...")
+    report("\nTesting manual decision tree...")
     try:
         # Generate synthetic data
-        X, y = make_classification(n_samples=500, n_features=4, n_classes=3, random_state=42)
+        X, y = make_dataset(n_samples=500, n_features=4, n_classes=3, random_state=42)
         
         # Train model
         train_data = {
-            "features": X.tolist(),
-            "labels": y.tolist(),
+            "features": X,
+            "labels": y,
             "max_depth": 5,
             "min_samples_split": 5,
             "criterion": "gini"
         }
         
-        response = requests.post(f"{ML_SERVICE_URL}/train/manual-tree", json=train_data)
+        response = post_json(f"{ML_SERVICE_URL}/train/manual-tree", train_data)
         if response.status_code == 200:
-            result = response.json()
-            print(f"✓ Manual decision tree training: {result['message']}")
+            result = orjson.loads(response.content)
+            report(f"✓ Manual decision tree training: {result['message']}")
             
             # Test prediction
             test_X = X[:10]  # Use first 10 samples for testing
-            pred_data = {"features": test_X.tolist()}
+            pred_data = {"features": test_X}
             
-            pred_response = requests.post(f"{ML_SERVICE_URL}/predict/manual-tree", json=pred_data)
+            pred_response = post_json(f"{ML_SERVICE_URL}/predict/manual-tree", pred_data)
             if pred_response.status_code == 200:
-                pred_result = pred_response.json()
-                print(f"✓ Manual decision tree prediction: {len(pred_result['predictions'])} predictions made")
+                pred_result = orjson.loads(pred_response.content)
+                report(f"✓ Manual decision tree prediction: {len(pred_result['predictions'])} predictions made")
                 return True
             else:
-                print(f"✗ Manual decision tree prediction failed: {pred_response.status_code}")
+                report(f"✗ Manual decision tree prediction failed: {pred_response.status_code}")
                 return False
         else:
-            print(f"✗ Manual decision tree training failed: {response.status_code}")
+            report(f"✗ Manual decision tree training failed: {response.status_code}")
             return False
     except Exception as e:
-        print(f"✗ Manual decision tree error: {e}")
+        report(f"✗ Manual decision tree error: {e}")
         return False
 
 def test_model_comparison():
     """Test model comparison functionality"""
-    print("\nTesting model comparison...")
+    report("\nTesting model comparison...")
     try:
         # Generate synthetic data
-        X, y = make_classification(n_samples=1000, n_features=4, n_classes=2, random_state=42)
+        X, y = make_dataset(n_samples=1000, n_features=4, n_classes=2, random_state=42)
         
         comparison_data = {
-            "features": X.tolist(),
-            "labels": y.tolist(),
+            "features": X,
+            "labels": y,
             "test_size": 0.2
         }
         
-        response = requests.post(f"{ML_SERVICE_URL}/compare/models", json=comparison_data)
-        if response.status_code == 200:
-            result = response.json()
-            print(f"✓ Model comparison completed")
+        response = post_json(f"{ML_SERVICE_URL}/compare/models", comparison_data)
+        if response.status_code == 202:
+            # The comparison runs in the background; poll until it finishes
+            job_id = orjson.loads(response.content)['job_id']
+            for _ in range(120):
+                job = orjson.loads(requests.get(f"{ML_SERVICE_URL}/jobs/{job_id}").content)
+                if job['status'] in ('done', 'failed'):
+                    break
+                time.sleep(0.5)
+            
+            if job['status'] != 'done':
+                report(f"✗ Model comparison job {job['status']}: {job.get('error')}")
+                return False
+            report(f"✓ Model comparison completed")
             
             # Print comparison results
-            comparison_results = result['comparison_results']
-            print(f"  Logistic Regression - Manual: {comparison_results['logistic_regression']['manual']['accuracy']:.4f}")
-            print(f"  Logistic Regression - Sklearn: {comparison_results['logistic_regression']['sklearn']['accuracy']:.4f}")
-            print(f"  Decision Tree - Manual: {comparison_results['decision_tree']['manual']['accuracy']:.4f}")
-            print(f"  Decision Tree - Sklearn: {comparison_results['decision_tree']['sklearn']['accuracy']:.4f}")
+            comparison_results = job['result']
+            report(f"  Logistic Regression - Manual: {comparison_results['logistic_regression']['manual']['accuracy']:.4f}")
+            report(f"  Logistic Regression - Sklearn: {comparison_results['logistic_regression']['sklearn']['accuracy']:.4f}")
+            report(f"  Decision Tree - Manual: {comparison_results['decision_tree']['manual']['accuracy']:.4f}")
+            report(f"  Decision Tree - Sklearn: {comparison_results['decision_tree']['sklearn']['accuracy']:.4f}")
             
             return True
         else:
-            print(f"✗ Model comparison failed: {response.status_code}")
+            report(f"✗ Model comparison failed: {response.status_code}")
             return False
     except Exception as e:
-        print(f"✗ Model comparison error: {e}")
+        report(f"✗ Model comparison error: {e}")
         return False
 
 def test_scheduler_status():
     """Test scheduler status endpoint"""
-    print("\nTesting scheduler status...")
+    report("\nTesting scheduler status...")
     try:
         response = requests.get(f"{ML_SERVICE_URL}/scheduler/status")
         if response.status_code == 200:
-            result = response.json()
-            print(f"✓ Scheduler status retrieved")
+            result = orjson.loads(response.content)
+            report(f"✓ Scheduler status retrieved")
             scheduler_status = result['scheduler_status']
-            print(f"  Scheduler running: {scheduler_status['scheduler_running']}")
-            print(f"  Number of jobs: {len(scheduler_status['jobs'])}")
+            report(f"  Scheduler running: {scheduler_status['scheduler_running']}")
+            report(f"  Number of jobs: {len(scheduler_status['jobs'])}")
             return True
         else:
-            print(f"✗ Scheduler status failed: {response.status_code}")
+            report(f"✗ Scheduler status failed: {response.status_code}")
             return False
     except Exception as e:
-        print(f"✗ Scheduler status error: {e}")
+        report(f"✗ Scheduler status error: {e}")
         return False
 
 def test_model_versions():
     """Test model versioning functionality"""
-    print("\nTesting model versioning...")
+    report("\nTesting model versioning...")
     try:
         response = requests.get(f"{ML_SERVICE_URL}/models/versions")
         if response.status_code == 200:
-            result = response.json()
-            print(f"✓ Model versions retrieved")
+            result = orjson.loads(response.content)
+            report(f"✓ Model versions retrieved")
             version_summary = result['version_summary']
             for model_type, info in version_summary.items():
-                print(f"  {model_type}: {info['total_versions']} versions, current: {info['current_version']}")
+                report(f"  {model_type}: {info['total_versions']} versions, current: {info['current_version']}")
             return True
         else:
-            print(f"✗ Model versions failed: {response.status_code}")
+            report(f"✗ Model versions failed: {response.status_code}")
             return False
     except Exception as e:
-        print(f"✗ Model versions error: {e}")
+        report(f"✗ Model versions error: {e}")
         return False
 
 def test_anomaly_detection():
     """Test anomaly detection with sample data"""
-    print("\nTesting anomaly detection...")
+    report("\nTesting anomaly detection...")
     try:
         # Test with normal request
         normal_request = {
@@ -191,36 +226,30 @@ def test_anomaly_detection():
             "error_count": 0
         }
         
-        response = requests.post(f"{ML_SERVICE_URL}/analyze/request", json=normal_request)
+        # Test with suspicious request
+        suspicious_request = {
+            "response_time": 10.0,
+            "request_size": 1000000,
+            "error_count": 5
+        }
+        
+        # Both requests are scored in one call to the batch endpoint
+        response = post_json(f"{ML_SERVICE_URL}/analyze/requests", {"items": [normal_request, suspicious_request]})
         if response.status_code == 200:
-            result = response.json()
-            print(f"✓ Normal request analysis: anomaly={result['is_anomaly']}, score={result['anomaly_score']:.4f}")
-            
-            # Test with suspicious request
-            suspicious_request = {
-                "response_time": 10.0,
-                "request_size": 1000000,
-                "error_count": 5
-            }
-            
-            response = requests.post(f"{ML_SERVICE_URL}/analyze/request", json=suspicious_request)
-            if response.status_code == 200:
-                result = response.json()
-                print(f"✓ Suspicious request analysis: anomaly={result['is_anomaly']}, score={result['anomaly_score']:.4f}")
-                return True
-            else:
-                print(f"✗ Suspicious request analysis failed: {response.status_code}")
-                return False
+            normal_result, suspicious_result = orjson.loads(response.content)['results']
+            report(f"✓ Normal request analysis: anomaly={normal_result['is_anomaly']}, score={normal_result['anomaly_score']:.4f}")
+            report(f"✓ Suspicious request analysis: anomaly={suspicious_result['is_anomaly']}, score={suspicious_result['anomaly_score']:.4f}")
+            return True
         else:
-            print(f"✗ Normal request analysis failed: {response.status_code}")
+            report(f"✗ Request analysis failed: {response.status_code}")
             return False
     except Exception as e:
-        print(f"✗ Anomaly detection error: {e}")
+        report(f"✗ Anomaly detection error: {e}")
         return False
 
 def test_user_clustering():
     """Test user behavior clustering"""
-    print("\nTesting user clustering...")
+    report("\nTesting user clustering...")
     try:
         # Test with sample user behavior
         user_behavior = {
@@ -230,16 +259,16 @@ def test_user_clustering():
             "favorite_count": 12
         }
         
-        response = requests.post(f"{ML_SERVICE_URL}/analyze/user", json=user_behavior)
+        response = post_json(f"{ML_SERVICE_URL}/analyze/user", user_behavior)
         if response.status_code == 200:
-            result = response.json()
-            print(f"✓ User clustering: cluster={result['cluster']}")
+            result = orjson.loads(response.content)
+            report(f"✓ User clustering: cluster={result['cluster']}")
             return True
         else:
-            print(f"✗ User clustering failed: {response.status_code}")
+            report(f"✗ User clustering failed: {response.status_code}")
             return False
     except Exception as e:
-        print(f"✗ User clustering error: {e}")
+        report(f"✗ User clustering error: {e}")
         return False
 
 def run_all_tests():
@@ -248,24 +277,43 @@ def run_all_tests():
     print("ML Service Test Suite")
     print("=" * 50)
     
-    tests = [
-        test_health_check,
+    # Training tests run one after another, as they each keep the service
+    # busy fitting a model; the lightweight probes run alongside them
+    training_tests = [
         test_manual_logistic_regression,
         test_manual_decision_tree,
-        test_model_comparison,
+        test_model_comparison
+    ]
+    independent_tests = [
         test_scheduler_status,
         test_model_versions,
         test_anomaly_detection,
         test_user_clustering
     ]
     
-    passed = 0
-    total = len(tests)
+    def run_training_tests():
+        return [run_test(test) for test in training_tests]
+    
+    # The health check doubles as the readiness check before the fan-out
+    outcomes = [run_test(test_health_check)]
+    
+    # The tests are I/O bound, so threads overlap their requests
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        training_results = executor.submit(run_training_tests)
+        independent_results = [executor.submit(run_test, test) for test in independent_tests]
+        outcomes.extend(training_results.result())
+        outcomes.extend(future.result() for future in independent_results)
+    
+    # Print each test's output in order instead of interleaved as it ran
+    results = []
+    for result, lines in outcomes:
+        for line in lines:
+            print(line)
+        results.append(result)
     
-    for test in tests:
-        if test():
-            passed += 1
-        time.sleep(1)  # Small delay between tests
+    # Every test returns a bool, so the number passed is their sum
+    passed = sum(results)
+    total = len(results)
     
     print("\n" + "=" * 50)
     print(f"Test Results: {passed}/{total} tests passed")
@@ -0,0 +1,163 @@
+# Pure model fitting jobs, importable by process pool workers
+import numpy as np
+import scipy.sparse as sp
+from sklearn.ensemble import IsolationForest
+from sklearn.cluster import MiniBatchKMeans
+from sklearn.preprocessing import normalize
+from threadpoolctl import threadpool_limits
+
+# User-item density above which item similarities use dense float32 GEMM
+DENSE_SIMILARITY_MIN_DENSITY = 0.05
+
+def build_anomaly_detector(n_jobs: int = -1) -> IsolationForest:
+    """Create an unfitted anomaly detector with the service's settings; n_jobs trees are built in parallel"""
+    return IsolationForest(n_estimators=100, contamination=0.1, n_jobs=n_jobs, random_state=42)
+
+def build_user_clusterer(n_clusters: int = 5) -> MiniBatchKMeans:
+    """Create an unfitted user clusterer; mini-batches keep refits cheap and allow partial_fit"""
+    return MiniBatchKMeans(n_clusters=n_clusters, batch_size=1024, n_init='auto', random_state=42)
+
+def select_top_k(block: np.ndarray, k: int) -> tuple:
+    """Indices and values of the k largest entries of every row, in no particular order"""
+    # argpartition finds the k largest per row without a full sort
+    if k < block.shape[1]:
+        indices = np.argpartition(-block, k - 1, axis=1)[:, :k]
+    else:
+        indices = np.broadcast_to(np.arange(block.shape[1]), block.shape)
+    return indices, np.take_along_axis(block, indices, axis=1)
+
+def item_norms(user_item_matrix) -> np.ndarray:
+    """L2 norm of every item column of a (sparse or dense) user-item matrix, as float32"""
+    if sp.issparse(user_item_matrix):
+        squares = user_item_matrix.multiply(user_item_matrix).sum(axis=0)
+    else:
+        squares = np.square(user_item_matrix).sum(axis=0)
+    return np.sqrt(np.asarray(squares, dtype=np.float64).ravel()).astype(np.float32)
+
+def item_neighbours(user_item_matrix: sp.csr_matrix, k: int, block_size: int = 1024) -> tuple:
+    """
+    Find the k most cosine-similar items of every item
+
+    Args:
+        user_item_matrix: (n_users, n_items) interaction matrix
+        k: Number of neighbours to keep per item
+        block_size: Items whose similarities are computed per tile
+
+    Returns:
+        Tuple of (n_items, k) int32 neighbour indices and float32 similarities
+    """
+    # Unit-normalize the item vectors once so a plain product gives cosines.
+    # Items nobody interacted with stay all-zero
+    items = normalize(sp.csr_matrix(user_item_matrix, dtype=np.float32).T.tocsr(), axis=1)
+    n_items, n_users = items.shape
+    if items.nnz >= DENSE_SIMILARITY_MIN_DENSITY * n_items * n_users:
+        # Dense enough that float32 BLAS GEMM beats the sparse product
+        items = items.toarray()
+    items_t = items.T
+
+    k = max(0, min(k, n_items - 1))
+    top_k_indices = np.empty((n_items, k), dtype=np.int32)
+    top_k_scores = np.empty((n_items, k), dtype=np.float32)
+    if k == 0:
+        return top_k_indices, top_k_scores
+
+    # Similarities are produced one row tile at a time, so only a
+    # (block_size, n_items) slab exists at once, never the full matrix
+    for start in range(0, n_items, block_size):
+        block = items[start:start + block_size] @ items_t
+        block = block.toarray() if sp.issparse(block) else block
+
+        # Self-similarity never contributes to an item the user has not rated
+        rows = np.arange(len(block))
+        block[rows, start + rows] = -np.inf
+
+        indices, scores = select_top_k(block, k)
+        top_k_indices[start:start + len(block)] = indices
+        top_k_scores[start:start + len(block)] = scores
+
+    return top_k_indices, top_k_scores
+
+def fit_anomaly(data: np.ndarray, n_threads: int) -> tuple:
+    """
+    Fit a new anomaly detector
+
+    Args:
+        data: (n_samples, n_features) request features
+        n_threads: BLAS/OpenMP threads allowed while fitting
+
+    Returns:
+        Tuple of (fitted model, version metadata)
+    """
+    # The trees split on float32 anyway; converting once here spares sklearn
+    # a copy of the (mock) float64 data, and the scorer reads float32 rows
+    data = np.ascontiguousarray(data, dtype=np.float32)
+
+    # The trees are built on n_threads joblib workers rather than every core,
+    # since the other fit jobs run alongside this one
+    model = build_anomaly_detector(n_jobs=n_threads)
+    with threadpool_limits(limits=n_threads):
+        model.fit(data)
+
+    metadata = {"training_samples": len(data), "features": data.shape[1]}
+    return model, metadata
+
+def fit_clustering(data: np.ndarray, n_threads: int) -> tuple:
+    """
+    Fit a new user clusterer
+
+    Args:
+        data: (n_samples, n_features) user activity features
+        n_threads: BLAS/OpenMP threads allowed while fitting
+
+    Returns:
+        Tuple of (fitted model, version metadata)
+    """
+    # Fitting on float32 keeps the centers float32, the dtype requests are
+    # assigned and incremental batches are fed in
+    data = np.ascontiguousarray(data, dtype=np.float32)
+    model = build_user_clusterer(n_clusters=min(5, len(data)))
+    with threadpool_limits(limits=n_threads):
+        model.fit(data)
+
+    metadata = {"training_samples": len(data), "n_clusters": model.n_clusters}
+    return model, metadata
+
+def fit_recommendation(data: tuple, k: int, n_threads: int) -> tuple:
+    """
+    Fit a new item-based recommendation model
+
+    Args:
+        data: (user-item matrix, user IDs, item IDs) as returned by load_recommendation_data
+        k: Number of neighbours to keep per item
+        n_threads: BLAS/OpenMP threads allowed while fitting
+
+    Returns:
+        Tuple of (model data, version metadata), or None if nobody rated anything
+    """
+    user_item_matrix, user_ids, item_ids = data
+    user_item_matrix = sp.csr_matrix(user_item_matrix, dtype=np.float32)
+    # Stored entries must mean "rated"; recommendations read them directly
+    user_item_matrix.eliminate_zeros()
+    if user_item_matrix.nnz == 0:
+        return None
+
+    with threadpool_limits(limits=n_threads):
+        top_k_indices, top_k_scores = item_neighbours(user_item_matrix, k)
+
+    model_data = {
+        'top_k_indices': top_k_indices,
+        'top_k_scores': top_k_scores,
+        # Cosine denominators for scoring users the neighbour tables do not cover
+        'item_norms': item_norms(user_item_matrix),
+        'user_item_matrix': user_item_matrix,
+        'user_ids': np.asarray(user_ids),
+        'item_ids': np.asarray(item_ids)
+    }
+    metadata = {
+        "matrix_shape": user_item_matrix.shape,
+        "n_users": user_item_matrix.shape[0],
+        "n_items": user_item_matrix.shape[1],
+        "nnz": user_item_matrix.nnz,
+        "top_k": int(top_k_indices.shape[1])
+    }
+    return model_data, metadata
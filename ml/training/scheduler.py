@@ -1,58 +1,138 @@
 import os
 import logging
+import signal
+import threading
+import time
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from datetime import datetime, timedelta
+from cachetools import TTLCache
 from apscheduler.schedulers.background import BackgroundScheduler
+from apscheduler.executors.pool import ThreadPoolExecutor
 from apscheduler.triggers.cron import CronTrigger
 from apscheduler.triggers.interval import IntervalTrigger
+from flask import Flask, request, jsonify
+from werkzeug.serving import make_server
 import atexit
-from typing import Optional
+from concurrent.futures import ThreadPoolExecutor as RetrainExecutor, TimeoutError as FutureTimeoutError
+from typing import Callable, Optional
+
+# Seconds a /health probe result is reused; the data volume and performance
+# checks of one retrain job then share a single request
+HEALTH_PROBE_TTL = 30
+
+# Seconds a retrain may take before the job reports it as failed, over HTTP
+# and in process alike
+RETRAIN_TIMEOUT = 300
+
+# Port of the control API served when the scheduler runs as its own process;
+# the ML service's /scheduler endpoints forward to it (SCHEDULER_URL)
+SCHEDULER_PORT = int(os.getenv('SCHEDULER_PORT', '5001'))
+
+# Conditionally retrained model types: (data volume threshold, minimum
+# accuracy, trigger class, trigger arguments, schedule description)
+RETRAIN_JOBS = {
+    'anomaly': (500, 0.85, IntervalTrigger, {'hours': 1}, "every hour"),
+    'clustering': (200, 0.80, CronTrigger, {'hour': 2, 'minute': 0}, "daily at 2 AM"),
+    # Sunday = 6
+    'recommendation': (100, 0.75, CronTrigger, {'day_of_week': 6, 'hour': 3, 'minute': 0}, "weekly on Sundays at 3 AM"),
+    'trend': (50, 0.70, CronTrigger, {'day': 1, 'hour': 4, 'minute': 0}, "monthly on 1st at 4 AM"),
+}
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class MLRetrainingScheduler:
-    def __init__(self, ml_service_url: str = "http://localhost:5000", api_key: Optional[str] = None):
+    def __init__(self, ml_service_url: str = "http://localhost:5000", api_key: Optional[str] = None,
+                 local_callback: Optional[Callable[[str], bool]] = None):
         """
         Initialize the ML retraining scheduler
         
         Args:
             ml_service_url: URL of the ML service
             api_key: Optional API key for authentication
+            local_callback: Retrains a model type in this process and returns whether it succeeded;
+                when given, the ML service is called directly instead of over HTTP. Only pass it
+                when this process also serves requests, not from a Gunicorn master
         """
         self.ml_service_url = ml_service_url
         self.api_key = api_key
-        self.scheduler = BackgroundScheduler()
+        self._local_callback = local_callback
+        # In-process retrains run one at a time on their own thread, so two
+        # overlapping jobs queue instead of training concurrently and a job
+        # can give up after RETRAIN_TIMEOUT
+        self._local_executor = (RetrainExecutor(max_workers=1, thread_name_prefix='retrain')
+                                if local_callback is not None else None)
+        # Jobs only wait on a /train request or on the retrain thread, so two
+        # worker threads are plenty. One run per job at a time, and fires
+        # missed while a retrain was running collapse into a single run
+        self.scheduler = BackgroundScheduler(
+            executors={'default': ThreadPoolExecutor(max_workers=2)},
+            job_defaults={'coalesce': True, 'max_instances': 1, 'misfire_grace_time': 300}
+        )
         self.last_retrain_times = {}
+        # time.monotonic() of each model type's last retrain, used by the
+        # threshold checks; last_retrain_times is kept for status reporting
+        self._last_retrain_mono = {}
+        
+        # Keep-alive session for the calls to the ML service, so every
+        # scheduled check reuses a pooled connection instead of opening one
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8,
+                              max_retries=Retry(total=2, backoff_factor=0.2))
+        self._session.mount('http://', adapter)
+        self._session.mount('https://', adapter)
+        
+        # Status code of the last /health probe, reused for HEALTH_PROBE_TTL seconds
+        self._health_cache = TTLCache(maxsize=1, ttl=HEALTH_PROBE_TTL)
+        self._health_lock = threading.Lock()
         
         # Configure scheduler
         self.scheduler.start()
-        atexit.register(lambda: self.scheduler.shutdown())
+        # Skipped when shutdown() already stopped it
+        atexit.register(lambda: self.scheduler.shutdown() if self.scheduler.running else None)
         
         logger.info("ML Retraining Scheduler initialized")
 
     def _make_retrain_request(self, model_type: str = "all") -> bool:
         """Make a retraining request to the ML service"""
         try:
-            url = f"{self.ml_service_url}/train"
-            headers = {}
-            
-            if self.api_key:
-                headers['Authorization'] = f'Bearer {self.api_key}'
-            
-            data = {"model_type": model_type}
-            
             logger.info(f"Triggering retraining for {model_type} models")
-            response = requests.post(url, json=data, headers=headers, timeout=300)  # 5 min timeout
             
-            if response.status_code == 200:
-                logger.info(f"Successfully triggered retraining for {model_type} models")
-                self.last_retrain_times[model_type] = datetime.now()
-                return True
+            if self._local_callback is not None:
+                # Running inside the ML service: no HTTP round trip to ourselves
+                future = self._local_executor.submit(self._local_callback, model_type)
+                try:
+                    succeeded = future.result(timeout=RETRAIN_TIMEOUT)
+                except FutureTimeoutError:
+                    # The retrain keeps running; later ones queue behind it
+                    logger.error(f"Timeout while retraining {model_type} models")
+                    return False
+                if not succeeded:
+                    logger.error(f"Failed to retrain {model_type} models")
+                    return False
             else:
-                logger.error(f"Failed to retrain {model_type} models: {response.status_code} - {response.text}")
-                return False
+                url = f"{self.ml_service_url}/train"
+                headers = {'Content-Type': 'application/json'}
+                
+                if self.api_key:
+                    headers['Authorization'] = f'Bearer {self.api_key}'
+                
+                data = {"model_type": model_type}
+                
+                response = self._session.post(url, data=orjson.dumps(data), headers=headers, timeout=RETRAIN_TIMEOUT)
+                
+                if response.status_code != 200:
+                    logger.error(f"Failed to retrain {model_type} models: {response.status_code} - {response.text}")
+                    return False
+            
+            logger.info(f"Successfully triggered retraining for {model_type} models")
+            self.last_retrain_times[model_type] = datetime.now()
+            self._last_retrain_mono[model_type] = time.monotonic()
+            return True
                 
         except requests.exceptions.Timeout:
             logger.error(f"Timeout while retraining {model_type} models")
@@ -64,22 +144,33 @@ class MLRetrainingScheduler:
             logger.error(f"Unexpected error while retraining {model_type} models: {e}")
             return False
 
+    def _probe_health(self) -> int:
+        """Status code of the ML service's /health endpoint, probed at most once per HEALTH_PROBE_TTL seconds"""
+        if self._local_callback is not None:
+            # The service is this process, so it is up
+            return 200
+        with self._health_lock:
+            status_code = self._health_cache.get('health')
+        if status_code is None:
+            response = self._session.get(f"{self.ml_service_url}/health", timeout=30)
+            status_code = response.status_code
+            with self._health_lock:
+                self._health_cache['health'] = status_code
+        return status_code
+
     def _check_data_volume_threshold(self, model_type: str, threshold: int = 1000) -> bool:
         """Check if data volume threshold is reached for retraining"""
         try:
             # This would typically check the database for new data since last retrain
             # For now, we'll implement a simple check
-            url = f"{self.ml_service_url}/health"
-            response = requests.get(url, timeout=30)
-            
-            if response.status_code == 200:
+            if self._probe_health() == 200:
                 # In a real implementation, this would check actual data counts
                 # For now, we'll simulate based on time since last retrain
-                last_retrain = self.last_retrain_times.get(model_type)
+                last_retrain = self._last_retrain_mono.get(model_type)
                 if last_retrain is None:
                     return True  # Never retrained before
                 
-                hours_since_retrain = (datetime.now() - last_retrain).total_seconds() / 3600
+                hours_since_retrain = (time.monotonic() - last_retrain) / 3600
                 # Simulate data accumulation: assume 100 samples per hour
                 estimated_new_samples = int(hours_since_retrain * 100)
                 
@@ -96,18 +187,15 @@ class MLRetrainingScheduler:
         try:
             # This would typically evaluate model performance on validation data
             # For now, we'll implement a simple simulation
-            url = f"{self.ml_service_url}/health"
-            response = requests.get(url, timeout=30)
-            
-            if response.status_code == 200:
+            if self._probe_health() == 200:
                 # In a real implementation, this would check actual model metrics
                 # For now, we'll simulate performance degradation over time
-                last_retrain = self.last_retrain_times.get(model_type)
+                last_retrain = self._last_retrain_mono.get(model_type)
                 if last_retrain is None:
                     return True  # Never retrained before
                 
-                days_since_retrain = (datetime.now() - last_retrain).days
-                # Simulate performance degradation: 1% per day
+                days_since_retrain = (time.monotonic() - last_retrain) / 86400
+                # Simulate performance degradation: 1% per day, accrued continuously
                 simulated_accuracy = max(0.5, 0.95 - (days_since_retrain * 0.01))
                 
                 return simulated_accuracy < min_accuracy
@@ -118,69 +206,22 @@ class MLRetrainingScheduler:
             logger.error(f"Error checking performance for {model_type}: {e}")
             return False
 
-    def retrain_anomaly_models(self):
-        """Retrain anomaly detection models"""
-        logger.info("Scheduled anomaly model retraining triggered")
+    def _retrain(self, model_type: str):
+        """Retrain one model type if its data volume or performance threshold is reached"""
+        volume_threshold, min_accuracy, _, _, _ = RETRAIN_JOBS[model_type]
+        logger.info(f"Scheduled {model_type} model retraining triggered")
         
         # Check if retraining is needed based on data volume or performance
-        if (self._check_data_volume_threshold("anomaly", threshold=500) or 
-            self._check_model_performance("anomaly", min_accuracy=0.85)):
-            
-            success = self._make_retrain_request("anomaly")
-            if success:
-                logger.info("Anomaly models retrained successfully")
-            else:
-                logger.error("Failed to retrain anomaly models")
-        else:
-            logger.info("Anomaly model retraining skipped - thresholds not met")
-
-    def retrain_clustering_models(self):
-        """Retrain user clustering models"""
-        logger.info("Scheduled clustering model retraining triggered")
-        
-        # Check if retraining is needed
-        if (self._check_data_volume_threshold("clustering", threshold=200) or 
-            self._check_model_performance("clustering", min_accuracy=0.80)):
-            
-            success = self._make_retrain_request("clustering")
-            if success:
-                logger.info("Clustering models retrained successfully")
-            else:
-                logger.error("Failed to retrain clustering models")
-        else:
-            logger.info("Clustering model retraining skipped - thresholds not met")
-
-    def retrain_recommendation_models(self):
-        """Retrain recommendation models"""
-        logger.info("Scheduled recommendation model retraining triggered")
-        
-        # Check if retraining is needed
-        if (self._check_data_volume_threshold("recommendation", threshold=100) or 
-            self._check_model_performance("recommendation", min_accuracy=0.75)):
+        if (self._check_data_volume_threshold(model_type, threshold=volume_threshold) or 
+            self._check_model_performance(model_type, min_accuracy=min_accuracy)):
             
-            success = self._make_retrain_request("recommendation")
+            success = self._make_retrain_request(model_type)
             if success:
-                logger.info("Recommendation models retrained successfully")
+                logger.info(f"{model_type.capitalize()} models retrained successfully")
             else:
-                logger.error("Failed to retrain recommendation models")
+                logger.error(f"Failed to retrain {model_type} models")
         else:
-            logger.info("Recommendation model retraining skipped - thresholds not met")
-
-    def retrain_trend_models(self):
-        """Retrain trend prediction models"""
-        logger.info("Scheduled trend model retraining triggered")
-        
-        # Check if retraining is needed
-        if (self._check_data_volume_threshold("trend", threshold=50) or 
-            self._check_model_performance("trend", min_accuracy=0.70)):
-            
-            success = self._make_retrain_request("trend")
-            if success:
-                logger.info("Trend models retrained successfully")
-            else:
-                logger.error("Failed to retrain trend models")
-        else:
-            logger.info("Trend model retraining skipped - thresholds not met")
+            logger.info(f"{model_type.capitalize()} model retraining skipped - thresholds not met")
 
     def retrain_all_models(self):
         """Retrain all models"""
@@ -194,45 +235,17 @@ class MLRetrainingScheduler:
     def setup_schedules(self):
         """Setup all retraining schedules"""
         
-        # Hourly anomaly model retraining (every hour)
-        self.scheduler.add_job(
-            func=self.retrain_anomaly_models,
-            trigger=IntervalTrigger(hours=1),
-            id='anomaly_retrain',
-            name='Anomaly Model Retraining',
-            replace_existing=True
-        )
-        logger.info("Scheduled anomaly model retraining every hour")
-        
-        # Daily user clustering retraining (at 2 AM)
-        self.scheduler.add_job(
-            func=self.retrain_clustering_models,
-            trigger=CronTrigger(hour=2, minute=0),
-            id='clustering_retrain',
-            name='Clustering Model Retraining',
-            replace_existing=True
-        )
-        logger.info("Scheduled clustering model retraining daily at 2 AM")
-        
-        # Weekly recommendation model retraining (Sundays at 3 AM)
-        self.scheduler.add_job(
-            func=self.retrain_recommendation_models,
-            trigger=CronTrigger(day_of_week=6, hour=3, minute=0),  # Sunday = 6
-            id='recommendation_retrain',
-            name='Recommendation Model Retraining',
-            replace_existing=True
-        )
-        logger.info("Scheduled recommendation model retraining weekly on Sundays at 3 AM")
-        
-        # Monthly trend prediction retraining (1st of month at 4 AM)
-        self.scheduler.add_job(
-            func=self.retrain_trend_models,
-            trigger=CronTrigger(day=1, hour=4, minute=0),
-            id='trend_retrain',
-            name='Trend Model Retraining',
-            replace_existing=True
-        )
-        logger.info("Scheduled trend model retraining monthly on 1st at 4 AM")
+        # One conditional retraining job per model type
+        for model_type, (_, _, trigger, trigger_args, description) in RETRAIN_JOBS.items():
+            self.scheduler.add_job(
+                func=self._retrain,
+                args=[model_type],
+                trigger=trigger(**trigger_args),
+                id=f'{model_type}_retrain',
+                name=f'{model_type.capitalize()} Model Retraining',
+                replace_existing=True
+            )
+            logger.info(f"Scheduled {model_type} model retraining {description}")
         
         # Emergency full retraining (can be triggered manually)
         self.scheduler.add_job(
@@ -248,14 +261,8 @@ class MLRetrainingScheduler:
         """Manually trigger retraining for specific model type"""
         logger.info(f"Manual retraining triggered for {model_type}")
         
-        if model_type == "anomaly":
-            self.retrain_anomaly_models()
-        elif model_type == "clustering":
-            self.retrain_clustering_models()
-        elif model_type == "recommendation":
-            self.retrain_recommendation_models()
-        elif model_type == "trend":
-            self.retrain_trend_models()
+        if model_type in RETRAIN_JOBS:
+            self._retrain(model_type)
         elif model_type == "all":
             self.retrain_all_models()
         else:
@@ -305,21 +312,67 @@ class MLRetrainingScheduler:
         """Shutdown the scheduler"""
         logger.info("Shutting down ML retraining scheduler")
         self.scheduler.shutdown()
+        if self._local_executor is not None:
+            self._local_executor.shutdown(wait=False, cancel_futures=True)
+        self._session.close()
 
 
 # Global scheduler instance
 scheduler_instance = None
+_scheduler_lock = threading.Lock()
 
-def get_scheduler() -> MLRetrainingScheduler:
-    """Get or create the global scheduler instance"""
+def get_scheduler(local_callback: Optional[Callable[[str], bool]] = None) -> MLRetrainingScheduler:
+    """
+    Get or create the global scheduler instance
+    
+    Args:
+        local_callback: In-process retraining callback, used when the instance is created
+    """
     global scheduler_instance
     if scheduler_instance is None:
-        ml_service_url = os.getenv('ML_SERVICE_URL', 'http://localhost:5000')
-        api_key = os.getenv('ML_API_KEY', None)
-        scheduler_instance = MLRetrainingScheduler(ml_service_url, api_key)
-        scheduler_instance.setup_schedules()
+        # Concurrent first callers would otherwise each start a scheduler
+        # with its own copy of every job
+        with _scheduler_lock:
+            if scheduler_instance is None:
+                ml_service_url = os.getenv('ML_SERVICE_URL', 'http://localhost:5000')
+                api_key = os.getenv('ML_API_KEY', None)
+                instance = MLRetrainingScheduler(ml_service_url, api_key, local_callback)
+                instance.setup_schedules()
+                scheduler_instance = instance
     return scheduler_instance
 
+def create_control_app(scheduler: MLRetrainingScheduler) -> Flask:
+    """
+    Control API of a standalone scheduler process
+    
+    Serves the ML service's /scheduler endpoints with the same paths and
+    responses, so a service that does not run the scheduler itself (under
+    Gunicorn) can forward them here
+    """
+    control_app = Flask(__name__)
+    
+    @control_app.route('/scheduler/status', methods=['GET'])
+    def status():
+        return jsonify({"status": "success", "scheduler_status": scheduler.get_schedule_status()})
+    
+    @control_app.route('/scheduler/trigger', methods=['POST'])
+    def trigger():
+        model_type = (request.get_json(silent=True) or {}).get('model_type', 'all')
+        scheduler.trigger_manual_retrain(model_type)
+        return jsonify({"status": "success", "message": f"Manual retraining triggered for {model_type} models"})
+    
+    @control_app.route('/scheduler/pause/<job_id>', methods=['POST'])
+    def pause(job_id: str):
+        scheduler.pause_schedule(job_id)
+        return jsonify({"status": "success", "message": f"Job {job_id} paused successfully"})
+    
+    @control_app.route('/scheduler/resume/<job_id>', methods=['POST'])
+    def resume(job_id: str):
+        scheduler.resume_schedule(job_id)
+        return jsonify({"status": "success", "message": f"Job {job_id} resumed successfully"})
+    
+    return control_app
+
 def start_scheduler():
     """Start the retraining scheduler"""
     scheduler = get_scheduler()
@@ -327,14 +380,20 @@ def start_scheduler():
     return scheduler
 
 if __name__ == "__main__":
-    # Start scheduler when run directly
+    # Start scheduler when run directly, e.g. next to the ML service under
+    # Gunicorn: python -m training.scheduler
     scheduler = start_scheduler()
     
-    # Keep the script running
-    try:
-        import time
-        while True:
-            time.sleep(60)  # Sleep for 1 minute
-    except KeyboardInterrupt:
-        logger.info("Received interrupt signal, shutting down...")
-        scheduler.shutdown() 
\ No newline at end of file
+    # Serve the control API the ML service forwards its /scheduler endpoints to
+    control_server = make_server('0.0.0.0', SCHEDULER_PORT, create_control_app(scheduler), threaded=True)
+    threading.Thread(target=control_server.serve_forever, name='scheduler-control', daemon=True).start()
+    logger.info(f"Scheduler control API listening on port {SCHEDULER_PORT}")
+    
+    # Keep the script running, idle until SIGTERM or SIGINT arrives
+    stop_event = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop_event.set())
+    signal.signal(signal.SIGINT, lambda *_: stop_event.set())
+    stop_event.wait()
+    logger.info("Received interrupt signal, shutting down...")
+    control_server.shutdown()
+    scheduler.shutdown() 
\ No newline at end of file
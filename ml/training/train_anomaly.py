@@ -1,10 +1,31 @@
+import os
 import numpy as np
 from ml.models.anomaly import AnomalyDetector
 
+MODEL_PATH = 'anomaly_model.joblib'
+# Trees added to the previous forest per run, and the forest size at which
+# the next run starts over with a fresh 100-tree forest
+WARM_START_TREES = 10
+MAX_WARM_START_TREES = 300
+
 # Placeholder: Replace with real data loading
-X = np.random.randn(1000, 10)
+rng = np.random.default_rng(42)
+X = rng.standard_normal((1000, 10), dtype=np.float32)
+
+# n_jobs=-1 builds the trees on every core
+model = AnomalyDetector(method='isolation_forest', n_estimators=100, n_jobs=-1)
+if os.path.exists(MODEL_PATH):
+    # Warm start: keep the previous run's trees and only fit the new ones
+    # on the current data; the score threshold is recomputed over all trees
+    previous = AnomalyDetector(method='isolation_forest')
+    previous.load(MODEL_PATH)
+    forest = previous.model
+    if (hasattr(forest, 'estimators_') and forest.n_features_in_ == X.shape[1]
+            and forest.n_estimators + WARM_START_TREES <= MAX_WARM_START_TREES):
+        forest.set_params(warm_start=True, n_estimators=forest.n_estimators + WARM_START_TREES, n_jobs=-1)
+        model = previous
 
-model = AnomalyDetector(method='isolation_forest', n_estimators=100)
 model.fit(X)
-model.save('anomaly_model.joblib')
-print('Anomaly model trained and saved.') 
\ No newline at end of file
+# Left uncompressed: the inference API memory-maps this file
+model.save(MODEL_PATH)
+print('Anomaly model trained and saved.')
\ No newline at end of file
@@ -1,10 +1,15 @@
+import joblib
 import numpy as np
 from ml.models.clustering import UserClustering
 
 # Placeholder: Replace with real data loading
-X = np.random.rand(500, 5)
+rng = np.random.default_rng(42)
+X = rng.random((500, 5), dtype=np.float32)
 
-model = UserClustering(n_clusters=3)
+# k-means itself runs on all cores through OpenMP; n_init='auto' does a
+# single k-means++ initialization instead of the 10 of the old default
+model = UserClustering(n_clusters=3, n_init='auto')
 model.fit(X)
-model.save('clustering_model.joblib')
+# Same contents as model.save(), zlib-compressed; load() reads it unchanged
+joblib.dump(model.model, 'clustering_model.joblib', compress=3, protocol=5)
 print('Clustering model trained and saved.') 
\ No newline at end of file
@@ -1,10 +1,13 @@
+import joblib
 import numpy as np
 from ml.models.recommendation import ItemBasedRecommender
 
 # Placeholder: Replace with real data loading
-user_item_matrix = np.random.randint(0, 2, (100, 50))
+rng = np.random.default_rng(42)
+user_item_matrix = rng.integers(0, 2, (100, 50), dtype=np.int8)
 
 model = ItemBasedRecommender()
 model.fit(user_item_matrix)
-model.save('recommender_model.joblib')
+# Same contents as model.save(), zlib-compressed; load() reads it unchanged
+joblib.dump(model.user_item_matrix, 'recommender_model.joblib', compress=3, protocol=5)
 print('Recommendation model trained and saved.') 
\ No newline at end of file
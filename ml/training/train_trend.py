@@ -1,11 +1,14 @@
+import joblib
 import numpy as np
 from ml.models.trend import TrendPredictor
 
 # Placeholder: Replace with real data loading
+rng = np.random.default_rng(42)
 X = np.arange(24).reshape(-1, 1)  # e.g., months
-y = np.random.rand(24) * 100  # e.g., sales
+y = rng.random(24) * 100  # e.g., sales
 
 model = TrendPredictor()
 model.fit(X, y)
-model.save('trend_model.joblib')
+# Same contents as model.save(), zlib-compressed; load() reads it unchanged
+joblib.dump(model.model, 'trend_model.joblib', compress=3, protocol=5)
 print('Trend model trained and saved.') 
\ No newline at end of file
@@ -0,0 +1,21 @@
+# WSGI entry point for running the ML service under Gunicorn
+#
+#   gunicorn wsgi:application    (settings in gunicorn.conf.py)
+#
+# With preload_app this module is imported once in the Gunicorn master, so the
+# models are loaded before the workers fork and their arrays are shared
+# copy-on-write. The retraining scheduler does not run here: its thread would
+# only live in the master, and each worker's /scheduler endpoints would act on
+# an inert forked copy. Run it as its own process instead,
+#
+#   python -m training.scheduler    (ML_SERVICE_URL points at this service)
+#
+# and set SCHEDULER_URL to its control API so the /scheduler endpoints forward
+# to it. Its jobs retrain with an HTTP POST to /train that a worker handles.
+from app import app, initialize_services, load_or_create_models, warm_up_models
+
+initialize_services(local_scheduler=False)
+load_or_create_models()
+warm_up_models()
+
+application = app